@@ -0,0 +1,203 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from browser_use import BrowserSession
+
+logger = logging.getLogger(__name__)
+
+# Viewport shared by every crawl phase (same values the crawler used per phase before pooling)
+DEFAULT_VIEWPORT = {"width": 1280, "height": 1100}
+
+
+class PooledBrowser:
+    """A launched Chromium instance tracked by the pool"""
+
+    def __init__(self, browser, generation: int = 0):
+        self.browser = browser
+        self.uses = 0
+        self.generation = generation
+        self.created_at = time.time()
+
+    def is_healthy(self) -> bool:
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+
+class BrowserPool:
+    """
+    Per-worker pool of pre-launched Chromium browsers.
+
+    Every lease gets a fresh BrowserContext (separate cookies, storage and cache)
+    on a warm browser, so crawl phases no longer pay a Chromium cold start each.
+    Browsers are health-checked on checkout and recycled after `max_uses` leases,
+    or all at once with `recycle()` (leased browsers are closed when they come back).
+    """
+
+    def __init__(self, max_size: int = 1, max_uses: int = 20, headless: bool = True):
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.headless = headless
+        self._generation = 0
+        self._idle: List[PooledBrowser] = []
+        self._playwright = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _ensure_loop(self):
+        """Bind pool state to the running event loop (Playwright objects are loop-bound)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            logger.warning("[BROWSER-POOL] Event loop changed, discarding browsers from the previous loop")
+        self._idle = []
+        self._playwright = None
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_size)
+        self._lock = asyncio.Lock()
+
+    async def _ensure_playwright(self):
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        return self._playwright
+
+    async def _launch(self) -> PooledBrowser:
+        playwright = await self._ensure_playwright()
+        started = time.time()
+        browser = await playwright.chromium.launch(
+            headless=self.headless,
+            args=["--no-sandbox", "--disable-dev-shm-usage"]
+        )
+        logger.info(f"🚀 [BROWSER-POOL-LAUNCH] Chromium launched in {time.time() - started:.2f}s")
+        return PooledBrowser(browser, self._generation)
+
+    async def _checkout(self) -> PooledBrowser:
+        async with self._lock:
+            while self._idle:
+                pooled = self._idle.pop()
+                if pooled.is_healthy():
+                    return pooled
+                logger.warning("[BROWSER-POOL] Dropping unhealthy browser")
+                await self._close_browser(pooled)
+            return await self._launch()
+
+    async def _checkin(self, pooled: PooledBrowser):
+        pooled.uses += 1
+        if pooled.uses >= self.max_uses or pooled.generation != self._generation or not pooled.is_healthy():
+            logger.info(f"♻️ [BROWSER-POOL-RECYCLE] Recycling browser after {pooled.uses} leases")
+            await self._close_browser(pooled)
+            return
+        async with self._lock:
+            self._idle.append(pooled)
+
+    async def _close_browser(self, pooled: PooledBrowser):
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.debug(f"[BROWSER-POOL] Error closing browser: {e}")
+
+    async def _new_session(self, pooled: PooledBrowser):
+        context = await pooled.browser.new_context(viewport=DEFAULT_VIEWPORT)
+        browser_session = BrowserSession(
+            browser=pooled.browser,
+            browser_context=context,
+            keep_alive=True,  # the pool owns the browser, the agent must not close it
+            use_adblock=False,  # Allow all content including ads
+            viewport=DEFAULT_VIEWPORT,
+            viewport_expansion=-1
+        )
+        return browser_session, context
+
+    async def _close_contexts(self, contexts):
+        for context in contexts:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug(f"[BROWSER-POOL] Error closing context: {e}")
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        Lease a BrowserSession backed by a pooled browser and a fresh context
+
+        Yields:
+            BrowserSession: session ready to be handed to an Agent
+        """
+        async with self.lease_many(1) as sessions:
+            yield sessions[0]
+
+    @asynccontextmanager
+    async def lease_many(self, count: int):
+        """
+        Lease several isolated sessions on the same pooled browser
+
+        Each session has its own BrowserContext, so agents running side by side
+        do not share cookies, storage or login state.
+
+        Yields:
+            List[BrowserSession]: `count` sessions on one browser
+        """
+        self._ensure_loop()
+        async with self._semaphore:
+            pooled = await self._checkout()
+            sessions, contexts = [], []
+            try:
+                for _ in range(max(count, 1)):
+                    browser_session, context = await self._new_session(pooled)
+                    sessions.append(browser_session)
+                    contexts.append(context)
+                yield sessions
+            finally:
+                await self._close_contexts(contexts)
+                await self._checkin(pooled)
+
+    async def warm_up(self, count: Optional[int] = None):
+        """Pre-launch browsers so the first crawl does not pay the cold start"""
+        self._ensure_loop()
+        count = min(count or self.max_size, self.max_size)
+        async with self._lock:
+            while len(self._idle) < count:
+                self._idle.append(await self._launch())
+        logger.info(f"🔥 [BROWSER-POOL-WARM] {len(self._idle)} browser(s) ready")
+
+    async def recycle(self):
+        """Close idle browsers now and leased ones on checkin; later leases launch fresh browsers"""
+        if self._loop is None:
+            return
+        self._ensure_loop()
+        self._generation += 1
+        async with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._close_browser(pooled)
+        logger.info(f"♻️ [BROWSER-POOL-RECYCLE] {len(idle)} idle browser(s) closed, leased browsers close on checkin")
+
+    async def close(self):
+        """Close every idle browser and stop Playwright"""
+        if self._loop is None:
+            return
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._close_browser(pooled)
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"[BROWSER-POOL] Error stopping playwright: {e}")
+            self._playwright = None
+
+
+browser_pool = BrowserPool(
+    # One browser per concurrent crawl unless set explicitly
+    max_size=int(os.environ.get("BROWSER_POOL_SIZE", os.environ.get("CRAWL_CONCURRENCY", 1))),
+    max_uses=int(os.environ.get("BROWSER_POOL_MAX_USES", 20)),
+    headless=os.environ.get("BROWSER_HEADLESS", "true").lower() == "true"
+)
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+from .redis_client import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Crawl phases in completion order; a retry resumes after the last one reached
+PHASES = ["started", "discovery", "parsed", "screenshots", "stored"]
+
+
+class CheckpointStore:
+    """
+    Per-task crawl artifacts in Redis so a retry can resume instead of re-crawling.
+
+    Each task id owns one hash (`{prefix}:{task_id}`) holding the url and options,
+    the last completed `phase`, and JSON artifacts: `discovery` (payment methods),
+    `gambling_data` (parsed GamblingSiteData), `screenshot_keys` (account -> oss_key)
+    and `store_status`. Batches keep the list of their per-URL subtask ids.
+    """
+
+    def __init__(self, ttl_seconds: int = 7 * 24 * 3600, prefix: str = "checkpoint"):
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _key(self, task_id: str) -> str:
+        return f"{self.prefix}:{task_id}"
+
+    def _batch_key(self, batch_id: str) -> str:
+        return f"{self.prefix}:batch:{batch_id}"
+
+    def _mapping(self, phase: Optional[str], artifacts: Dict[str, Any]) -> Dict[str, str]:
+        mapping = {"updated_at": str(time.time())}
+        if phase:
+            mapping["phase"] = phase
+        for name, value in artifacts.items():
+            mapping[name] = value.model_dump_json() if hasattr(value, "model_dump_json") else json.dumps(value, default=str)
+        return mapping
+
+    @staticmethod
+    def reached(checkpoint: Optional[Dict[str, Any]], phase: str) -> bool:
+        """Whether a loaded checkpoint has completed `phase`"""
+        if not checkpoint or checkpoint.get("phase") not in PHASES:
+            return False
+        return PHASES.index(checkpoint["phase"]) >= PHASES.index(phase)
+
+    def start(self, task_id: str, url: str, options: Optional[Dict[str, Any]] = None, resumed_from: Optional[str] = None):
+        self.save(task_id, "started", url=url, options=options or {}, resumed_from=resumed_from)
+
+    def save(self, task_id: Optional[str], phase: Optional[str] = None, **artifacts):
+        """Record a completed phase and its artifacts (synchronous, for worker code)"""
+        if not self.enabled or not task_id:
+            return
+        try:
+            pipe = get_redis().pipeline()
+            pipe.hset(self._key(task_id), mapping=self._mapping(phase, artifacts))
+            pipe.expire(self._key(task_id), self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ [CHECKPOINT] Gagal menyimpan checkpoint {phase} untuk task {task_id}: {e}")
+
+    async def asave(self, task_id: Optional[str], phase: Optional[str] = None, **artifacts):
+        """Record a completed phase and its artifacts from crawler (async) code"""
+        if not self.enabled or not task_id:
+            return
+        try:
+            pipe = get_async_redis().pipeline()
+            pipe.hset(self._key(task_id), mapping=self._mapping(phase, artifacts))
+            pipe.expire(self._key(task_id), self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ [CHECKPOINT] Gagal menyimpan checkpoint {phase} untuk task {task_id}: {e}")
+
+    def load(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Checkpoint with JSON artifacts decoded, or None if the task left none"""
+        raw = get_redis().hgetall(self._key(task_id))
+        if not raw:
+            return None
+        checkpoint = {}
+        for name, value in raw.items():
+            if name in ("phase", "updated_at"):
+                checkpoint[name] = value
+                continue
+            try:
+                checkpoint[name] = json.loads(value)
+            except ValueError:
+                checkpoint[name] = value
+        return checkpoint
+
+    def save_batch(self, batch_id: str, urls: List[str], options: Optional[Dict[str, Any]], item_ids: List[str]):
+        if not self.enabled:
+            return
+        try:
+            get_redis().set(
+                self._batch_key(batch_id),
+                json.dumps({"urls": urls, "options": options or {}, "item_ids": item_ids}),
+                ex=self.ttl_seconds
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ [CHECKPOINT] Gagal menyimpan checkpoint batch {batch_id}: {e}")
+
+    def load_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        raw = get_redis().get(self._batch_key(batch_id))
+        return json.loads(raw) if raw else None
+
+
+checkpoint_store = CheckpointStore(
+    ttl_seconds=int(os.environ.get("CHECKPOINT_TTL", 7 * 24 * 3600))
+)
@@ -3,6 +3,7 @@ import random
 from datetime import datetime
 from typing import List
 from browser_use.llm import ChatGoogle, ChatOpenAI
+from .rate_limiter import llm_limiter
 from dotenv import load_dotenv
 load_dotenv()
 import string
@@ -16,13 +17,14 @@ def get_llm_config():
     if not llm_api_key:
         raise ValueError("LLM_API_KEY must be set in environment variables")
 
+    # Every call goes through the shared per-provider token bucket
     if llm_provider == "google":
-        return ChatGoogle(model="gemini-2.5-flash", api_key=llm_api_key)
+        return llm_limiter.wrap_llm(ChatGoogle(model="gemini-2.5-flash", api_key=llm_api_key), llm_provider)
     elif llm_provider == "openai":
-        return ChatOpenAI(
+        return llm_limiter.wrap_llm(ChatOpenAI(
             model="gpt-4.1",
             api_key=llm_api_key
-        )
+        ), llm_provider)
     else:
         raise ValueError(f"Unsupported LLM_PROVIDER: {llm_provider}. Supported providers: 'openai', 'google'")
 
@@ -176,6 +178,15 @@ Return a JSON-style list of all visible **real bank accounts only**. Do **not**
 
 """
 
+single_pass_payment_discovery_context = """
+=== SINGLE-PASS MODE: PAYMENT DISCOVERY DURING EXTRACTION ===
+No separate pre-exploration was run for this site. Collect the supported payment methods yourself in this same session:
+1. Before registering, note every bank, e-wallet, QRIS or crypto option visible on public pages, footers and the registration form's bank dropdown.
+2. Use that list to decide which identity to register first and when to switch identities.
+3. Report every supported deposit method in `payment_gateways` (one entry per channel type, e.g. "Bank Transfer" with the bank names in `supported_methods`).
+4. Do NOT revisit pages only to re-check payment methods - continue straight to registration and deposit extraction.
+"""
+
 # Task instruction for browser-use agent with multiple identities
 def get_extraction_instruction(identities: List[dict], discovered_payment_methods: List[str] = None, is_default_methods: bool = False) -> str:
     # Format identities for the prompt
@@ -679,6 +690,7 @@ TARGET INFORMATION TO EXTRACT:
    - Extract: Account numbers, Bank names, Account holder names, Transfer limits
    - **SCREENSHOT REQUIREMENT:** Save a screenshot of the current page
    - Screenshot must show: Bank name + Account number + Account holder name clearly
+   - Pass the account number shown on the page to the screenshot action so the screenshot is linked to the right account
    - **IMMEDIATELY LOGOUT** after taking screenshot and extracting data
    - **DO NOT** explore other pages, sections, or features
    - **DO NOT** take additional screenshots of anything else
@@ -0,0 +1,104 @@
+import os
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlExecutor:
+    """
+    Persistent asyncio loop per worker process that runs up to `concurrency` crawls at once.
+
+    The loop lives on a daemon thread for the life of the process. Celery task threads
+    (`--pool=threads`) submit coroutines with `run()` and block on the result, while the
+    loop interleaves the crawls: one agent waits on the LLM while another drives its
+    browser. A semaphore bounds how many crawls are in flight.
+    Celery's time limits do not apply to the threads pool: `timeout` cancels a crawl, and
+    the worker bounds the rest of the task body separately (`_run_with_deadline`).
+    """
+
+    def __init__(self, concurrency: int = 1, timeout: Optional[float] = None):
+        self.concurrency = max(concurrency, 1)
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @property
+    def active(self) -> int:
+        """Crawls currently holding a slot"""
+        return self._active
+
+    def _run_loop(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        ready.set()
+        self._loop.run_forever()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,), name="crawl-executor", daemon=True)
+            self._thread.start()
+            ready.wait()
+            logger.info(f"🔁 [CRAWL-EXECUTOR] Event loop started (concurrency: {self.concurrency})")
+
+    async def _guarded(self, coro: Awaitable[Any]) -> Any:
+        async with self._semaphore:
+            self._active += 1
+            try:
+                return await coro
+            finally:
+                self._active -= 1
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the shared loop and block the calling thread until it finishes
+
+        Args:
+            coro: Coroutine to run (e.g. `extract_gambling_financial_data(url, options)`)
+            timeout (float): Seconds to wait before cancelling it; defaults to the executor timeout
+
+        Returns:
+            The coroutine's result
+        """
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._guarded(coro), self._loop)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Crawl exceeded {timeout or self.timeout}s and was cancelled")
+
+    def schedule(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """Start a maintenance coroutine (e.g. browser recycling) on the loop without taking a crawl slot or waiting"""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def shutdown(self, cleanup: Optional[Callable[[], Awaitable[Any]]] = None, timeout: float = 30):
+        """Run an optional async cleanup (e.g. closing the browser pool) on the loop, then stop it"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                return
+            if cleanup is not None:
+                try:
+                    asyncio.run_coroutine_threadsafe(cleanup(), self._loop).result(timeout=timeout)
+                except Exception as e:
+                    logger.warning(f"⚠️ [CRAWL-EXECUTOR] Cleanup gagal: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+
+crawl_executor = CrawlExecutor(
+    concurrency=int(os.environ.get("CRAWL_CONCURRENCY", 1)),
+    timeout=float(os.environ.get("CRAWL_TIMEOUT", 25 * 60))
+)
@@ -1,19 +1,32 @@
 import os
-from pathlib import Path
 import re
 import json
 import logging
 import asyncio
+import time
 import traceback
 import base64
+import hashlib
+from html import unescape
+from urllib.parse import urlparse
+import httpx
 from . import storage
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from browser_use import Agent, Controller, ActionResult, BrowserContext ,  BrowserSession
+from browser_use.agent.views import AgentHistoryList
 
 import datetime
 
-from .config import get_llm_config, get_extraction_instruction, generate_random_identity, pre_registration_payment_discovery_prompt
-from .model import  GamblingSiteData, PaymentDiscoveryResult, SiteInfo
+from .browser_pool import browser_pool
+from .discovery_cache import discovery_cache
+from .screenshot_processing import EXTENSIONS as SCREENSHOT_EXTENSIONS, screenshot_processor, screenshot_index
+from .trace_writer import trace_writer
+from .checkpoint_store import checkpoint_store
+from .recipe_store import recipe_store, build_recipe, instantiate_recipe
+from .rate_limiter import domain_limiter, limiter_domain
+from .config import get_llm_config, get_extraction_instruction, generate_random_identity, get_random_user_agent, pre_registration_payment_discovery_prompt, single_pass_payment_discovery_context
+from .database import extract_domain
+from .model import  AccountType, BankAccount, CryptoWallet, CrawlMode, CrawlOptions, CrawlMetrics, GamblingSiteData, IdentityOutcome, PaymentDiscoveryResult, ScreenshotCapture, SiteInfo, StaticCandidate, StaticPrepassResult
 logger = logging.getLogger(__name__)
 
 def base64_to_image(base64_string: str, output_filename: str) -> str:
@@ -53,8 +66,174 @@ class IndonesianAccountExtractor:
             'tcash', 'doku', 'midtrans', 'xendit', 'faspay', 'nicepay',
             'veritrans', 'ipaymu', 'paypal', 'skrill'
         ]
+        
+        # Precompiled once per extractor; the static pre-pass runs them over every fetched page
+        self.compiled_patterns = {name: re.compile(pattern) for name, pattern in self.patterns.items()}
+        # Single alternation over all bank/e-wallet names (longest first) acts as a multi-keyword matcher
+        keywords = sorted(set(self.indonesian_banks + self.indonesian_payments), key=len, reverse=True)
+        self.keyword_pattern = re.compile(r'\b(' + '|'.join(re.escape(k) for k in keywords) + r')\b', re.IGNORECASE)
+        self.holder_pattern = re.compile(
+            r"(?:\ba\.?\s?n\.?(?=\s|:)|atas\s+nama|nama\s+rekening|pemilik)\s*[:\-]?\s*([A-Za-z][A-Za-z.']*(?:\s+[A-Za-z][A-Za-z.']*){0,3})",
+            re.IGNORECASE
+        )
+        self.account_hint_pattern = re.compile(r'\b(?:rekening|no\.?\s?rek|norek|account)\b', re.IGNORECASE)
+        
+        # Static pre-pass settings
+        self.prepass_timeout = float(os.environ.get("STATIC_PREPASS_TIMEOUT", 15))
+        self.prepass_max_bytes = int(os.environ.get("STATIC_PREPASS_MAX_BYTES", 2 * 1024 * 1024))
+        self.prepass_confidence = float(os.environ.get("STATIC_PREPASS_CONFIDENCE", 0.8))
+        self.prepass_skip_agent = os.environ.get("STATIC_PREPASS_SKIP_AGENT", "false").lower() == "true"
+        self.prepass_min_accounts = int(os.environ.get("STATIC_PREPASS_MIN_ACCOUNTS", 2))
+        
+        # Recipe replay settings
+        self.replay_max_retries = int(os.environ.get("RECIPE_REPLAY_MAX_RETRIES", 2))
+        self.replay_delay = float(os.environ.get("RECIPE_REPLAY_DELAY", 1.0))
+    
+    async def static_prepass(self, url: str) -> StaticPrepassResult:
+        """
+        Fetch raw page HTML over plain HTTP and scan it for candidate accounts
+        
+        Args:
+            url (str): The gambling site URL to scan
+            
+        Returns:
+            StaticPrepassResult: Candidate accounts/wallets and payment keywords found in the HTML
+        """
+        logger.info(f"🧾 [STATIC-PREPASS-START] Scanning raw HTML untuk: {url}")
+        try:
+            async with httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.prepass_timeout,
+                headers={"User-Agent": get_random_user_agent()}
+            ) as client:
+                await domain_limiter.acquire(limiter_domain(url))
+                response = await client.get(url)
+            html = response.text[:self.prepass_max_bytes]
+        except Exception as e:
+            logger.warning(f"⚠️ [STATIC-PREPASS-FETCH-FAILED] Gagal fetch {url}: {str(e)}")
+            return StaticPrepassResult(url=url)
+        
+        result = self._scan_content(url, html)
+        logger.info(f"🧾 [STATIC-PREPASS-DONE] {url} - Candidates: {len(result.candidates)}, Keywords: {result.keywords}")
+        return result
+    
+    def _html_to_lines(self, html: str) -> List[str]:
+        """Strip markup to text, keeping one line per block element so nearby text stays together"""
+        text = re.sub(r'(?is)<(script|style|noscript)[^>]*>.*?</\1>', ' ', html)
+        text = re.sub(r'(?i)<(?:br|/?(?:p|div|li|tr|td|th|h[1-6]|table|section|article|option))\b[^>]*>', '\n', text)
+        text = unescape(re.sub(r'(?s)<[^>]+>', ' ', text))
+        lines = (re.sub(r'[ \t\r\f\v]+', ' ', line).strip() for line in text.split('\n'))
+        return [line for line in lines if line]
+    
+    def _nearest_keyword(self, line: str, position: int, previous_line: str) -> Optional[str]:
+        """Bank/e-wallet name closest to a number on its line, else the last one on the line above"""
+        matches = list(self.keyword_pattern.finditer(line))
+        if matches:
+            nearest = min(matches, key=lambda m: abs(m.start() - position))
+            return nearest.group(1).lower()
+        previous = list(self.keyword_pattern.finditer(previous_line))
+        return previous[-1].group(1).lower() if previous else None
+    
+    def _find_holder(self, line: str) -> Optional[str]:
+        holder = self.holder_pattern.search(line)
+        if not holder:
+            return None
+        words = []
+        for word in holder.group(1).split():
+            if self.keyword_pattern.fullmatch(word):
+                break  # Name ran into the next bank/e-wallet label
+            words.append(word)
+        return " ".join(words).upper() or None
+    
+    def _scan_content(self, url: str, html: str) -> StaticPrepassResult:
+        """Run the precompiled patterns and keyword matcher over page content"""
+        lines = self._html_to_lines(html)
+        keywords = set()
+        candidates = {}
+        
+        def add(candidate: StaticCandidate):
+            existing = candidates.get(candidate.value)
+            if existing is None or candidate.confidence > existing.confidence:
+                candidates[candidate.value] = candidate
+        
+        for index, line in enumerate(lines):
+            previous_line = lines[index - 1] if index else ""
+            keywords.update(m.group(1).lower() for m in self.keyword_pattern.finditer(line))
+            phone_numbers = {m.group(0) for m in self.compiled_patterns['phone_number'].finditer(line)}
+            
+            for match in self.compiled_patterns['bank_account'].finditer(line):
+                provider = self._nearest_keyword(line, match.start(), previous_line)
+                if not provider:
+                    continue  # Bare 8-16 digit numbers (timestamps, ids) are too noisy without a bank/e-wallet nearby
+                is_ewallet = provider in self.indonesian_payments
+                if match.group(0) in phone_numbers and not is_ewallet:
+                    continue
+                holder = self._find_holder(line) or self._find_holder(lines[index + 1] if index + 1 < len(lines) else "")
+                confidence = 0.4 + (0.4 if holder else 0.0) + (0.2 if self.account_hint_pattern.search(f"{previous_line} {line}") else 0.0)
+                add(StaticCandidate(
+                    kind=AccountType.MOBILE_MONEY if is_ewallet else AccountType.BANK_ACCOUNT,
+                    value=match.group(0),
+                    provider=provider.upper(),
+                    account_holder=holder,
+                    confidence=round(confidence, 2),
+                    context=line[:200]
+                ))
+            
+            for name, confidence in (('ethereum', 0.9), ('bitcoin', 0.7)):
+                for match in self.compiled_patterns[name].finditer(line):
+                    value = match.group(0)
+                    add(StaticCandidate(
+                        kind=AccountType.CRYPTO_WALLET,
+                        value=value,
+                        provider="ETH" if name == 'ethereum' else "BTC",
+                        confidence=0.9 if value.startswith('bc1') else confidence,
+                        context=line[:200]
+                    ))
+        
+        return StaticPrepassResult(
+            url=url,
+            fetched=True,
+            candidates=list(candidates.values()),
+            keywords=sorted(keywords),
+            fingerprint=self._template_fingerprint(html)
+        )
+    
+    def _template_fingerprint(self, html: str) -> Optional[str]:
+        """Hash script/stylesheet file names and form field names; white-label clones share them across domains"""
+        features = set()
+        for match in re.finditer(r'(?i)<(?:script|link)\b[^>]*?(?:src|href)\s*=\s*["\']([^"\'?#]+)', html):
+            name = match.group(1).rstrip('/').rsplit('/', 1)[-1]
+            if name.endswith(('.js', '.css')):
+                features.add(f"asset:{name.lower()}")
+        for match in re.finditer(r'(?i)<(?:input|select|form)\b[^>]*?\b(?:name|action)\s*=\s*["\']([^"\']+)', html):
+            features.add(f"field:{match.group(1).lower()}")
+        if len(features) < 3:
+            return None  # Too little structure to tell templates apart
+        return hashlib.sha1("\n".join(sorted(features)).encode()).hexdigest()[:16]
     
-    async def discover_payment_methods(self, url: str) -> List[str]:
+    def _build_result_from_prepass(self, url: str, prepass: StaticPrepassResult) -> GamblingSiteData:
+        """Build extraction output straight from high-confidence static candidates (agent skipped)"""
+        gambling_data = GamblingSiteData(
+            site_info=SiteInfo(
+                site_name=extract_domain(url),
+                site_url=url,
+                registration_success=False,
+                accessibility_notes="Extracted by static HTML pre-pass; browser agent skipped"
+            )
+        )
+        self._enhance_with_patterns(gambling_data, prepass.high_confidence(self.prepass_confidence))
+        return gambling_data
+    
+    def _format_prepass_hint(self, prepass: StaticPrepassResult) -> str:
+        candidates = prepass.high_confidence(self.prepass_confidence)
+        if not candidates:
+            return ""
+        listed = "; ".join(f"{c.provider} {c.value}" + (f" a.n. {c.account_holder}" if c.account_holder else "") for c in candidates)
+        return (f"A static scan of the page HTML already found these candidate deposit accounts: {listed}. "
+                "Verify them on the deposit page instead of searching for them again, and focus on accounts not listed. ")
+    
+    async def discover_payment_methods(self, url: str, task_id: Optional[str] = None,
+                                       metrics: Optional[CrawlMetrics] = None) -> List[str]:
         """
         Pre-exploration to discover all available payment methods before registration
         
@@ -67,28 +246,32 @@ class IndonesianAccountExtractor:
         logger.info(f"🔍 [PAYMENT-DISCOVERY-START] Mulai discovery payment methods untuk: {url}")
         
         try:
-            # Create agent for payment discovery
-            browser_session = BrowserSession(
-                use_adblock=False,  # Allow all content including ads
-                viewport={"width": 1280, "height": 1100},
-                viewport_expansion=-1
-            )
-            controller = Controller(output_model=PaymentDiscoveryResult)
-            agent = Agent(
-                task=f"Navigate to {url} and {pre_registration_payment_discovery_prompt}",
-                llm=get_llm_config(),
-                headless=True,
-                controller=controller,
-                capture_screenshots=False, 
-                browser_session = browser_session
-            )
+            # Create agent for payment discovery on a warm pooled browser (fresh context per lease)
+            async with browser_pool.lease() as browser_session:
+                controller = Controller(output_model=PaymentDiscoveryResult)
+                agent = Agent(
+                    task=f"Navigate to {url} and {pre_registration_payment_discovery_prompt}",
+                    llm=get_llm_config(),
+                    headless=True,
+                    controller=controller,
+                    capture_screenshots=False, 
+                    browser_session = browser_session
+                )
 
-           
-            logger.debug(f"🤖 [PAYMENT-DISCOVERY-AGENT] Menjalankan discovery agent untuk: {url}")
-            
-            # Run the discovery agent
-            result = await agent.run()
+                logger.debug(f"🤖 [PAYMENT-DISCOVERY-AGENT] Menjalankan discovery agent untuk: {url}")
+                
+                # Run the discovery agent (each step, like the first navigation, takes a token from the site's bucket)
+                await domain_limiter.acquire(limiter_domain(url))
+                try:
+                    result = await agent.run(on_step_start=domain_limiter.step_hook(url))
+                finally:
+                    if metrics:
+                        metrics.record_usage(agent.token_cost_service)
+            await trace_writer.write_history(task_id, url, result, phase="discovery")
+            if metrics:
+                metrics.record_history(result)
         
+            payment_methods = None
             try:
                 payment_methods: PaymentDiscoveryResult = PaymentDiscoveryResult.model_validate_json(result.final_result())
             except Exception as parse_error:
@@ -106,113 +289,138 @@ class IndonesianAccountExtractor:
             logger.error(f"📍 [PAYMENT-DISCOVERY-TRACEBACK] {traceback.format_exc()}")
             return []
     
-    async def extract_financial_data(self, url: str) -> GamblingSiteData:
-        logger.info(f"🔄 [CRAWLER-START] Mulai ekstraksi data dari: {url}")
+    async def _resolve_payment_methods(self, url: str, force_refresh: bool = False, task_id: Optional[str] = None,
+                                       metrics: Optional[CrawlMetrics] = None) -> Tuple[List[str], bool]:
+        """Run payment discovery (or reuse the per-domain cache) and fall back to default methods when nothing was found"""
+        if not force_refresh:
+            cached_methods = await discovery_cache.get(url)
+            if cached_methods:
+                logger.info(f"⚡ [CRAWLER-DISCOVERY-CACHE-HIT] Reusing cached payment methods for {url}: {cached_methods}")
+                return cached_methods, False
+        
+        discovered_payment_methods = await self.discover_payment_methods(url, task_id, metrics)
+        
+        # Set default payment methods if discovery failed or returned empty
+        if not discovered_payment_methods:
+            discovered_payment_methods = ["BCA", "BRI", "BNI", "Mandiri", "DANA", "OVO", "GoPay", "USDT"]
+            logger.info(f"🏦 [CRAWLER-DEFAULT-METHODS] Using default Indonesian payment methods: {discovered_payment_methods}")
+            return discovered_payment_methods, True
+        
+        # Extract payment methods from PaymentDiscoveryResult object
+        if hasattr(discovered_payment_methods, 'payment_methods'):
+            payment_methods_list = discovered_payment_methods.payment_methods
+        else:
+            payment_methods_list = discovered_payment_methods
+        
+        logger.info(f"✅ [CRAWLER-DISCOVERED-METHODS] Found {len(payment_methods_list)} payment methods: {payment_methods_list}")
+        await discovery_cache.set(url, payment_methods_list)
+        return payment_methods_list, False
+    
+    async def extract_financial_data(self, url: str, options: Optional[CrawlOptions] = None) -> GamblingSiteData:
+        options = options or CrawlOptions()
+        metrics = CrawlMetrics()
+        gambling_data = await self._run_extraction(url, options, metrics)
+        gambling_data._metrics = metrics
+        logger.info(f"⏱️ [CRAWLER-METRICS] {url} - Phases: {metrics.phases}, Steps: {metrics.agent_steps}, LLM calls: {metrics.llm_calls}, Tokens: {metrics.prompt_tokens}/{metrics.completion_tokens}")
+        return gambling_data
+    
+    async def _run_extraction(self, url: str, options: CrawlOptions, metrics: CrawlMetrics) -> GamblingSiteData:
+        single_pass = options.crawl_mode == CrawlMode.SINGLE_PASS
+        logger.info(f"🔄 [CRAWLER-START] Mulai ekstraksi data dari: {url} (mode: {options.crawl_mode.value})")
         
         try:
-            # PHASE 1: Discover available payment methods first
-            logger.info(f"🔍 [CRAWLER-PHASE-1] Pre-exploration: Discovering payment methods for: {url}")
-            discovered_payment_methods = await self.discover_payment_methods(url)
+            # PHASE 0: Cheap static HTML scan before any browser work
+            prepass = None
+            if options.static_prepass:
+                with metrics.phase("static_prepass"):
+                    prepass = await self.static_prepass(url)
+                high_confidence = prepass.high_confidence(self.prepass_confidence)
+                if self.prepass_skip_agent and len(high_confidence) >= self.prepass_min_accounts:
+                    logger.info(f"⚡ [CRAWLER-PREPASS-SKIP-AGENT] {len(high_confidence)} high-confidence account(s) found statically, skipping agent for: {url}")
+                    return self._build_result_from_prepass(url, prepass)
             
-            # Set default payment methods if discovery failed or returned empty
-            if not discovered_payment_methods:
-                discovered_payment_methods = ["BCA", "BRI", "BNI", "Mandiri", "DANA", "OVO", "GoPay", "USDT"]
-                is_default_payment_methods = True
-                logger.info(f"🏦 [CRAWLER-DEFAULT-METHODS] Using default Indonesian payment methods: {discovered_payment_methods}")
+            # Replay a recorded recipe for this domain/template before spending LLM calls
+            if not options.force_refresh:
+                fingerprint = prepass.fingerprint if prepass else None
+                recipe = await recipe_store.get(url, fingerprint)
+                if recipe:
+                    with metrics.phase("recipe_replay"):
+                        replayed, replay_screenshots = await self._replay_recipe(url, recipe, metrics)
+                    if replayed:
+                        with metrics.phase("screenshot_upload"):
+                            await self._upload_screenshots(replayed, replay_screenshots)
+                        return replayed
+                    logger.info(f"🔁 [CRAWLER-REPLAY-FALLBACK] Recipe tidak berhasil, kembali ke agent untuk: {url}")
+                    await recipe_store.discard(url, recipe.get("fingerprint"))
+            
+            # PHASE 1: Discover available payment methods first (folded into the agent run in single-pass mode)
+            if options.payment_methods:
+                logger.info(f"♻️ [CRAWLER-CHECKPOINT] Reusing checkpointed payment methods for {url}: {options.payment_methods}")
+                discovered_payment_methods, is_default_payment_methods = options.payment_methods, False
+                # Carry the artifact over to this task so a chained retry can still skip discovery
+                await checkpoint_store.asave(options.task_id, "discovery", discovery=discovered_payment_methods)
+            elif single_pass:
+                logger.info(f"⚡ [CRAWLER-SINGLE-PASS] Skipping separate discovery agent, payment methods collected during extraction for: {url}")
+                discovered_payment_methods, is_default_payment_methods = [], False
             else:
-                # Extract payment methods from PaymentDiscoveryResult object
-                if hasattr(discovered_payment_methods, 'payment_methods'):
-                    payment_methods_list = discovered_payment_methods.payment_methods
-                else:
-                    payment_methods_list = discovered_payment_methods
-                
-                is_default_payment_methods = False
-                logger.info(f"✅ [CRAWLER-DISCOVERED-METHODS] Found {len(payment_methods_list)} payment methods: {payment_methods_list}")
-                # Use the extracted list for further processing
-                discovered_payment_methods = payment_methods_list
+                logger.info(f"🔍 [CRAWLER-PHASE-1] Pre-exploration: Discovering payment methods for: {url}")
+                with metrics.phase("payment_discovery"):
+                    discovered_payment_methods, is_default_payment_methods = await self._resolve_payment_methods(url, options.force_refresh, options.task_id, metrics)
+                if not is_default_payment_methods:
+                    await checkpoint_store.asave(options.task_id, "discovery", discovery=discovered_payment_methods)
             
             # PHASE 2: Generate multiple identities for comprehensive extraction
             logger.info(f"🎯 [CRAWLER-PHASE-2] Generating multiple identities for comprehensive extraction")
             
             # Generate random Indonesian identities for multiple registration attempts
-            num_identities = min(len(discovered_payment_methods), 2) # Cap at 4 to avoid being too aggressive
-            identities = []
-            for i in range(num_identities):
-                identity = generate_random_identity()
-                identities.append(identity)
-                logger.debug(f"🆔 [CRAWLER-IDENTITY-{i+1}] Generated identity {i+1}: {identity['full_name']} ({identity['email']})")
+            with metrics.phase("identity_generation"):
+                num_identities = 2 if single_pass else min(len(discovered_payment_methods), 2) # Cap at 4 to avoid being too aggressive
+                identities = []
+                for i in range(num_identities):
+                    identity = generate_random_identity()
+                    identities.append(identity)
+                    logger.debug(f"🆔 [CRAWLER-IDENTITY-{i+1}] Generated identity {i+1}: {identity['full_name']} ({identity['email']})")
             
-            # Get extraction instruction with multiple identities and discovered payment methods
-            extraction_instruction = get_extraction_instruction(identities, discovered_payment_methods, is_default_payment_methods)
+            if options.parallel_identities and len(identities) > 1:
+                return await self._extract_parallel_identities(
+                    url, identities, discovered_payment_methods, is_default_payment_methods, single_pass, prepass,
+                    options.task_id, metrics
+                )
             
-            # Add context about multiple identities and payment methods (indicate if default or discovered)
-            task_context = f"You have {len(identities)} different Indonesian identities available for registration attempts. "
-            if is_default_payment_methods:
-                task_context += f"Using default Indonesian payment methods as fallback: {', '.join(discovered_payment_methods)}. Focus on discovering actual site-specific payment methods. "
-            else:
-                task_context += f"Based on pre-exploration, this site supports these payment methods: {', '.join(discovered_payment_methods)}. "
-            task_context += "Use multiple registration attempts with different identities to discover all available payment methods and account details. "
+            task = self._build_extraction_task(url, identities, discovered_payment_methods, is_default_payment_methods, single_pass, prepass)
+            screenshots: List[ScreenshotCapture] = []
+            controller = self._build_extraction_controller(screenshots)
             
-            task = f"Navigate to {url} and {task_context}{extraction_instruction}"
-        
-       
-            controller = Controller(output_model=GamblingSiteData) 
-            
-            @controller.action('Save a screenshot of the current page with the name of the account holder exist in this page')
-            async def save_screenshot(browser_session: BrowserSession):
-                page = await browser_session.get_current_page()
-                screenshot = await page.screenshot(full_page=True, animations='disabled')
-                filename = f"./screenshots/screenshot_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+            # Lease a warm browser from the pool; ad blocking stays disabled to capture all content
+            async with browser_pool.lease() as browser_session:
+                agent = Agent(
+                    task=task,
+                    llm=get_llm_config(),
+                    headless=True,
+                    controller=controller,
+                    capture_screenshots=False,
+                    browser_session=browser_session
+                )
                 
-                # Create screenshots directory if it doesn't exist
-                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                logger.debug(f"🤖 [CRAWLER-AGENT] Menjalankan agent untuk: {url}")
                 
-                with open(filename, 'wb') as f:
-                    f.write(screenshot)
-                return ActionResult(
-                    extracted_content=f'Saved a screenshot of the page to {filename}',
-                    include_in_memory=True
-                )
-            
-            # Disable ad blocking to capture all content
-            browser_session = BrowserSession(
-                use_adblock=False,  # Allow all content including ads
-                viewport={"width": 1280, "height": 1100},
-                viewport_expansion=-1
-            )
-
-            agent = Agent(
-                task=task,
-                llm=get_llm_config(),
-                headless=True,
-                controller=controller,
-                capture_screenshots=False,
-                browser_session=browser_session
-            )
-            
-            logger.debug(f"🤖 [CRAWLER-AGENT] Menjalankan agent untuk: {url}")
-            
-            # Run the agent with timeout
-            try:
-                result = await agent.run() 
-                # logger.info(f"[CRAWLER-AGENT] result: {result.final_result()}")
-                logger.debug(f"✅ [CRAWLER-AGENT-SUCCESS] Agent berhasil untuk: {url}")
-            except Exception as agent_error:
-                logger.error(f"❌ [CRAWLER-AGENT-FAILED] Agent gagal untuk {url}: {str(agent_error)}")
-                return self._create_error_result(url, f"Agent execution failed: {str(agent_error)}")
+                # Run the agent with timeout
+                try:
+                    with metrics.phase("agent_run"):
+                        await domain_limiter.acquire(limiter_domain(url))
+                        try:
+                            result = await agent.run(on_step_start=domain_limiter.step_hook(url))
+                        finally:
+                            metrics.record_usage(agent.token_cost_service)
+                    metrics.record_history(result)
+                    # logger.info(f"[CRAWLER-AGENT] result: {result.final_result()}")
+                    logger.debug(f"✅ [CRAWLER-AGENT-SUCCESS] Agent berhasil untuk: {url}")
+                except Exception as agent_error:
+                    logger.error(f"❌ [CRAWLER-AGENT-FAILED] Agent gagal untuk {url}: {str(agent_error)}")
+                    return self._create_error_result(url, f"Agent execution failed: {str(agent_error)}")
 
-            # Save result to log
-            try:
-                os.makedirs("log", exist_ok=True)
-                log_filename = f"log/{datetime.datetime.today().date()}-{hash(url) % 10000}.json"
-                with open(log_filename, 'w', encoding='utf-8') as f:
-                    if hasattr(result, '__dict__'):
-                        json.dump(result.__dict__, f, indent=2, default=str)
-                    else:
-                        f.write(str(result.final_result()))
-                logger.debug(f"💾 [CRAWLER-LOG] Log disimpan ke: {log_filename}")
-            except Exception as log_error:
-                logger.warning(f"⚠️ [CRAWLER-LOG-FAILED] Gagal simpan log untuk {url}: {str(log_error)}")
+            # Append the per-step trace of this run
+            await trace_writer.write_history(options.task_id, url, result)
             
             # Parse the result
             logger.debug(f"🔍 [CRAWLER-PARSE] Parsing hasil agent untuk: {url}")
@@ -225,38 +433,28 @@ class IndonesianAccountExtractor:
                     logger.error(f"❌ [CRAWLER-NULL-RESULT] Agent returned None for {url}")
                     return self._create_error_result(url, "Agent returned null result")
                 
-                gambling_data: GamblingSiteData = GamblingSiteData.model_validate_json(final_result)
+                with metrics.phase("parse"):
+                    gambling_data: GamblingSiteData = GamblingSiteData.model_validate_json(final_result)
             except Exception as parse_error:
                 logger.error(f"❌ [CRAWLER-PARSE-FAILED] Gagal parse JSON untuk {url}: {str(parse_error)}")
                 logger.error(f"❌ [CRAWLER-RAW-RESULT] Raw result: {final_result}")
                 return self._create_error_result(url, f"JSON parsing failed: {str(parse_error)}")
             
+            if prepass:
+                self._enhance_with_patterns(gambling_data, prepass.high_confidence(self.prepass_confidence))
+            
             logger.info(f"✅ [CRAWLER-SUCCESS] Berhasil ekstrak data dari {url}")
             logger.info(f"📊 [CRAWLER-SUMMARY] {url} - Accounts: {len(gambling_data.bank_accounts)}, Wallets: {len(gambling_data.crypto_wallets)}")
             
 
-            screenshot_folder = Path("./screenshots")
-
-            if screenshot_folder.exists():
-                existing_files = list(screenshot_folder.glob("*.png"))
-                for i, file in enumerate(existing_files):
-                    try:
-                        path = str(file)  # keeps relative path, e.g., "./screenshots/john_doe.png"
-
-                        oss_key = await storage.storage_manager.save_file(
-                            path,
-                            f"{gambling_data.bank_accounts[i].account_number}.png"
-                        )
-                        gambling_data.bank_accounts[i].oss_key = oss_key
-                        logger.info(f"\U0001F4E4 [CRAWLER-OSS-SAVE] Screenshot saved to OSS with key: {oss_key}")
-
-                        try:
-                            os.remove(file)
-                        except Exception as e:
-                            logger.error(f"Failed to delete {file}: {e}")
-                    except Exception as e:
-                        logger.error(f"Error processing screenshot or bank account at index {i}: {e}")
-                        continue
+            await checkpoint_store.asave(options.task_id, "parsed", gambling_data=gambling_data)
+            if gambling_data.bank_accounts or gambling_data.crypto_wallets:
+                await recipe_store.save(url, build_recipe(
+                    result.model_dump(), url, identities, prepass.fingerprint if prepass else None
+                ))
+            
+            with metrics.phase("screenshot_upload"):
+                await self._upload_screenshots(gambling_data, screenshots)
             return gambling_data
 
         except Exception as e:
@@ -266,14 +464,360 @@ class IndonesianAccountExtractor:
             logger.error(f"📍 [CRAWLER-TRACEBACK] {traceback.format_exc()}")
             return self._create_error_result(url, str(e))
       
-    async def _enhance_with_patterns(self, gambling_data: GamblingSiteData, content: str):
-        """Enhanced pattern matching (currently disabled due to model structure changes)"""
-        if not content:
+    def _build_extraction_task(self, url: str, identities: List[dict], discovered_payment_methods: List[str],
+                               is_default_payment_methods: bool, single_pass: bool,
+                               prepass: Optional[StaticPrepassResult]) -> str:
+        # Get extraction instruction with multiple identities and discovered payment methods
+        extraction_instruction = get_extraction_instruction(identities, discovered_payment_methods, is_default_payment_methods)
+        if single_pass:
+            extraction_instruction = f"{single_pass_payment_discovery_context}{extraction_instruction}"
+        
+        # Add context about multiple identities and payment methods (indicate if default or discovered)
+        if len(identities) == 1:
+            task_context = "You have one Indonesian identity for this registration attempt; other identities are being tried in parallel sessions. "
+        else:
+            task_context = f"You have {len(identities)} different Indonesian identities available for registration attempts. "
+        if single_pass:
+            task_context += "Payment methods have not been discovered yet - identify them on the way to registration in this same session. "
+        elif is_default_payment_methods:
+            task_context += f"Using default Indonesian payment methods as fallback: {', '.join(discovered_payment_methods)}. Focus on discovering actual site-specific payment methods. "
+        else:
+            task_context += f"Based on pre-exploration, this site supports these payment methods: {', '.join(discovered_payment_methods)}. "
+        if len(identities) > 1:
+            task_context += "Use multiple registration attempts with different identities to discover all available payment methods and account details. "
+        if prepass:
+            task_context += self._format_prepass_hint(prepass)
+        
+        return f"Navigate to {url} and {task_context}{extraction_instruction}"
+    
+    def _build_extraction_controller(self, screenshots: List[ScreenshotCapture],
+                                     page_snapshots: Optional[List[str]] = None) -> Controller:
+        """
+        Controller for the extraction agent (and recipe replays)
+        
+        Args:
+            screenshots (list): Per-crawl list the in-memory screenshots are appended to
+            page_snapshots (list): When given, the HTML of every screenshotted page is appended to it
+        """
+        controller = Controller(output_model=GamblingSiteData) 
+        
+        @controller.action('Save a screenshot of the current page with the name of the account holder exist in this page. '
+                           'Pass the account number shown on the page if there is one.')
+        async def save_screenshot(browser_session: BrowserSession, account_number: str = ""):
+            page = await browser_session.get_current_page()
+            screenshot = await page.screenshot(full_page=True, animations='disabled')
+            html = await page.content()
+            capture = ScreenshotCapture(
+                image=screenshot,
+                page_url=page.url,
+                page_title=await page.title(),
+                account_number=re.sub(r'\D', '', account_number) or None,
+                detected_accounts=[c.value for c in self._scan_content(page.url, html).candidates]
+            )
+            screenshots.append(capture)
+            if page_snapshots is not None:
+                page_snapshots.append(html)
+            tagged = capture.account_number or ", ".join(capture.detected_accounts) or "no account detected"
+            return ActionResult(
+                extracted_content=f'Saved screenshot #{len(screenshots)} of {page.url} ({tagged})',
+                include_in_memory=True
+            )
+        
+        return controller
+    
+    def _match_screenshot(self, account: BankAccount, screenshots: List[ScreenshotCapture]) -> Optional[ScreenshotCapture]:
+        """Screenshot showing this account: seen in the page HTML, then tagged by the agent, then same page URL"""
+        number = re.sub(r'\D', '', account.account_number)
+        for capture in reversed(screenshots):
+            if number and number in capture.detected_accounts:
+                return capture
+        for capture in reversed(screenshots):
+            if number and capture.account_number == number:
+                return capture
+        if account.page_found:
+            for capture in reversed(screenshots):
+                if capture.page_url == account.page_found:
+                    return capture
+        return None
+    
+    async def _upload_screenshots(self, gambling_data: GamblingSiteData, screenshots: List[ScreenshotCapture]):
+        """Upload the screenshot matched to each bank account concurrently, straight from memory"""
+        if not screenshots:
             return
         
-        content_lower = content.lower()
-        logger.debug(f"🔍 [PATTERN-ENHANCE] Pattern matching enhancement disabled - model structure changed")
-        pass
+        matched = {}
+        for account in gambling_data.bank_accounts:
+            capture = self._match_screenshot(account, screenshots)
+            if capture is None:
+                logger.debug(f"[CRAWLER-OSS-SAVE] No screenshot matches account {account.account_number}")
+                continue
+            matched.setdefault(id(capture), (capture, []))[1].append(account)
+        
+        async def upload(capture: ScreenshotCapture, accounts: List[BankAccount]):
+            # One upload per distinct screenshot; every account on that page shares the key
+            account_number = accounts[0].account_number
+            processed = await screenshot_processor.process(capture)
+            oss_key = await screenshot_index.get(processed.phash, account_number)
+            if oss_key:
+                logger.info(f"♻️ [CRAWLER-OSS-DEDUP] Identical screenshot already stored, reusing key: {oss_key}")
+            else:
+                try:
+                    extension = SCREENSHOT_EXTENSIONS.get(processed.content_type, "png")
+                    oss_key = await storage.storage_manager.save_bytes(
+                        processed.image,
+                        f"{account_number}.{extension}",
+                        content_type=processed.content_type
+                    )
+                except Exception as e:
+                    logger.error(f"Error uploading screenshot for account {account_number}: {e}")
+                    return
+                await screenshot_index.set(processed.phash, account_number, oss_key)
+                logger.info(f"\U0001F4E4 [CRAWLER-OSS-SAVE] Screenshot saved to OSS with key: {oss_key}")
+            for account in accounts:
+                account.oss_key = oss_key
+        
+        await asyncio.gather(*(upload(capture, accounts) for capture, accounts in matched.values()))
+    
+    async def _run_identity_agent(self, url: str, index: int, identity: dict, task: str,
+                                  browser_session: BrowserSession, screenshots: List[ScreenshotCapture],
+                                  task_id: Optional[str] = None, metrics: Optional[CrawlMetrics] = None) -> Tuple[Optional[GamblingSiteData], Optional[AgentHistoryList], IdentityOutcome]:
+        """Run one extraction agent for a single identity in its own browser context"""
+        outcome = IdentityOutcome(identity_index=index + 1, username=identity.get("username"))
+        logger.info(f"🤖 [CRAWLER-IDENTITY-{index + 1}] Menjalankan agent untuk {identity['full_name']} di: {url}")
+        try:
+            agent = Agent(
+                task=task,
+                llm=get_llm_config(),  # one LLM client per agent, token accounting wraps it per agent
+                headless=True,
+                controller=self._build_extraction_controller(screenshots),
+                capture_screenshots=False,
+                browser_session=browser_session
+            )
+            await domain_limiter.acquire(limiter_domain(url))
+            try:
+                result = await agent.run(on_step_start=domain_limiter.step_hook(url))
+            finally:
+                if metrics:
+                    metrics.record_usage(agent.token_cost_service)
+            await trace_writer.write_history(task_id, url, result, phase=f"identity-{index + 1}")
+            if metrics:
+                metrics.record_history(result)
+            final_result = result.final_result()
+            if final_result is None:
+                raise ValueError("Agent returned null result")
+            gambling_data = GamblingSiteData.model_validate_json(final_result)
+        except Exception as e:
+            logger.error(f"❌ [CRAWLER-IDENTITY-{index + 1}-FAILED] Agent gagal untuk {url}: {str(e)}")
+            outcome.error = str(e)[:200]
+            return None, None, outcome
+        
+        outcome.registration_success = bool(gambling_data.site_info.registration_success)
+        outcome.accounts_found = len(gambling_data.bank_accounts)
+        outcome.wallets_found = len(gambling_data.crypto_wallets)
+        logger.info(f"✅ [CRAWLER-IDENTITY-{index + 1}-DONE] {url} - Registered: {outcome.registration_success}, Accounts: {outcome.accounts_found}, Wallets: {outcome.wallets_found}")
+        return gambling_data, result, outcome
+    
+    async def _extract_parallel_identities(self, url: str, identities: List[dict], discovered_payment_methods: List[str],
+                                           is_default_payment_methods: bool, single_pass: bool,
+                                           prepass: Optional[StaticPrepassResult], task_id: Optional[str] = None,
+                                           metrics: Optional[CrawlMetrics] = None) -> GamblingSiteData:
+        """
+        Run one agent per identity at the same time, each in an isolated context of the same pooled browser,
+        then merge and deduplicate what they found
+        """
+        logger.info(f"🔀 [CRAWLER-PARALLEL] Menjalankan {len(identities)} agent paralel untuk: {url}")
+        
+        metrics = metrics or CrawlMetrics()
+        screenshots: List[ScreenshotCapture] = []  # shared by all identity agents, tagged per page
+        agents_started = time.perf_counter()  # wall time of the concurrent runs, not the sum per agent
+        async with browser_pool.lease_many(len(identities)) as sessions:
+            runs = await asyncio.gather(*(
+                self._run_identity_agent(
+                    url, index, identity,
+                    self._build_extraction_task(url, [identity], discovered_payment_methods, is_default_payment_methods, single_pass, prepass),
+                    browser_session, screenshots, task_id, metrics
+                )
+                for index, (identity, browser_session) in enumerate(zip(identities, sessions))
+            ))
+        metrics.phases["agent_run"] = round(time.perf_counter() - agents_started, 3)
+        
+        found = [(data, history, identities[outcome.identity_index - 1]) for data, history, outcome in runs if data is not None]
+        outcomes = [outcome for _, _, outcome in runs]
+        if not found:
+            errors = "; ".join(f"identity {o.identity_index}: {o.error}" for o in outcomes)
+            error_result = self._create_error_result(url, f"All parallel agents failed ({errors})")
+            error_result._identity_outcomes = outcomes
+            return error_result
+        
+        gambling_data = self._merge_site_data([data for data, _, _ in found])
+        gambling_data._identity_outcomes = outcomes
+        summary = ", ".join(
+            f"identity {o.identity_index} ({o.username}): "
+            + (f"failed - {o.error}" if o.error else f"registered={o.registration_success}, accounts={o.accounts_found}, wallets={o.wallets_found}")
+            for o in outcomes
+        )
+        notes = gambling_data.site_info.accessibility_notes
+        gambling_data.site_info.accessibility_notes = f"{notes + ' | ' if notes else ''}Parallel identities: {summary}"
+        
+        if prepass:
+            self._enhance_with_patterns(gambling_data, prepass.high_confidence(self.prepass_confidence))
+        
+        logger.info(f"✅ [CRAWLER-SUCCESS] Berhasil ekstrak data dari {url}")
+        logger.info(f"📊 [CRAWLER-SUMMARY] {url} - Accounts: {len(gambling_data.bank_accounts)}, Wallets: {len(gambling_data.crypto_wallets)}")
+        
+        await checkpoint_store.asave(task_id, "parsed", gambling_data=gambling_data)
+        
+        # Record the first identity run that found something as the replay recipe
+        for data, history, identity in found:
+            if data.bank_accounts or data.crypto_wallets:
+                await recipe_store.save(url, build_recipe(
+                    history.model_dump(), url, [identity], prepass.fingerprint if prepass else None
+                ))
+                break
+        
+        with metrics.phase("screenshot_upload"):
+            await self._upload_screenshots(gambling_data, screenshots)
+        return gambling_data
+    
+    def _merge_site_data(self, results: List[GamblingSiteData]) -> GamblingSiteData:
+        """Merge per-identity results, dropping duplicate accounts, wallets and gateways"""
+        site_info = next((r.site_info for r in results if r.site_info.registration_success), results[0].site_info)
+        merged = GamblingSiteData(site_info=site_info.model_copy())
+        merged.site_info.registration_success = any(r.site_info.registration_success for r in results)
+        seen_accounts, seen_wallets, seen_gateways = set(), set(), set()
+        
+        for result in results:
+            for account in result.bank_accounts:
+                key = re.sub(r'\D', '', account.account_number) or account.account_number
+                if key not in seen_accounts:
+                    seen_accounts.add(key)
+                    merged.bank_accounts.append(account)
+            for wallet in result.crypto_wallets:
+                key = (wallet.wallet_address or "").lower()
+                if key and key not in seen_wallets:
+                    seen_wallets.add(key)
+                    merged.crypto_wallets.append(wallet)
+            for gateway in result.payment_gateways:
+                key = gateway.gateway_name.lower()
+                if key not in seen_gateways:
+                    seen_gateways.add(key)
+                    merged.payment_gateways.append(gateway)
+        
+        return merged
+    
+    async def _replay_recipe(self, url: str, recipe: dict,
+                             metrics: Optional[CrawlMetrics] = None) -> Tuple[Optional[GamblingSiteData], List[ScreenshotCapture]]:
+        """
+        Replay a recorded click path without any LLM call
+        
+        Accounts are read from the HTML of the pages reached (screenshotted pages and the final page)
+        with the static patterns. Returns None when a step fails or nothing is found, so the caller
+        falls back to the agent.
+        """
+        identities = [generate_random_identity() for _ in range(recipe.get("identity_count", 1))]
+        history_data = instantiate_recipe(recipe, url, identities)
+        page_snapshots: List[str] = []
+        screenshots: List[ScreenshotCapture] = []
+        final_url = None
+        logger.info(f"📼 [CRAWLER-REPLAY-START] Replaying recorded recipe ({len(history_data['history'])} steps) untuk: {url}")
+        
+        try:
+            async with browser_pool.lease() as browser_session:
+                agent = Agent(
+                    task=f"Replay recorded registration and deposit path on {url}",
+                    llm=get_llm_config(),  # required by Agent, never invoked: LLM actions are stripped from recipes
+                    controller=self._build_extraction_controller(screenshots, page_snapshots),
+                    initial_actions=[{'go_to_url': {'url': url, 'new_tab': False}}],
+                    capture_screenshots=False,
+                    browser_session=browser_session
+                )
+                # Same enrichment as AgentHistoryList.load_from_file, from the stored dict instead of a file
+                for step in history_data["history"]:
+                    step["model_output"] = agent.AgentOutput.model_validate(step["model_output"])
+                history = AgentHistoryList.model_validate(history_data)
+                await domain_limiter.acquire(limiter_domain(url))
+                try:
+                    await agent.rerun_history(history, max_retries=self.replay_max_retries, skip_failures=False, delay_between_actions=self.replay_delay)
+                finally:
+                    if metrics:
+                        metrics.record_usage(agent.token_cost_service)
+                
+                page = await browser_session.get_current_page()
+                page_snapshots.append(await page.content())
+                final_url = page.url
+        except Exception as e:
+            logger.warning(f"⚠️ [CRAWLER-REPLAY-FAILED] Replay gagal untuk {url}: {str(e)}")
+            return None, []
+        
+        candidates = {}
+        for html in page_snapshots:
+            for candidate in self._scan_content(url, html).high_confidence(self.prepass_confidence):
+                candidates.setdefault(candidate.value, candidate)
+        
+        gambling_data = GamblingSiteData(
+            site_info=SiteInfo(
+                site_name=extract_domain(url),
+                site_url=url,
+                registration_success=self._replay_reached_recorded_page(history_data, final_url),
+                accessibility_notes="Extracted by replaying a recorded recipe; no LLM calls"
+            )
+        )
+        self._enhance_with_patterns(gambling_data, list(candidates.values()))
+        if not gambling_data.bank_accounts and not gambling_data.crypto_wallets:
+            logger.warning(f"⚠️ [CRAWLER-REPLAY-EMPTY] Replay selesai tapi tidak ada akun ditemukan untuk: {url}")
+            return None, []
+        
+        logger.info(f"✅ [CRAWLER-REPLAY-SUCCESS] {url} - Accounts: {len(gambling_data.bank_accounts)}, Wallets: {len(gambling_data.crypto_wallets)}")
+        return gambling_data, screenshots
+    
+    @staticmethod
+    def _replay_reached_recorded_page(history_data: dict, final_url: Optional[str]) -> Optional[bool]:
+        """
+        Whether a replay ended on the page the recorded run reached after registering
+
+        The replay itself never confirms registration, so this is True only when the final URL
+        matches the last page of the recording (same host and path); otherwise unknown (None).
+        """
+        recorded_url = next((step["state"].get("url") for step in reversed(history_data["history"])
+                             if (step.get("state") or {}).get("url")), None)
+        if not recorded_url or not final_url:
+            return None
+        recorded, reached = urlparse(recorded_url), urlparse(final_url)
+        if recorded.netloc == reached.netloc and recorded.path.rstrip("/") == reached.path.rstrip("/"):
+            return True
+        return None
+
+    def _enhance_with_patterns(self, gambling_data: GamblingSiteData, candidates: List[StaticCandidate]):
+        """Merge static pre-pass candidates the agent did not report into the extraction result"""
+        known_accounts = {acc.account_number for acc in gambling_data.bank_accounts}
+        known_wallets = {wallet.wallet_address for wallet in gambling_data.crypto_wallets}
+        added = 0
+        
+        for candidate in candidates:
+            if candidate.kind == AccountType.CRYPTO_WALLET:
+                if candidate.value in known_wallets:
+                    continue
+                gambling_data.crypto_wallets.append(CryptoWallet(
+                    wallet_address=candidate.value,
+                    cryptocurrency=candidate.provider,
+                    additional_info="Found by static HTML pre-pass"
+                ))
+                known_wallets.add(candidate.value)
+            else:
+                if candidate.value in known_accounts or not candidate.account_holder:
+                    continue
+                gambling_data.bank_accounts.append(BankAccount(
+                    account_type=candidate.kind,
+                    bank_name=candidate.provider,
+                    account_number=candidate.value,
+                    account_holder=candidate.account_holder,
+                    page_found=gambling_data.site_info.site_url
+                ))
+                known_accounts.add(candidate.value)
+            added += 1
+        
+        if added:
+            logger.info(f"🔍 [PATTERN-ENHANCE] Added {added} account(s) from static pre-pass")
     
     def _find_bank_name(self, content: str) -> Optional[str]:
         content_lower = content.lower()
@@ -332,10 +876,10 @@ class IndonesianAccountExtractor:
 
 indonesian_extractor = IndonesianAccountExtractor()
 
-async def extract_gambling_financial_data(url: str) -> GamblingSiteData:
+async def extract_gambling_financial_data(url: str, options: Optional[CrawlOptions] = None) -> GamblingSiteData:
     logger.info(f"🎯 [EXTRACTION-START] Memulai ekstraksi financial data untuk: {url}")
     try:
-        result = await indonesian_extractor.extract_financial_data(url)
+        result = await indonesian_extractor.extract_financial_data(url, options)
         logger.info(f"🏁 [EXTRACTION-COMPLETE] Selesai ekstraksi untuk: {url}")
         return result
     except Exception as e:
@@ -1,5 +1,10 @@
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, Record, unit_of_work
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
 import os
+import time
+import threading
+import re
+import hashlib
 import random
 import logging
 from typing import List, Optional, Dict, Any
@@ -8,6 +13,26 @@ from urllib.parse import urlparse
 from .model import BankAccount, CryptoWallet, DigitalWallet, GamblingSiteData, PaymentGateway
 logger = logging.getLogger(__name__)
 
+class Neo4jRetriesExhausted(Exception):
+    """A unit of work kept hitting transient errors (deadlock, leader switch, dropped connection) past the retry limit"""
+
+def extract_domain(url: str) -> str:
+    """Extract domain from URL, removing path and keeping only scheme + netloc"""
+    try:
+        parsed = urlparse(url)
+        if parsed.netloc:
+            # Return scheme + netloc (e.g., https://example.com)
+            domain = f"{parsed.scheme}://{parsed.netloc}"
+            logger.debug(f"[DOMAIN-EXTRACT] {url} -> {domain}")
+            return domain
+        else:
+            # If parsing fails, return original URL
+            logger.warning(f"[DOMAIN-EXTRACT] Could not parse URL: {url}")
+            return url
+    except Exception as e:
+        logger.error(f"[DOMAIN-EXTRACT] Error parsing URL {url}: {e}")
+        return url
+
 class Neo4jHandler:
     def __init__(self):
         self.driver = None
@@ -15,6 +40,25 @@ class Neo4jHandler:
         self._uri = None
         self._username = None
         self._password = None
+        # Per-transaction timeout (seconds) enforced by the server; slow jobs pass their own
+        self.query_timeout = float(os.getenv("NEO4J_QUERY_TIMEOUT", 30))
+        # Transient errors are retried by the driver with jittered exponential backoff,
+        # bounded by both total retry time and number of attempts
+        self.max_retry_time = float(os.getenv("NEO4J_MAX_RETRY_TIME", 15))
+        self.max_retries = int(os.getenv("NEO4J_MAX_RETRIES", 5))
+        # Connection pool and result streaming
+        self.pool_config = {
+            "max_connection_pool_size": int(os.getenv("NEO4J_MAX_POOL_SIZE", 100)),
+            "connection_acquisition_timeout": float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", 60)),
+            "max_connection_lifetime": float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", 3600)),
+            "fetch_size": int(os.getenv("NEO4J_FETCH_SIZE", 1000))
+        }
+        # Connectivity is probed at most once per TTL (or by the background prober) instead of before every query
+        self.connectivity_ttl = float(os.getenv("NEO4J_CONNECTIVITY_TTL", 15))
+        self.probe_interval = float(os.getenv("NEO4J_PROBE_INTERVAL", 10))
+        self._verified_at = 0.0
+        self._prober_stop = threading.Event()
+        self._prober: Optional[threading.Thread] = None
     
     def _get_config(self):
         """Get Neo4j configuration lazily when needed"""
@@ -34,8 +78,6 @@ class Neo4jHandler:
         return self._uri, self._username, self._password
         
     def connect(self, max_retries=10, retry_delay=5):
-        import time
-        
         try:
             uri, username, password = self._get_config()
         except ValueError as e:
@@ -44,13 +86,18 @@ class Neo4jHandler:
         
         for attempt in range(max_retries):
             try:
+                if self.driver:
+                    # Drop the driver of a previous failed attempt instead of leaking its pool
+                    self.driver.close()
                 self.driver = GraphDatabase.driver(
                     uri, 
-                    auth=(username, password)
+                    auth=(username, password),
+                    max_transaction_retry_time=self.max_retry_time,
+                    **self.pool_config
                 )
-                with self.driver.session() as session:
-                    session.run("RETURN 1")
+                self.driver.verify_connectivity()
                 self.connected = True
+                self._verified_at = time.monotonic()
                 logger.info(f"Berhasil terhubung ke database Neo4j pada percobaan ke-{attempt + 1}")
                 return True
             except Exception as e:
@@ -66,22 +113,124 @@ class Neo4jHandler:
         return False
     
     def close(self):
+        self.stop_prober()
         if self.driver:
             self.driver.close()
+            self.driver = None
             self.connected = False
     
-    def _check_connection(self):
-        """Check if database is connected and accessible"""
-        if not self.connected or not self.driver:
-            return False
+    def _probe(self) -> bool:
+        """Verify connectivity now and cache the result"""
+        was_connected = self.connected
         try:
-            with self.driver.session() as session:
-                session.run("RETURN 1")
-            return True
+            self.driver.verify_connectivity()
+            self.connected = True
         except Exception as e:
-            logger.warning(f"Database connection check failed: {e}")
+            if was_connected:
+                logger.warning(f"Database connection check failed: {e}")
             self.connected = False
+        self._verified_at = time.monotonic()
+        if self.connected and not was_connected:
+            logger.info("Koneksi ke database Neo4j pulih")
+        return self.connected
+    
+    def _check_connection(self):
+        """
+        Check if database is connected and accessible
+
+        Returns the cached state while it is younger than `connectivity_ttl`; queries refresh it on
+        success and invalidate it on connection errors, so this is normally free of round trips.
+        """
+        if not self.driver:
             return False
+        if time.monotonic() - self._verified_at < self.connectivity_ttl:
+            return self.connected
+        return self._probe()
+    
+    def start_prober(self):
+        """Keep the connectivity state fresh from a background thread (long-running processes such as the API)"""
+        if self.probe_interval <= 0 or (self._prober and self._prober.is_alive()):
+            return
+        self._prober_stop.clear()
+        
+        def _loop():
+            while not self._prober_stop.wait(self.probe_interval):
+                if self.driver:
+                    self._probe()
+        
+        self._prober = threading.Thread(target=_loop, name="neo4j-prober", daemon=True)
+        self._prober.start()
+    
+    def stop_prober(self):
+        self._prober_stop.set()
+    
+    def _execute(self, access_mode: str, work, *args, name: Optional[str] = None, timeout: Optional[float] = None, **kwargs):
+        """
+        Run `work(tx, *args, **kwargs)` as a managed read or write transaction
+
+        The driver rolls back and retries the whole function on transient errors; each extra
+        invocation is counted as a retry and, together with final failures, recorded in metrics.
+        """
+        from .metrics import metrics_recorder
+        
+        name = name or getattr(work, "__name__", "query")
+        attempts = 0
+        last_error = None
+        
+        def _unit(tx, *inner_args, **inner_kwargs):
+            nonlocal attempts, last_error
+            attempts += 1
+            if attempts > self.max_retries + 1:
+                raise Neo4jRetriesExhausted(f"{name} gagal setelah {self.max_retries} retry: {last_error}")
+            if attempts > 1:
+                logger.warning(f"🔁 [NEO4J-RETRY] {name} percobaan ke-{attempts} setelah error transient: {last_error}")
+            try:
+                return work(tx, *inner_args, **inner_kwargs)
+            except Exception as e:
+                last_error = e
+                raise
+        
+        failed = False
+        try:
+            with self.driver.session() as session:
+                execute = session.execute_read if access_mode == "READ" else session.execute_write
+                result = execute(unit_of_work(timeout=timeout or self.query_timeout)(_unit), *args, **kwargs)
+            # A committed transaction proves connectivity; skip the next probe
+            self.connected = True
+            self._verified_at = time.monotonic()
+            return result
+        except (ServiceUnavailable, SessionExpired):
+            # Connection-level failure: the next _check_connection probes again
+            failed = True
+            self._verified_at = 0.0
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if attempts > 1 or failed:
+                metrics_recorder.record_neo4j(name, retries=min(max(attempts - 1, 0), self.max_retries), failed=failed)
+    
+    def read(self, work, *args, **kwargs):
+        """Run a read unit of work (see `_execute`)"""
+        return self._execute("READ", work, *args, **kwargs)
+    
+    def write(self, work, *args, **kwargs):
+        """Run a write unit of work (see `_execute`)"""
+        return self._execute("WRITE", work, *args, **kwargs)
+    
+    @staticmethod
+    def _fetch_all(tx, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Record]:
+        # Records must be consumed inside the transaction function
+        return list(tx.run(query, parameters or {}))
+    
+    def read_query(self, query: str, parameters: Optional[Dict[str, Any]] = None, name: str = "read_query", **kwargs) -> List[Record]:
+        """Run one read query in a managed transaction and return all its records"""
+        return self.read(self._fetch_all, query, parameters, name=name, **kwargs)
+    
+    def write_query(self, query: str, parameters: Optional[Dict[str, Any]] = None, name: str = "write_query", **kwargs) -> List[Record]:
+        """Run one write query in a managed transaction and return all its records"""
+        return self.write(self._fetch_all, query, parameters, name=name, **kwargs)
     
     def _validate_site_info(self, site_info) -> bool:
         """Validate site info before insertion"""
@@ -125,85 +274,60 @@ class Neo4jHandler:
 
     def _extract_domain(self, url: str) -> str:
         """Extract domain from URL, removing path and keeping only scheme + netloc"""
-        try:
-            parsed = urlparse(url)
-            if parsed.netloc:
-                # Return scheme + netloc (e.g., https://example.com)
-                domain = f"{parsed.scheme}://{parsed.netloc}"
-                logger.debug(f"[DOMAIN-EXTRACT] {url} -> {domain}")
-                return domain
-            else:
-                # If parsing fails, return original URL
-                logger.warning(f"[DOMAIN-EXTRACT] Could not parse URL: {url}")
-                return url
-        except Exception as e:
-            logger.error(f"[DOMAIN-EXTRACT] Error parsing URL {url}: {e}")
-            return url
+        return extract_domain(url)
     
     def create_indexes(self):
         if not self._check_connection():
             logger.warning("Skipping index creation - database not connected")
             return
             
-        with self.driver.session() as session:
-            queries = [
-                "CREATE INDEX IF NOT EXISTS FOR (g:SitusJudi) ON (g.url)",
-                "CREATE INDEX IF NOT EXISTS FOR (a:AkunMencurigakan) ON (a.nomor_rekening)",
-                "CREATE INDEX IF NOT EXISTS FOR (c:CryptoWallet) ON (c.alamat_wallet)",
-                "CREATE INDEX IF NOT EXISTS FOR (p:MetodePembayaran) ON (p.provider)",
-                "CREATE INDEX IF NOT EXISTS FOR (g:SitusJudi) ON (g.waktu_ekstraksi)"
-            ]
-            
-            # Ensure TRANSFERS_TO relationship type exists to prevent warnings
-            init_queries = [
-                # Create a dummy relationship to ensure TRANSFERS_TO type exists, then remove it
-                "MERGE (dummy1:DummyNode {id: 'temp1'}) MERGE (dummy2:DummyNode {id: 'temp2'}) MERGE (dummy1)-[:TRANSFERS_TO {amount: 0, timestamp: '2024-01-01', reference: 'init', is_dummy: true}]->(dummy2)",
-                "MATCH (n:DummyNode {id: 'temp1'})-[r:TRANSFERS_TO {is_dummy: true}]->(m:DummyNode {id: 'temp2'}) DELETE r, n, m"
-            ]
-            
-            # Execute init queries first
-            for query in init_queries:
-                try:
-                    session.run(query)
-                    logger.debug(f"Executed init query successfully")
-                except Exception as e:
-                    logger.debug(f"Init query failed (expected): {e}")
-            
-            for query in queries:
-                try:
-                    session.run(query)
-                    logger.info(f"Index dibuat: {query}")
-                except Exception as e:
-                    logger.warning(f"Gagal buat index atau sudah ada: {e}")
-    
+        queries = [
+            "CREATE INDEX IF NOT EXISTS FOR (g:SitusJudi) ON (g.url)",
+            "CREATE INDEX IF NOT EXISTS FOR (a:AkunMencurigakan) ON (a.nomor_rekening)",
+            "CREATE INDEX IF NOT EXISTS FOR (c:CryptoWallet) ON (c.alamat_wallet)",
+            "CREATE INDEX IF NOT EXISTS FOR (p:MetodePembayaran) ON (p.provider)",
+            "CREATE INDEX IF NOT EXISTS FOR (g:SitusJudi) ON (g.waktu_ekstraksi)"
+        ]
+        
+        # Ensure TRANSFERS_TO relationship type exists to prevent warnings
+        init_queries = [
+            # Create a dummy relationship to ensure TRANSFERS_TO type exists, then remove it
+            "MERGE (dummy1:DummyNode {id: 'temp1'}) MERGE (dummy2:DummyNode {id: 'temp2'}) MERGE (dummy1)-[:TRANSFERS_TO {amount: 0, timestamp: '2024-01-01', reference: 'init', is_dummy: true}]->(dummy2)",
+            "MATCH (n:DummyNode {id: 'temp1'})-[r:TRANSFERS_TO {is_dummy: true}]->(m:DummyNode {id: 'temp2'}) DELETE r, n, m"
+        ]
+        
+        # Execute init queries first
+        for query in init_queries:
+            try:
+                self.write_query(query, name="create_indexes")
+                logger.debug(f"Executed init query successfully")
+            except Exception as e:
+                logger.debug(f"Init query failed (expected): {e}")
+        
+        for query in queries:
+            try:
+                self.write_query(query, name="create_indexes")
+                logger.info(f"Index dibuat: {query}")
+            except Exception as e:
+                logger.warning(f"Gagal buat index atau sudah ada: {e}")
+
     def store_gambling_site_data(self, data: GamblingSiteData) -> bool:
+        """
+        Upsert one site with all its accounts, wallets and relationships in a single write transaction
+
+        The same UNWIND statements as the bulk writer (`_write_site_rows`) are used, so the number of
+        round trips does not grow with the number of accounts, and a failure rolls the whole site back.
+        """
         if not self._check_connection():
             logger.error("[DB-ERROR] Cannot store data - database not connected")
             return False
         
-        # Validate site info first
-        if not self._validate_site_info(data.site_info):
-            logger.error("[VALIDATION] Site info validation failed, aborting data storage")
-            return False
-        
-        # Extract domain from the full URL to avoid duplicates with different paths
-        site_domain = self._extract_domain(data.site_info.site_url)
-        
         logger.info(f"[DB-START] Mulai menyimpan data untuk situs: {data.site_info.site_url}")
-        logger.info(f"[DB-DOMAIN] Domain yang akan disimpan: {site_domain}")
-        
-        # Filter and validate data before processing
-        valid_bank_accounts = [acc for acc in data.bank_accounts if self._validate_bank_account(acc)]
-        valid_crypto_wallets = [wallet for wallet in data.crypto_wallets if self._validate_crypto_wallet(wallet)]
-        valid_payment_gateways = [gateway for gateway in data.payment_gateways if self._validate_payment_gateway(gateway)]
-        
         logger.info(f"[DB-INFO] Original counts - Accounts: {len(data.bank_accounts)}, Wallets: {len(data.crypto_wallets)}, Payments: {len(data.payment_gateways)}")
-        logger.info(f"[DB-VALID] Valid counts - Accounts: {len(valid_bank_accounts)}, Wallets: {len(valid_crypto_wallets)}, Payments: {len(valid_payment_gateways)}")
         
-        # Skip if no valid data to store
-        if not valid_bank_accounts and not valid_crypto_wallets and not valid_payment_gateways:
-            logger.warning(f"[VALIDATION] No valid data to store for site: {site_domain}")
-            logger.warning(f"[VALIDATION] Original data counts - Accounts: {len(data.bank_accounts)}, Wallets: {len(data.crypto_wallets)}, Payments: {len(data.payment_gateways)}")
+        rows = self._site_rows(data)
+        if rows is None:
+            logger.error("[VALIDATION] Site info or data validation failed, aborting data storage")
             # Log the first few items to see what validation is failing
             if data.bank_accounts:
                 sample_account = data.bank_accounts[0]
@@ -212,68 +336,16 @@ class Neo4jHandler:
                 sample_wallet = data.crypto_wallets[0]
                 logger.warning(f"[VALIDATION] Sample wallet - Address: '{sample_wallet.wallet_address}', Crypto: '{sample_wallet.cryptocurrency}'")
             return False
-    
-            
+        
+        site_domain = rows["site"]["url"]
+        logger.info(f"[DB-DOMAIN] Domain yang akan disimpan: {site_domain}")
+        logger.info(f"[DB-VALID] Valid counts - Accounts: {len(rows['accounts'])}, Wallets: {len(rows['wallets'])}")
+        
         try:
-            with self.driver.session() as session:
-                logger.debug(f"[DB-SAVE] Menyimpan node SitusJudi untuk: {site_domain}")
-            
-                site_query = """
-                MERGE (g:SitusJudi {url: $url})
-                SET g.name = $nama,
-                    g.waktu_ekstraksi = $waktu,
-                    g.original_url = $original_url
-                WITH g, $site_language as site_language, $registration_success as registration_success, $accessibility_notes as accessibility_notes
-                SET g.site_language = CASE WHEN site_language IS NOT NULL AND site_language <> '' THEN site_language ELSE g.site_language END,
-                    g.registration_success = CASE WHEN registration_success IS NOT NULL THEN registration_success ELSE g.registration_success END,
-                    g.accessibility_notes = CASE WHEN accessibility_notes IS NOT NULL AND accessibility_notes <> '' THEN accessibility_notes ELSE g.accessibility_notes END
-                RETURN g
-                """
-                
-                session.run(site_query, {
-                    "url": site_domain,
-                    "nama": data.site_info.site_name,
-                    "waktu": datetime.now().isoformat(),
-                    "original_url": data.site_info.site_url,
-                    "site_language": data.site_info.site_language if data.site_info.site_language and data.site_info.site_language.strip() else None,
-                    "registration_success": data.site_info.registration_success,
-                    "accessibility_notes": data.site_info.accessibility_notes if data.site_info.accessibility_notes and data.site_info.accessibility_notes.strip() else None
-                })
-                logger.debug(f"[DB-SUCCESS] Node SitusJudi berhasil disimpan: {site_domain}")
-
-                # Process suspicious accounts with detailed logging
-                logger.debug(f"[DB-ACCOUNTS] Memproses {len(valid_bank_accounts)} akun mencurigakan yang valid...")
-                for i, account in enumerate(valid_bank_accounts, 1):
-                    try:
-                        self._store_suspicious_account(session, site_domain, account)
-                        logger.debug(f"[DB-ACCOUNT] {i}/{len(valid_bank_accounts)} - {account.account_number} ({account.bank_name})")
-                    except Exception as e:
-                        logger.error(f"[DB-ACCOUNT-FAILED] {i}/{len(valid_bank_accounts)} - {account.account_number}: {str(e)}")
-                        raise
-                # Process crypto wallets with detailed logging
-                logger.debug(f"[DB-WALLETS] Memproses {len(valid_crypto_wallets)} crypto wallet yang valid...")
-                for i, wallet in enumerate(valid_crypto_wallets, 1):
-                    try:
-                        self._store_crypto_wallet(session, site_domain, wallet)
-                        logger.debug(f"[DB-WALLET] {i}/{len(valid_crypto_wallets)} - {wallet.wallet_address} ({wallet.cryptocurrency})")
-                    except Exception as e:
-                        logger.error(f"[DB-WALLET-FAILED] {i}/{len(valid_crypto_wallets)} - {wallet.wallet_address}: {str(e)}")
-                        raise
-                
-                # Process payment methods with detailed logging
-                # logger.debug(f"[DB-PAYMENTS] Memproses {len(valid_payment_gateways)} metode pembayaran yang valid...")
-                # for i, payment in enumerate(valid_payment_gateways, 1):
-                #     try:
-                #         self._store_payment_method(session, site_domain, payment)
-                #         logger.debug(f"[DB-PAYMENT] {i}/{len(valid_payment_gateways)} - {payment.gateway_name}")
-                #     except Exception as e:
-                #         logger.error(f"[DB-PAYMENT-FAILED] {i}/{len(valid_payment_gateways)} - {payment.gateway_name}: {str(e)}")
-                #         # Continue processing other payments even if one fails
-                #         continue
-                
-                logger.info(f"[DB-COMPLETE] BERHASIL simpan semua data untuk situs: {site_domain}")
-                logger.info(f"[DB-SUMMARY] Tersimpan - Accounts: {len(valid_bank_accounts)}, Wallets: {len(valid_crypto_wallets)}, Payments: {len(valid_payment_gateways)}")
-                return True
+            self.write(self._write_site_rows, [rows["site"]], rows["accounts"], rows["wallets"], name="store_gambling_site_data")
+            logger.info(f"[DB-COMPLETE] BERHASIL simpan semua data untuk situs: {site_domain}")
+            logger.info(f"[DB-SUMMARY] Tersimpan - Accounts: {len(rows['accounts'])}, Wallets: {len(rows['wallets'])}")
+            return True
                 
         except Exception as e:
             logger.error(f"[DB-CRITICAL-ERROR] GAGAL simpan data situs: {site_domain}")
@@ -282,77 +354,144 @@ class Neo4jHandler:
             import traceback
             logger.error(f"[DB-TRACEBACK] {traceback.format_exc()}")
             return False
-    
-    def _store_suspicious_account(self, session, site_url: str, account: BankAccount):
-        logger.debug(f"[DB-ACCOUNT-DETAIL] Storing account: {account.account_number} ({account.bank_name}) for site: {site_url}")
-        
-        account_query = """
-        MATCH (g:SitusJudi {url: $site_url})
-        MERGE (a:AkunMencurigakan {nomor_rekening: $nomor_rekening})
-        SET a.jenis_akun = $jenis_akun,
-            a.nama_bank = $nama_bank,
-            a.pemilik_rekening = $pemilik_rekening,
-            a.terakhir_update = $waktu,
-            a.priority_score = coalesce(a.priority_score, 0)
-        WITH g, a, $bank_code as bank_code, $account_type_detail as account_type_detail,
-             $min_deposit as min_deposit, $max_deposit as max_deposit, $processing_time as processing_time, $oss_key as oss_key
-        SET a.bank_code = CASE WHEN bank_code IS NOT NULL AND bank_code <> '' THEN bank_code ELSE a.bank_code END,
-            a.account_type_detail = CASE WHEN account_type_detail IS NOT NULL AND account_type_detail <> '' THEN account_type_detail ELSE a.account_type_detail END,
-            a.min_deposit = CASE WHEN min_deposit IS NOT NULL THEN min_deposit ELSE a.min_deposit END,
-            a.max_deposit = CASE WHEN max_deposit IS NOT NULL THEN max_deposit ELSE a.max_deposit END,
-            a.processing_time = CASE WHEN processing_time IS NOT NULL AND processing_time <> '' THEN processing_time ELSE a.processing_time END,
-            a.oss_key = CASE WHEN oss_key IS NOT NULL AND oss_key <> '' THEN oss_key ELSE a.oss_key END
-        WITH g, a
-        MERGE (g)-[:MENGGUNAKAN_REKENING]->(a)
-        """
-        
-        try:
-            session.run(account_query, {
-                "site_url": site_url,
+
+    @staticmethod
+    def _account_set_hash(accounts: List[BankAccount], wallets: List[CryptoWallet]) -> Optional[str]:
+        """Fingerprint of the accounts and wallets seen in one crawl, to count how often a site rotates them"""
+        members = sorted({re.sub(r"\D", "", acc.account_number) for acc in accounts} | {w.wallet_address.lower() for w in wallets})
+        if not members:
+            return None  # nothing to compare: a crawl that found no accounts is not a rotation
+        return hashlib.sha1("|".join(members).encode("utf-8")).hexdigest()
+
+    def _site_rows(self, data: GamblingSiteData) -> Optional[Dict[str, Any]]:
+        """Validated UNWIND parameter rows for one site, or None when nothing valid is left to store"""
+        if not self._validate_site_info(data.site_info):
+            return None
+        site_domain = self._extract_domain(data.site_info.site_url)
+        waktu = datetime.now().isoformat()
+        valid_bank_accounts = [acc for acc in data.bank_accounts if self._validate_bank_account(acc)]
+        valid_crypto_wallets = [wallet for wallet in data.crypto_wallets if self._validate_crypto_wallet(wallet)]
+        valid_payment_gateways = [gateway for gateway in data.payment_gateways if self._validate_payment_gateway(gateway)]
+        if not valid_bank_accounts and not valid_crypto_wallets and not valid_payment_gateways:
+            logger.warning(f"[VALIDATION] No valid data to store for site: {site_domain}")
+            return None
+
+        def _text(value):
+            return value if value and value.strip() else None
+
+        return {
+            "site": {
+                "url": site_domain,
+                "nama": data.site_info.site_name,
+                "waktu": waktu,
+                "original_url": data.site_info.site_url,
+                "site_language": _text(data.site_info.site_language),
+                "registration_success": data.site_info.registration_success,
+                "accessibility_notes": _text(data.site_info.accessibility_notes),
+                "account_set_hash": self._account_set_hash(valid_bank_accounts, valid_crypto_wallets)
+            },
+            "accounts": [{
+                "site_url": site_domain,
                 "nomor_rekening": account.account_number,
                 "jenis_akun": account.account_type.value,
                 "nama_bank": account.bank_name,
                 "pemilik_rekening": account.account_holder,
-                "bank_code": account.bank_code if account.bank_code and account.bank_code.strip() else None,
-                "account_type_detail": account.account_type_detail if account.account_type_detail and account.account_type_detail.strip() else None,
+                "bank_code": _text(account.bank_code),
+                "account_type_detail": _text(account.account_type_detail),
                 "min_deposit": account.min_deposit,
                 "max_deposit": account.max_deposit,
-                "processing_time": account.processing_time if account.processing_time and account.processing_time.strip() else None,
-                "oss_key": account.oss_key if account.oss_key and account.oss_key.strip() else None,
-                "waktu": datetime.now().isoformat()
-            })
-        except Exception as e:
-            logger.error(f"[DB-ACCOUNT-QUERY-FAILED] Neo4j query failed for account {account.account_number}: {str(e)}")
-            raise
-    
-    def _store_crypto_wallet(self, session, site_url: str, wallet: CryptoWallet):
-        logger.debug(f"[DB-WALLET-DETAIL] Storing wallet: {wallet.wallet_address} ({wallet.cryptocurrency}) for site: {site_url}")
-        
-        wallet_query = """
-        MATCH (g:SitusJudi {url: $site_url})
-        MERGE (c:CryptoWallet {alamat_wallet: $alamat_wallet})
-        SET c.cryptocurrency = $cryptocurrency,
-            c.terakhir_update = $waktu,
-            c.priority_score = coalesce(c.priority_score, 0)
-        WITH c, $additional_info as additional_info
-        SET c.additional_info = CASE WHEN additional_info IS NOT NULL AND additional_info <> '' THEN additional_info ELSE c.additional_info END
-        WITH g, c
-        MERGE (g)-[:MENGGUNAKAN_CRYPTO]->(c)
-        """
-        
-        try:
-            session.run(wallet_query, {
-                "site_url": site_url,
+                "processing_time": _text(account.processing_time),
+                "oss_key": _text(account.oss_key),
+                "waktu": waktu
+            } for account in valid_bank_accounts],
+            "wallets": [{
+                "site_url": site_domain,
                 "alamat_wallet": wallet.wallet_address,
                 "cryptocurrency": wallet.cryptocurrency,
-                "additional_info": wallet.additional_info if wallet.additional_info and wallet.additional_info.strip() else None,
-                "waktu": datetime.now().isoformat()
-            })
+                "additional_info": _text(wallet.additional_info),
+                "waktu": waktu
+            } for wallet in valid_crypto_wallets]
+        }
+
+    @staticmethod
+    def _write_site_rows(tx, sites: List[dict], accounts: List[dict], wallets: List[dict]):
+        """Upsert many sites with their accounts and wallets: one UNWIND statement per node type"""
+        tx.run("""
+        UNWIND $sites AS site
+        MERGE (g:SitusJudi {url: site.url})
+        WITH g, site, g.account_set_hash IS NOT NULL AND g.account_set_hash <> site.account_set_hash AS rotated
+        SET g.account_changes = coalesce(g.account_changes, 0) + CASE WHEN rotated THEN 1 ELSE 0 END,
+            g.crawl_count = coalesce(g.crawl_count, 0) + 1,
+            g.account_set_hash = coalesce(site.account_set_hash, g.account_set_hash),
+            g.name = site.nama,
+            g.waktu_ekstraksi = site.waktu,
+            g.original_url = site.original_url,
+            g.site_language = coalesce(site.site_language, g.site_language),
+            g.registration_success = coalesce(site.registration_success, g.registration_success),
+            g.accessibility_notes = coalesce(site.accessibility_notes, g.accessibility_notes)
+        """, sites=sites).consume()
+        if accounts:
+            tx.run("""
+            UNWIND $accounts AS acc
+            MATCH (g:SitusJudi {url: acc.site_url})
+            MERGE (a:AkunMencurigakan {nomor_rekening: acc.nomor_rekening})
+            SET a.jenis_akun = acc.jenis_akun,
+                a.nama_bank = acc.nama_bank,
+                a.pemilik_rekening = acc.pemilik_rekening,
+                a.terakhir_update = acc.waktu,
+                a.priority_score = coalesce(a.priority_score, 0),
+                a.bank_code = coalesce(acc.bank_code, a.bank_code),
+                a.account_type_detail = coalesce(acc.account_type_detail, a.account_type_detail),
+                a.min_deposit = coalesce(acc.min_deposit, a.min_deposit),
+                a.max_deposit = coalesce(acc.max_deposit, a.max_deposit),
+                a.processing_time = coalesce(acc.processing_time, a.processing_time),
+                a.oss_key = coalesce(acc.oss_key, a.oss_key)
+            MERGE (g)-[:MENGGUNAKAN_REKENING]->(a)
+            """, accounts=accounts).consume()
+        if wallets:
+            tx.run("""
+            UNWIND $wallets AS wallet
+            MATCH (g:SitusJudi {url: wallet.site_url})
+            MERGE (c:CryptoWallet {alamat_wallet: wallet.alamat_wallet})
+            SET c.cryptocurrency = wallet.cryptocurrency,
+                c.terakhir_update = wallet.waktu,
+                c.priority_score = coalesce(c.priority_score, 0),
+                c.additional_info = coalesce(wallet.additional_info, c.additional_info)
+            MERGE (g)-[:MENGGUNAKAN_CRYPTO]->(c)
+            """, wallets=wallets).consume()
+
+    def store_gambling_site_batch(self, items: List[GamblingSiteData]) -> List[bool]:
+        """
+        Store many sites in a single write transaction (used by the bulk writer)
+
+        Args:
+            items (List[GamblingSiteData]): Extraction results to upsert
+
+        Returns:
+            List[bool]: Per item, whether it was written. Items failing validation are False;
+            if the transaction fails every item is False
+        """
+        if not self._check_connection():
+            logger.error("[DB-ERROR] Cannot store batch - database not connected")
+            return [False] * len(items)
+
+        rows = [self._site_rows(data) for data in items]
+        valid = [row for row in rows if row]
+        if not valid:
+            return [False] * len(items)
+
+        sites = [row["site"] for row in valid]
+        accounts = [acc for row in valid for acc in row["accounts"]]
+        wallets = [wallet for row in valid for wallet in row["wallets"]]
+        try:
+            self.write(self._write_site_rows, sites, accounts, wallets, name="store_gambling_site_batch")
+            logger.info(f"[DB-BATCH] Tersimpan {len(sites)} situs - Accounts: {len(accounts)}, Wallets: {len(wallets)}")
+            return [row is not None for row in rows]
         except Exception as e:
-            logger.error(f"[DB-WALLET-QUERY-FAILED] Neo4j query failed for wallet {wallet.wallet_address}: {str(e)}")
-            raise
-    
-    def _store_payment_method(self, session, site_url: str, payment: PaymentGateway):
+            logger.error(f"[DB-BATCH-FAILED] Gagal simpan batch {len(sites)} situs: {str(e)}")
+            return [False] * len(items)
+
+    def _store_payment_method(self, tx, site_url: str, payment: PaymentGateway):
         logger.debug(f"[DB-PAYMENT-DETAIL] Storing payment method: {payment.gateway_name} for site: {site_url}")
         
         payment_query = """
@@ -371,7 +510,7 @@ class Neo4jHandler:
             # Filter out empty strings from supported_methods list
             supported_methods = [method for method in payment.supported_methods if method and method.strip()] if payment.supported_methods else []
             
-            session.run(payment_query, {
+            tx.run(payment_query, {
                 "site_url": site_url,
                 "provider": payment.gateway_name,
                 "supported_methods": supported_methods if supported_methods else None,
@@ -397,14 +536,35 @@ class Neo4jHandler:
         """
         
         try:
-            with self.driver.session() as session:
-                result = session.run(query)
-                return [{"akun": record["a"], "situs_judi": record["situs_judi"]} 
-                       for record in result]
+            records = self.read_query(query, name="get_all_suspicious_accounts")
+            return [{"akun": record["a"], "situs_judi": record["situs_judi"]} 
+                   for record in records]
         except Exception as e:
             logger.error(f"Error querying suspicious accounts: {e}")
             return []
     
+    def get_recrawl_candidates(self, extracted_before: str, limit: int = 2000) -> List[dict]:
+        """Sites last extracted before `extracted_before` (ISO timestamp), with their crawl and rotation counts"""
+        if not self._check_connection():
+            logger.error("Cannot query - database not connected")
+            return []
+            
+        query = """
+        MATCH (g:SitusJudi)
+        WHERE g.waktu_ekstraksi IS NOT NULL AND g.waktu_ekstraksi < $extracted_before
+        RETURN g.url as url, coalesce(g.original_url, g.url) as original_url, g.waktu_ekstraksi as waktu_ekstraksi,
+               coalesce(g.crawl_count, 1) as crawl_count, coalesce(g.account_changes, 0) as account_changes
+        ORDER BY g.waktu_ekstraksi ASC
+        LIMIT $limit
+        """
+        
+        try:
+            records = self.read_query(query, {"extracted_before": extracted_before, "limit": limit}, name="get_recrawl_candidates")
+            return [dict(record) for record in records]
+        except Exception as e:
+            logger.error(f"Error querying recrawl candidates: {e}")
+            return []
+    
     def get_gambling_site_networks(self) -> List[dict]:
         if not self._check_connection():
             logger.error("Cannot query - database not connected")
@@ -418,9 +578,8 @@ class Neo4jHandler:
         """
         
         try:
-            with self.driver.session() as session:
-                result = session.run(query)
-                return [dict(record) for record in result]
+            records = self.read_query(query, name="get_gambling_site_networks")
+            return [dict(record) for record in records]
         except Exception as e:
             logger.error(f"Error querying gambling networks: {e}")
             return []
@@ -443,18 +602,17 @@ class Neo4jHandler:
         """
         
         try:
-            with self.driver.session() as session:
-                result = session.run(query, {"site_url": site_url})
-                record = result.single()
-                if record:
-                    return {
-                        "situs": dict(record["g"]),
-                        "jumlah_rekening": record["jumlah_rekening"],
-                        "jumlah_crypto": record["jumlah_crypto"],
-                        "jumlah_payment": record["jumlah_payment"],
-                        "bank_list": record["bank_list"]
-                    }
-                return {}
+            records = self.read_query(query, {"site_url": site_url}, name="get_site_statistics")
+            if records:
+                record = records[0]
+                return {
+                    "situs": dict(record["g"]),
+                    "jumlah_rekening": record["jumlah_rekening"],
+                    "jumlah_crypto": record["jumlah_crypto"],
+                    "jumlah_payment": record["jumlah_payment"],
+                    "bank_list": record["bank_list"]
+                }
+            return {}
         except Exception as e:
             logger.error(f"Error querying site statistics: {e}")
             return {}
@@ -526,54 +684,131 @@ class Neo4jHandler:
         num_player_accounts = random.randint(min_players_needed, max_players_needed)
         
         try:
-            with self.driver.session() as session:
-                # Clear existing test data
-                logger.info("🧹 Clearing existing test data...")
-                clear_query = """
-                MATCH (n)
-                WHERE n.is_test_data = true OR n.is_schema_sample IS NULL
-                DETACH DELETE n
+            # Clear existing test data
+            logger.info("🧹 Clearing existing test data...")
+            clear_query = """
+            MATCH (n)
+            WHERE n.is_test_data = true OR n.is_schema_sample IS NULL
+            DETACH DELETE n
+            """
+            self.write_query(clear_query, name="seed_test_data")
+            
+            # Create all gambling websites
+            logger.info("🎰 Creating gambling websites...")
+            for site in gambling_websites:
+                site_query = """
+                MERGE (g:SitusJudi {url: $url})
+                SET g.name = $nama,
+                    g.waktu_ekstraksi = $waktu,
+                    g.original_url = $url,
+                    g.site_language = 'Indonesian',
+                    g.registration_success = true,
+                    g.is_test_data = true
                 """
-                session.run(clear_query)
+                self.write_query(site_query, {
+                    "url": site["url"],
+                    "nama": site["name"],
+                    "waktu": datetime.now().isoformat()
+                }, name="seed_test_data")
+            
+            created_entities = []
+            player_account_ids = []     # Track player accounts
+            pooling_account_ids = []    # Track pooling accounts  
+            layer2_account_id = None    # Track the single layer-2 account
+            
+            entity_counter = 0
+            
+            # 1. Create player accounts (3-5 per pooling account)
+            logger.info(f"🎮 Creating {num_player_accounts} player accounts...")
+            bank_names = ["BCA", "BRI", "BNI", "Mandiri", "CIMB Niaga"]
+            
+            for i in range(num_player_accounts):
+                oss_key = demo_oss_keys[entity_counter % len(demo_oss_keys)]
+                entity_counter += 1
                 
-                # Create all gambling websites
-                logger.info("🎰 Creating gambling websites...")
-                for site in gambling_websites:
-                    site_query = """
-                    MERGE (g:SitusJudi {url: $url})
-                    SET g.name = $nama,
-                        g.waktu_ekstraksi = $waktu,
-                        g.original_url = $url,
-                        g.site_language = 'Indonesian',
-                        g.registration_success = true,
-                        g.is_test_data = true
+                # Mix of bank accounts and e-wallets for players (70% bank, 30% e-wallet)
+                if i < int(num_player_accounts * 0.7):  # Bank accounts
+                    bank_name = random.choice(bank_names)
+                    account_number = f"{random.randint(1000000000, 9999999999)}"
+                    
+                    account_query = """
+                    MERGE (a:AkunMencurigakan {nomor_rekening: $nomor_rekening})
+                    SET a.jenis_akun = 'CHECKING',
+                        a.nama_bank = $nama_bank,
+                        a.pemilik_rekening = $pemilik_rekening,
+                        a.terakhir_update = $waktu,
+                        a.priority_score = $priority_score,
+                        a.oss_key = $oss_key,
+                        a.cluster_id = 'players',
+                        a.connections = 1,
+                        a.is_test_data = true
                     """
-                    session.run(site_query, {
-                        "url": site["url"],
-                        "nama": site["name"],
-                        "waktu": datetime.now().isoformat()
+                    
+                    self.write_query(account_query, {
+                        "nomor_rekening": account_number,
+                        "nama_bank": bank_name,
+                        "pemilik_rekening": f"Player {entity_counter}",
+                        "waktu": datetime.now().isoformat(),
+                        "priority_score": random.randint(20, 50),
+                        "oss_key": oss_key
+                    }, name="seed_test_data")
+                    
+                    player_account_ids.append(account_number)
+                    created_entities.append({
+                        "type": "AkunMencurigakan",
+                        "identifier": account_number,
+                        "cluster": "players"
                     })
+                    
+                else:  # E-wallets
+                    ewallet_types = ["OVO", "DANA", "GoPay", "LinkAja", "ShopeePay"]
+                    wallet_type = random.choice(ewallet_types)
+                    wallet_id = f"{wallet_type}_{random.randint(100000, 999999)}"
+                    
+                    ewallet_query = """
+                    MERGE (e:EWallet {wallet_id: $wallet_id})
+                    SET e.wallet_type = $wallet_type,
+                        e.phone_number = $phone_number,
+                        e.owner_name = $owner_name,
+                        e.registration_date = $waktu,
+                        e.priority_score = $priority_score,
+                        e.oss_key = $oss_key,
+                        e.cluster_id = 'players',
+                        e.connections = 1,
+                        e.is_test_data = true
+                    """
+                    
+                    self.write_query(ewallet_query, {
+                        "wallet_id": wallet_id,
+                        "wallet_type": wallet_type,
+                        "phone_number": f"0812{random.randint(10000000, 99999999)}",
+                        "owner_name": f"Player {entity_counter}",
+                        "waktu": datetime.now().isoformat(),
+                        "priority_score": random.randint(15, 45),
+                        "oss_key": oss_key
+                    }, name="seed_test_data")
+                    
+                    player_account_ids.append(wallet_id)
+                    created_entities.append({
+                        "type": "EWallet",
+                        "identifier": wallet_id,
+                        "cluster": "players"
+                    })
+
+            # 2. Create pooling accounts using real website data
+            logger.info(f"🏦 Creating {total_pooling_accounts} pooling accounts from real website data...")
+            
+            for site_idx, site in enumerate(gambling_websites):
+                logger.info(f"Creating pooling accounts for {site['name']}...")
                 
-                created_entities = []
-                player_account_ids = []     # Track player accounts
-                pooling_account_ids = []    # Track pooling accounts  
-                layer2_account_id = None    # Track the single layer-2 account
-                
-                entity_counter = 0
-                
-                # 1. Create player accounts (3-5 per pooling account)
-                logger.info(f"🎮 Creating {num_player_accounts} player accounts...")
-                bank_names = ["BCA", "BRI", "BNI", "Mandiri", "CIMB Niaga"]
-                
-                for i in range(num_player_accounts):
+                for pool_idx, account_data in enumerate(site["accounts"]):
                     oss_key = demo_oss_keys[entity_counter % len(demo_oss_keys)]
                     entity_counter += 1
                     
-                    # Mix of bank accounts and e-wallets for players (70% bank, 30% e-wallet)
-                    if i < int(num_player_accounts * 0.7):  # Bank accounts
-                        bank_name = random.choice(bank_names)
-                        account_number = f"{random.randint(1000000000, 9999999999)}"
-                        
+                    account_identifier = account_data["number"]
+                    
+                    if account_data["type"] == "AkunMencurigakan":
+                        # Create bank account
                         account_query = """
                         MERGE (a:AkunMencurigakan {nomor_rekening: $nomor_rekening})
                         SET a.jenis_akun = 'CHECKING',
@@ -582,32 +817,25 @@ class Neo4jHandler:
                             a.terakhir_update = $waktu,
                             a.priority_score = $priority_score,
                             a.oss_key = $oss_key,
-                            a.cluster_id = 'players',
-                            a.connections = 1,
+                            a.cluster_id = $cluster_id,
+                            a.connections = 5,
+                            a.pooling_rank = $pooling_rank,
                             a.is_test_data = true
                         """
                         
-                        session.run(account_query, {
-                            "nomor_rekening": account_number,
-                            "nama_bank": bank_name,
-                            "pemilik_rekening": f"Player {entity_counter}",
+                        self.write_query(account_query, {
+                            "nomor_rekening": account_identifier,
+                            "nama_bank": account_data["bank"],
+                            "pemilik_rekening": account_data["owner"],
                             "waktu": datetime.now().isoformat(),
-                            "priority_score": random.randint(20, 50),
-                            "oss_key": oss_key
-                        })
-                        
-                        player_account_ids.append(account_number)
-                        created_entities.append({
-                            "type": "AkunMencurigakan",
-                            "identifier": account_number,
-                            "cluster": "players"
-                        })
-                        
-                    else:  # E-wallets
-                        ewallet_types = ["OVO", "DANA", "GoPay", "LinkAja", "ShopeePay"]
-                        wallet_type = random.choice(ewallet_types)
-                        wallet_id = f"{wallet_type}_{random.randint(100000, 999999)}"
+                            "priority_score": random.randint(70, 90),
+                            "oss_key": oss_key,
+                            "cluster_id": f"website_{site_idx}",
+                            "pooling_rank": pool_idx + 1
+                        }, name="seed_test_data")
                         
+                    elif account_data["type"] == "EWallet":
+                        # Create e-wallet
                         ewallet_query = """
                         MERGE (e:EWallet {wallet_id: $wallet_id})
                         SET e.wallet_type = $wallet_type,
@@ -616,208 +844,203 @@ class Neo4jHandler:
                             e.registration_date = $waktu,
                             e.priority_score = $priority_score,
                             e.oss_key = $oss_key,
-                            e.cluster_id = 'players',
-                            e.connections = 1,
+                            e.cluster_id = $cluster_id,
+                            e.connections = 5,
+                            e.pooling_rank = $pooling_rank,
                             e.is_test_data = true
                         """
                         
-                        session.run(ewallet_query, {
-                            "wallet_id": wallet_id,
-                            "wallet_type": wallet_type,
-                            "phone_number": f"0812{random.randint(10000000, 99999999)}",
-                            "owner_name": f"Player {entity_counter}",
+                        self.write_query(ewallet_query, {
+                            "wallet_id": account_identifier,
+                            "wallet_type": account_data["wallet_type"],
+                            "phone_number": account_identifier,
+                            "owner_name": account_data["owner"],
                             "waktu": datetime.now().isoformat(),
-                            "priority_score": random.randint(15, 45),
-                            "oss_key": oss_key
-                        })
+                            "priority_score": random.randint(70, 90),
+                            "oss_key": oss_key,
+                            "cluster_id": f"website_{site_idx}",
+                            "pooling_rank": pool_idx + 1
+                        }, name="seed_test_data")
                         
-                        player_account_ids.append(wallet_id)
-                        created_entities.append({
-                            "type": "EWallet",
-                            "identifier": wallet_id,
-                            "cluster": "players"
-                        })
-
-                # 2. Create pooling accounts using real website data
-                logger.info(f"🏦 Creating {total_pooling_accounts} pooling accounts from real website data...")
-                
-                for site_idx, site in enumerate(gambling_websites):
-                    logger.info(f"Creating pooling accounts for {site['name']}...")
-                    
-                    for pool_idx, account_data in enumerate(site["accounts"]):
-                        oss_key = demo_oss_keys[entity_counter % len(demo_oss_keys)]
-                        entity_counter += 1
-                        
-                        account_identifier = account_data["number"]
-                        
-                        if account_data["type"] == "AkunMencurigakan":
-                            # Create bank account
-                            account_query = """
-                            MERGE (a:AkunMencurigakan {nomor_rekening: $nomor_rekening})
-                            SET a.jenis_akun = 'CHECKING',
-                                a.nama_bank = $nama_bank,
-                                a.pemilik_rekening = $pemilik_rekening,
-                                a.terakhir_update = $waktu,
-                                a.priority_score = $priority_score,
-                                a.oss_key = $oss_key,
-                                a.cluster_id = $cluster_id,
-                                a.connections = 5,
-                                a.pooling_rank = $pooling_rank,
-                                a.is_test_data = true
-                            """
-                            
-                            session.run(account_query, {
-                                "nomor_rekening": account_identifier,
-                                "nama_bank": account_data["bank"],
-                                "pemilik_rekening": account_data["owner"],
-                                "waktu": datetime.now().isoformat(),
-                                "priority_score": random.randint(70, 90),
-                                "oss_key": oss_key,
-                                "cluster_id": f"website_{site_idx}",
-                                "pooling_rank": pool_idx + 1
-                            })
-                            
-                        elif account_data["type"] == "EWallet":
-                            # Create e-wallet
-                            ewallet_query = """
-                            MERGE (e:EWallet {wallet_id: $wallet_id})
-                            SET e.wallet_type = $wallet_type,
-                                e.phone_number = $phone_number,
-                                e.owner_name = $owner_name,
-                                e.registration_date = $waktu,
-                                e.priority_score = $priority_score,
-                                e.oss_key = $oss_key,
-                                e.cluster_id = $cluster_id,
-                                e.connections = 5,
-                                e.pooling_rank = $pooling_rank,
-                                e.is_test_data = true
-                            """
-                            
-                            session.run(ewallet_query, {
-                                "wallet_id": account_identifier,
-                                "wallet_type": account_data["wallet_type"],
-                                "phone_number": account_identifier,
-                                "owner_name": account_data["owner"],
-                                "waktu": datetime.now().isoformat(),
-                                "priority_score": random.randint(70, 90),
-                                "oss_key": oss_key,
-                                "cluster_id": f"website_{site_idx}",
-                                "pooling_rank": pool_idx + 1
-                            })
-                            
-                        elif account_data["type"] == "QRIS":
-                            # Create QRIS as a special account type
-                            qris_query = """
-                            MERGE (q:QRIS {qris_id: $qris_id})
-                            SET q.merchant_name = $merchant_name,
-                                q.qris_number = $qris_number,
-                                q.registration_date = $waktu,
-                                q.priority_score = $priority_score,
-                                q.oss_key = $oss_key,
-                                q.cluster_id = $cluster_id,
-                                q.connections = 5,
-                                q.pooling_rank = $pooling_rank,
-                                q.is_test_data = true
-                            """
-                            
-                            session.run(qris_query, {
-                                "qris_id": account_identifier,
-                                "merchant_name": account_data["owner"],
-                                "qris_number": account_identifier,
-                                "waktu": datetime.now().isoformat(),
-                                "priority_score": random.randint(70, 90),
-                                "oss_key": oss_key,
-                                "cluster_id": f"website_{site_idx}",
-                                "pooling_rank": pool_idx + 1
-                            })
+                    elif account_data["type"] == "QRIS":
+                        # Create QRIS as a special account type
+                        qris_query = """
+                        MERGE (q:QRIS {qris_id: $qris_id})
+                        SET q.merchant_name = $merchant_name,
+                            q.qris_number = $qris_number,
+                            q.registration_date = $waktu,
+                            q.priority_score = $priority_score,
+                            q.oss_key = $oss_key,
+                            q.cluster_id = $cluster_id,
+                            q.connections = 5,
+                            q.pooling_rank = $pooling_rank,
+                            q.is_test_data = true
+                        """
                         
-                        # Create relationship with gambling site
-                        if account_data["type"] == "AkunMencurigakan":
-                            site_relationship_query = """
-                            MATCH (g:SitusJudi {url: $site_url})
-                            MATCH (a:AkunMencurigakan {nomor_rekening: $account_number})
-                            MERGE (g)-[:MENGGUNAKAN_REKENING]->(a)
-                            """
-                        elif account_data["type"] == "EWallet":
-                            site_relationship_query = """
-                            MATCH (g:SitusJudi {url: $site_url})
-                            MATCH (e:EWallet {wallet_id: $account_number})
-                            MERGE (g)-[:MENGGUNAKAN_REKENING]->(e)
-                            """
-                        elif account_data["type"] == "QRIS":
-                            site_relationship_query = """
-                            MATCH (g:SitusJudi {url: $site_url})
-                            MATCH (q:QRIS {qris_id: $account_number})
-                            MERGE (g)-[:MENGGUNAKAN_REKENING]->(q)
-                            """
+                        self.write_query(qris_query, {
+                            "qris_id": account_identifier,
+                            "merchant_name": account_data["owner"],
+                            "qris_number": account_identifier,
+                            "waktu": datetime.now().isoformat(),
+                            "priority_score": random.randint(70, 90),
+                            "oss_key": oss_key,
+                            "cluster_id": f"website_{site_idx}",
+                            "pooling_rank": pool_idx + 1
+                        }, name="seed_test_data")
+                    
+                    # Create relationship with gambling site
+                    if account_data["type"] == "AkunMencurigakan":
+                        site_relationship_query = """
+                        MATCH (g:SitusJudi {url: $site_url})
+                        MATCH (a:AkunMencurigakan {nomor_rekening: $account_number})
+                        MERGE (g)-[:MENGGUNAKAN_REKENING]->(a)
+                        """
+                    elif account_data["type"] == "EWallet":
+                        site_relationship_query = """
+                        MATCH (g:SitusJudi {url: $site_url})
+                        MATCH (e:EWallet {wallet_id: $account_number})
+                        MERGE (g)-[:MENGGUNAKAN_REKENING]->(e)
+                        """
+                    elif account_data["type"] == "QRIS":
+                        site_relationship_query = """
+                        MATCH (g:SitusJudi {url: $site_url})
+                        MATCH (q:QRIS {qris_id: $account_number})
+                        MERGE (g)-[:MENGGUNAKAN_REKENING]->(q)
+                        """
+                    
+                    self.write_query(site_relationship_query, {
+                        "site_url": site["url"],
+                        "account_number": account_identifier
+                    }, name="seed_test_data")
+                    
+                    pooling_account_ids.append(account_identifier)
+                    created_entities.append({
+                        "type": account_data["type"],
+                        "identifier": account_identifier,
+                        "cluster": f"website_{site_idx}",
+                        "associated_website": site["url"],
+                        "bank": account_data.get("bank", account_data.get("wallet_type", "QRIS")),
+                        "pooling_rank": pool_idx + 1,
+                        "owner": account_data["owner"]
+                    })
+            
+            # 3. Create 1 Layer-2 Account (top-level aggregator)
+            logger.info("🔝 Creating 1 layer-2 aggregator account...")
+            
+            oss_key = demo_oss_keys[entity_counter % len(demo_oss_keys)]
+            entity_counter += 1
+            
+            # Use distinctive bank for layer-2 account
+            account_number = f"{random.randint(1000000000, 9999999999)}"
+            
+            account_query = """
+            MERGE (a:AkunMencurigakan {nomor_rekening: $nomor_rekening})
+            SET a.jenis_akun = 'CHECKING',
+                a.nama_bank = 'CIMB Niaga',
+                a.pemilik_rekening = $pemilik_rekening,
+                a.terakhir_update = $waktu,
+                a.priority_score = $priority_score,
+                a.oss_key = $oss_key,
+                a.cluster_id = 'layer2',
+                a.connections = 12,
+                a.is_test_data = true
+            """
+            
+            self.write_query(account_query, {
+                "nomor_rekening": account_number,
+                "pemilik_rekening": "Top Level Aggregator",
+                "waktu": datetime.now().isoformat(),
+                "priority_score": random.randint(85, 100),
+                "oss_key": oss_key
+            }, name="seed_test_data")
+            
+            layer2_account_id = account_number
+            created_entities.append({
+                "type": "AkunMencurigakan",
+                "identifier": account_number,
+                "cluster": "layer2"
+            })
+            
+            # Create transaction relationships following the hierarchy pattern
+            logger.info("💸 Creating transaction hierarchy with 3-5 players per pooling account...")
+            
+            transaction_count = 0
+            
+            # Define common transaction query
+            transaction_query = """
+            MATCH (from_entity {is_test_data: true})
+            MATCH (to_entity {is_test_data: true}) 
+            WHERE ((from_entity:AkunMencurigakan AND from_entity.nomor_rekening = $from_identifier) OR
+                (from_entity:EWallet AND from_entity.wallet_id = $from_identifier)) AND
+                ((to_entity:AkunMencurigakan AND to_entity.nomor_rekening = $to_identifier) OR
+                (to_entity:EWallet AND to_entity.wallet_id = $to_identifier) OR
+                (to_entity:QRIS AND to_entity.qris_id = $to_identifier))
+            CREATE (from_entity)-[t:TRANSFERS_TO {
+                amount: $amount,
+                timestamp: $timestamp,
+                reference: $reference,
+                is_test_data: true
+            }]->(to_entity)
+            """
+            
+            # 1. Player Accounts → Pooling Accounts (3-5 players per pooling account)
+            logger.info("🎮 Creating Player → Pooling transfers (3-5 players per pooling account)...")
+            
+            # Shuffle player accounts for random distribution
+            shuffled_players = player_account_ids.copy()
+            random.shuffle(shuffled_players)
+            
+            player_idx = 0
+            for pooling_id in pooling_account_ids:
+                # Each pooling account gets 3-5 players
+                num_players_for_this_pooling = random.randint(3, 5)
+                
+                for _ in range(num_players_for_this_pooling):
+                    if player_idx < len(shuffled_players):
+                        player_id = shuffled_players[player_idx]
                         
-                        session.run(site_relationship_query, {
-                            "site_url": site["url"],
-                            "account_number": account_identifier
-                        })
+                        try:
+                            self.write_query(transaction_query, {
+                                "from_identifier": player_id,
+                                "to_identifier": pooling_id,
+                                "amount": random.randint(500000, 2000000),  # 500k - 2M IDR
+                                "timestamp": (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat(),
+                                "reference": f"PLY{random.randint(100000, 999999)}"
+                            }, name="seed_test_data")
+                            transaction_count += 1
+                            logger.debug(f"Player {player_id} → Pooling {pooling_id}")
+                        except Exception as e:
+                            logger.debug(f"Player→Pooling transaction failed: {e}")
                         
-                        pooling_account_ids.append(account_identifier)
-                        created_entities.append({
-                            "type": account_data["type"],
-                            "identifier": account_identifier,
-                            "cluster": f"website_{site_idx}",
-                            "associated_website": site["url"],
-                            "bank": account_data.get("bank", account_data.get("wallet_type", "QRIS")),
-                            "pooling_rank": pool_idx + 1,
-                            "owner": account_data["owner"]
-                        })
-                
-                # 3. Create 1 Layer-2 Account (top-level aggregator)
-                logger.info("🔝 Creating 1 layer-2 aggregator account...")
-                
-                oss_key = demo_oss_keys[entity_counter % len(demo_oss_keys)]
-                entity_counter += 1
-                
-                # Use distinctive bank for layer-2 account
-                account_number = f"{random.randint(1000000000, 9999999999)}"
-                
-                account_query = """
-                MERGE (a:AkunMencurigakan {nomor_rekening: $nomor_rekening})
-                SET a.jenis_akun = 'CHECKING',
-                    a.nama_bank = 'CIMB Niaga',
-                    a.pemilik_rekening = $pemilik_rekening,
-                    a.terakhir_update = $waktu,
-                    a.priority_score = $priority_score,
-                    a.oss_key = $oss_key,
-                    a.cluster_id = 'layer2',
-                    a.connections = 12,
-                    a.is_test_data = true
-                """
-                
-                session.run(account_query, {
-                    "nomor_rekening": account_number,
-                    "pemilik_rekening": "Top Level Aggregator",
-                    "waktu": datetime.now().isoformat(),
-                    "priority_score": random.randint(85, 100),
-                    "oss_key": oss_key
-                })
-                
-                layer2_account_id = account_number
-                created_entities.append({
-                    "type": "AkunMencurigakan",
-                    "identifier": account_number,
-                    "cluster": "layer2"
-                })
-                
-                # Create transaction relationships following the hierarchy pattern
-                logger.info("💸 Creating transaction hierarchy with 3-5 players per pooling account...")
+                        player_idx += 1
+            
+            # Handle remaining players (distribute them randomly to pooling accounts)
+            while player_idx < len(shuffled_players):
+                pooling_target = random.choice(pooling_account_ids)
+                player_id = shuffled_players[player_idx]
                 
-                transaction_count = 0
+                try:
+                    self.write_query(transaction_query, {
+                        "from_identifier": player_id,
+                        "to_identifier": pooling_target,
+                        "amount": random.randint(500000, 2000000),
+                        "timestamp": (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat(),
+                        "reference": f"PLY{random.randint(100000, 999999)}"
+                    }, name="seed_test_data")
+                    transaction_count += 1
+                    logger.debug(f"Remaining Player {player_id} → Pooling {pooling_target}")
+                except Exception as e:
+                    logger.debug(f"Remaining Player→Pooling transaction failed: {e}")
                 
-                # Define common transaction query
-                transaction_query = """
-                MATCH (from_entity {is_test_data: true})
-                MATCH (to_entity {is_test_data: true}) 
-                WHERE ((from_entity:AkunMencurigakan AND from_entity.nomor_rekening = $from_identifier) OR
-                    (from_entity:EWallet AND from_entity.wallet_id = $from_identifier)) AND
-                    ((to_entity:AkunMencurigakan AND to_entity.nomor_rekening = $to_identifier) OR
-                    (to_entity:EWallet AND to_entity.wallet_id = $to_identifier) OR
-                    (to_entity:QRIS AND to_entity.qris_id = $to_identifier))
+                player_idx += 1
+            
+            # 2. Pooling Accounts → Layer-2 Account
+            logger.info("🏦 Creating Pooling → Layer-2 transfers...")
+            for pooling_id in pooling_account_ids:
+                # Special query for QRIS to Layer-2
+                qris_to_layer2_query = """
+                MATCH (from_entity:QRIS {qris_id: $from_identifier, is_test_data: true})
+                MATCH (to_entity:AkunMencurigakan {nomor_rekening: $to_identifier, is_test_data: true})
                 CREATE (from_entity)-[t:TRANSFERS_TO {
                     amount: $amount,
                     timestamp: $timestamp,
@@ -826,181 +1049,115 @@ class Neo4jHandler:
                 }]->(to_entity)
                 """
                 
-                # 1. Player Accounts → Pooling Accounts (3-5 players per pooling account)
-                logger.info("🎮 Creating Player → Pooling transfers (3-5 players per pooling account)...")
-                
-                # Shuffle player accounts for random distribution
-                shuffled_players = player_account_ids.copy()
-                random.shuffle(shuffled_players)
-                
-                player_idx = 0
-                for pooling_id in pooling_account_ids:
-                    # Each pooling account gets 3-5 players
-                    num_players_for_this_pooling = random.randint(3, 5)
-                    
-                    for _ in range(num_players_for_this_pooling):
-                        if player_idx < len(shuffled_players):
-                            player_id = shuffled_players[player_idx]
-                            
-                            try:
-                                session.run(transaction_query, {
-                                    "from_identifier": player_id,
-                                    "to_identifier": pooling_id,
-                                    "amount": random.randint(500000, 2000000),  # 500k - 2M IDR
-                                    "timestamp": (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat(),
-                                    "reference": f"PLY{random.randint(100000, 999999)}"
-                                })
-                                transaction_count += 1
-                                logger.debug(f"Player {player_id} → Pooling {pooling_id}")
-                            except Exception as e:
-                                logger.debug(f"Player→Pooling transaction failed: {e}")
-                            
-                            player_idx += 1
-                
-                # Handle remaining players (distribute them randomly to pooling accounts)
-                while player_idx < len(shuffled_players):
-                    pooling_target = random.choice(pooling_account_ids)
-                    player_id = shuffled_players[player_idx]
-                    
-                    try:
-                        session.run(transaction_query, {
-                            "from_identifier": player_id,
-                            "to_identifier": pooling_target,
-                            "amount": random.randint(500000, 2000000),
-                            "timestamp": (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat(),
-                            "reference": f"PLY{random.randint(100000, 999999)}"
-                        })
-                        transaction_count += 1
-                        logger.debug(f"Remaining Player {player_id} → Pooling {pooling_target}")
-                    except Exception as e:
-                        logger.debug(f"Remaining Player→Pooling transaction failed: {e}")
-                    
-                    player_idx += 1
-                
-                # 2. Pooling Accounts → Layer-2 Account
-                logger.info("🏦 Creating Pooling → Layer-2 transfers...")
-                for pooling_id in pooling_account_ids:
-                    # Special query for QRIS to Layer-2
-                    qris_to_layer2_query = """
-                    MATCH (from_entity:QRIS {qris_id: $from_identifier, is_test_data: true})
-                    MATCH (to_entity:AkunMencurigakan {nomor_rekening: $to_identifier, is_test_data: true})
-                    CREATE (from_entity)-[t:TRANSFERS_TO {
-                        amount: $amount,
-                        timestamp: $timestamp,
-                        reference: $reference,
-                        is_test_data: true
-                    }]->(to_entity)
-                    """
-                    
+                try:
+                    # Try regular transaction query first
+                    self.write_query(transaction_query, {
+                        "from_identifier": pooling_id,
+                        "to_identifier": layer2_account_id,
+                        "amount": random.randint(2000000, 10000000),  # 2M - 10M IDR
+                        "timestamp": (datetime.now() - timedelta(days=random.randint(1, 15))).isoformat(),
+                        "reference": f"AGG{random.randint(100000, 999999)}"
+                    }, name="seed_test_data")
+                    transaction_count += 1
+                    logger.debug(f"Pooling {pooling_id} → Layer-2 {layer2_account_id}")
+                except Exception:
+                    # If that fails, try QRIS-specific query
                     try:
-                        # Try regular transaction query first
-                        session.run(transaction_query, {
+                        self.write_query(qris_to_layer2_query, {
                             "from_identifier": pooling_id,
                             "to_identifier": layer2_account_id,
-                            "amount": random.randint(2000000, 10000000),  # 2M - 10M IDR
+                            "amount": random.randint(2000000, 10000000),
                             "timestamp": (datetime.now() - timedelta(days=random.randint(1, 15))).isoformat(),
                             "reference": f"AGG{random.randint(100000, 999999)}"
-                        })
+                        }, name="seed_test_data")
                         transaction_count += 1
-                        logger.debug(f"Pooling {pooling_id} → Layer-2 {layer2_account_id}")
-                    except Exception:
-                        # If that fails, try QRIS-specific query
-                        try:
-                            session.run(qris_to_layer2_query, {
-                                "from_identifier": pooling_id,
-                                "to_identifier": layer2_account_id,
-                                "amount": random.randint(2000000, 10000000),
-                                "timestamp": (datetime.now() - timedelta(days=random.randint(1, 15))).isoformat(),
-                                "reference": f"AGG{random.randint(100000, 999999)}"
-                            })
-                            transaction_count += 1
-                            logger.debug(f"QRIS Pooling {pooling_id} → Layer-2 {layer2_account_id}")
-                        except Exception as e:
-                            logger.debug(f"Pooling→Layer2 transaction failed: {e}")
-                
-                logger.info(f"✅ Created {transaction_count} transaction relationships in hierarchy")
-                
-                # Get final counts
-                count_query = """
-                MATCH (n) 
-                WHERE n.is_test_data = true
-                RETURN labels(n)[0] as label, count(n) as count
-                """
-                
-                result = session.run(count_query)
-                counts = {record["label"]: record["count"] for record in result}
-                
-                # Count relationships
-                rel_count_query = """
-                MATCH ()-[r]->() 
-                WHERE r.is_test_data = true
-                RETURN type(r) as rel_type, count(r) as count
-                """
-                
-                rel_result = session.run(rel_count_query)
-                rel_counts = {record["rel_type"]: record["count"] for record in rel_result}
-                
-                # Get account distribution per website
-                account_distribution_query = """
-                MATCH (site:SitusJudi)-[]->(account {is_test_data: true})
-                WHERE account.cluster_id STARTS WITH 'website_'
-                RETURN site.url as website, site.name as site_name, 
-                       labels(account)[0] as account_type, 
-                       CASE 
-                           WHEN account:AkunMencurigakan THEN account.nama_bank
-                           WHEN account:EWallet THEN account.wallet_type
-                           WHEN account:QRIS THEN 'QRIS'
-                           ELSE 'Unknown'
-                       END as account_subtype,
-                       count(account) as count
-                ORDER BY website, account_type
-                """
-                
-                dist_result = session.run(account_distribution_query)
-                account_distribution = [dict(record) for record in dist_result]
-                
-                logger.info("🎬 Real website data seeding completed successfully!")
-                logger.info(f"📊 Created nodes: {counts}")
-                logger.info(f"🔗 Created relationships: {rel_counts}")
-                logger.info(f"💸 Total transactions created: {transaction_count}")
-                logger.info(f"🎮 Player accounts: {len(player_account_ids)}")
-                logger.info(f"🏦 Pooling accounts: {len(pooling_account_ids)} ({total_pooling_accounts} total)")
-                logger.info(f"🔝 Layer-2 account: {layer2_account_id}")
-                logger.info(f"🏛️ Account distribution: {account_distribution}")
-                
-                return {
-                    "success": True,
-                    "nodes_created": counts,
-                    "relationships_created": rel_counts,
-                    "total_nodes": sum(counts.values()),
-                    "total_transactions": transaction_count,
-                    "gambling_sites": len(gambling_websites),
-                    "network_structure": {
-                        "player_accounts": len(player_account_ids),
-                        "pooling_accounts": len(pooling_account_ids),
-                        "layer2_account": 1,
-                        "hierarchy": "Players (3-5 per pooling) → Real Pooling Accounts → Layer-2 Account"
-                    },
-                    "real_website_data": {
-                        "cina18_accounts": len(gambling_websites[0]["accounts"]),
-                        "maxwin29_accounts": len(gambling_websites[1]["accounts"]),
-                        "kaiko30_accounts": len(gambling_websites[2]["accounts"]),
-                        "account_distribution": account_distribution
+                        logger.debug(f"QRIS Pooling {pooling_id} → Layer-2 {layer2_account_id}")
+                    except Exception as e:
+                        logger.debug(f"Pooling→Layer2 transaction failed: {e}")
+            
+            logger.info(f"✅ Created {transaction_count} transaction relationships in hierarchy")
+            
+            # Get final counts
+            count_query = """
+            MATCH (n) 
+            WHERE n.is_test_data = true
+            RETURN labels(n)[0] as label, count(n) as count
+            """
+            
+            result = self.read_query(count_query, name="seed_test_data")
+            counts = {record["label"]: record["count"] for record in result}
+            
+            # Count relationships
+            rel_count_query = """
+            MATCH ()-[r]->() 
+            WHERE r.is_test_data = true
+            RETURN type(r) as rel_type, count(r) as count
+            """
+            
+            rel_result = self.read_query(rel_count_query, name="seed_test_data")
+            rel_counts = {record["rel_type"]: record["count"] for record in rel_result}
+            
+            # Get account distribution per website
+            account_distribution_query = """
+            MATCH (site:SitusJudi)-[]->(account {is_test_data: true})
+            WHERE account.cluster_id STARTS WITH 'website_'
+            RETURN site.url as website, site.name as site_name, 
+                   labels(account)[0] as account_type, 
+                   CASE 
+                       WHEN account:AkunMencurigakan THEN account.nama_bank
+                       WHEN account:EWallet THEN account.wallet_type
+                       WHEN account:QRIS THEN 'QRIS'
+                       ELSE 'Unknown'
+                   END as account_subtype,
+                   count(account) as count
+            ORDER BY website, account_type
+            """
+            
+            dist_result = self.read_query(account_distribution_query, name="seed_test_data")
+            account_distribution = [dict(record) for record in dist_result]
+            
+            logger.info("🎬 Real website data seeding completed successfully!")
+            logger.info(f"📊 Created nodes: {counts}")
+            logger.info(f"🔗 Created relationships: {rel_counts}")
+            logger.info(f"💸 Total transactions created: {transaction_count}")
+            logger.info(f"🎮 Player accounts: {len(player_account_ids)}")
+            logger.info(f"🏦 Pooling accounts: {len(pooling_account_ids)} ({total_pooling_accounts} total)")
+            logger.info(f"🔝 Layer-2 account: {layer2_account_id}")
+            logger.info(f"🏛️ Account distribution: {account_distribution}")
+            
+            return {
+                "success": True,
+                "nodes_created": counts,
+                "relationships_created": rel_counts,
+                "total_nodes": sum(counts.values()),
+                "total_transactions": transaction_count,
+                "gambling_sites": len(gambling_websites),
+                "network_structure": {
+                    "player_accounts": len(player_account_ids),
+                    "pooling_accounts": len(pooling_account_ids),
+                    "layer2_account": 1,
+                    "hierarchy": "Players (3-5 per pooling) → Real Pooling Accounts → Layer-2 Account"
+                },
+                "real_website_data": {
+                    "cina18_accounts": len(gambling_websites[0]["accounts"]),
+                    "maxwin29_accounts": len(gambling_websites[1]["accounts"]),
+                    "kaiko30_accounts": len(gambling_websites[2]["accounts"]),
+                    "account_distribution": account_distribution
+                },
+                "demo_features": {
+                    "player_accounts": player_account_ids,
+                    "pooling_accounts": pooling_account_ids,
+                    "layer2_account": layer2_account_id,
+                    "oss_keys_used": demo_oss_keys,
+                    "transaction_rules": {
+                        "player_to_pooling": "3-5 players transfer to each pooling account",
+                        "pooling_to_layer2": "Each pooling account transfers only to the single layer-2 account",
+                        "player_distribution": "Players can connect to multiple pooling accounts"
                     },
-                    "demo_features": {
-                        "player_accounts": player_account_ids,
-                        "pooling_accounts": pooling_account_ids,
-                        "layer2_account": layer2_account_id,
-                        "oss_keys_used": demo_oss_keys,
-                        "transaction_rules": {
-                            "player_to_pooling": "3-5 players transfer to each pooling account",
-                            "pooling_to_layer2": "Each pooling account transfers only to the single layer-2 account",
-                            "player_distribution": "Players can connect to multiple pooling accounts"
-                        },
-                        "money_flow": "Players (3-5:1) → Real Pooling Accounts (N:1) → Layer-2 Account"
-                    }
+                    "money_flow": "Players (3-5:1) → Real Pooling Accounts (N:1) → Layer-2 Account"
                 }
-                
+            }
+            
         except Exception as e:
             logger.error(f"❌ Failed to seed demo database: {e}")
             import traceback
@@ -1018,17 +1175,16 @@ class Neo4jHandler:
         logger.info("🧹 Clearing all test data...")
         
         try:
-            with self.driver.session() as session:
-                clear_query = """
-                MATCH (n)
-                WHERE n.is_test_data = true
-                DETACH DELETE n
-                """
-                
-                result = session.run(clear_query)
-                logger.info("✅ Test data cleared successfully")
-                return True
-                
+            clear_query = """
+            MATCH (n)
+            WHERE n.is_test_data = true
+            DETACH DELETE n
+            """
+            
+            self.write_query(clear_query, name="clear_test_data")
+            logger.info("✅ Test data cleared successfully")
+            return True
+            
         except Exception as e:
             logger.error(f"❌ Failed to clear test data: {e}")
             return False
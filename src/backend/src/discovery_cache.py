@@ -0,0 +1,57 @@
+import os
+import json
+import time
+import logging
+from typing import List, Optional
+
+from .database import extract_domain
+from .redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+class DiscoveryCache:
+    """
+    Redis cache of payment-discovery results keyed by normalized site domain.
+
+    A site's supported banks rarely change, so re-crawls of a known domain can
+    skip the discovery agent while the entry is younger than the TTL.
+    """
+
+    def __init__(self, ttl_seconds: int = 7 * 24 * 3600, prefix: str = "discovery"):
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _key(self, url: str) -> str:
+        return f"{self.prefix}:{extract_domain(url)}"
+
+    async def get(self, url: str) -> Optional[List[str]]:
+        if not self.enabled:
+            return None
+        try:
+            raw = await get_async_redis().get(self._key(url))
+            if not raw:
+                return None
+            entry = json.loads(raw)
+            return entry.get("payment_methods") or None
+        except Exception as e:
+            logger.warning(f"⚠️ [DISCOVERY-CACHE] Gagal membaca cache untuk {url}: {e}")
+            return None
+
+    async def set(self, url: str, payment_methods: List[str]):
+        if not self.enabled or not payment_methods:
+            return
+        entry = {"payment_methods": list(payment_methods), "cached_at": time.time()}
+        try:
+            await get_async_redis().set(self._key(url), json.dumps(entry), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"⚠️ [DISCOVERY-CACHE] Gagal menyimpan cache untuk {url}: {e}")
+
+
+discovery_cache = DiscoveryCache(
+    ttl_seconds=int(os.environ.get("DISCOVERY_CACHE_TTL", 7 * 24 * 3600))
+)
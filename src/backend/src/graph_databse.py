@@ -106,16 +106,15 @@ class GraphDatabaseHandler:
         """
         
         try:
-            with self.db.driver.session() as session:
-                result = session.run(query, {"entity_id": entity_id})
-                record = result.single()
-                if record:
-                    return {
-                        "connections": record["connections"] or 0,
-                        "transactions": record["transactions"] or 0, 
-                        "total_amount": record["total_amount"] or 0.0
-                    }
-                return {"connections": 0, "transactions": 0, "total_amount": 0.0}
+            records = self.db.read_query(query, {"entity_id": entity_id}, name="calculate_aggregated_fields")
+            if records:
+                record = records[0]
+                return {
+                    "connections": record["connections"] or 0,
+                    "transactions": record["transactions"] or 0, 
+                    "total_amount": record["total_amount"] or 0.0
+                }
+            return {"connections": 0, "transactions": 0, "total_amount": 0.0}
         except Exception as e:
             logger.error(f"Error calculating aggregated fields: {e}")
             return {"connections": 0, "transactions": 0, "total_amount": 0.0}
@@ -226,78 +225,77 @@ class GraphDatabaseHandler:
         transactions = []
         
         try:
-            with self.db.driver.session() as session:
-                # Get clustered entities
-                result = session.run(clustered_query, params)
-                for record in result:
-                    entities = []
-                    for entity_node in record["entities"]:
-                        entity_record = {"entity": entity_node}
-                        entities.append(self._node_to_entity(entity_record))
-                    
-                    if entities:  # Only add clusters with entities
-                        clusters.append(WebsiteCluster(
-                            website_url=record["website_url"],
-                            website_name=record["website_name"] or "Unknown Site",
-                            entities=entities
-                        ))
-                
-                # Get standalone entities
-                result = session.run(standalone_query, params)
-                for record in result:
-                    standalone_entities.append(self._node_to_entity(record))
-                
-                # Get all TRANSFERS_TO relationships between entities in our filtered dataset
-                all_entity_ids = []
-                for cluster in clusters:
-                    all_entity_ids.extend([entity.id for entity in cluster.entities])
-                all_entity_ids.extend([entity.id for entity in standalone_entities])
-                
-                if all_entity_ids:
-                    # Query for all TRANSFERS_TO relationships between our entities
-                    transaction_query = """
-                    MATCH (from_entity)-[t:TRANSFERS_TO]->(to_entity)
-                    WHERE elementId(from_entity) IN $entity_ids 
-                    AND elementId(to_entity) IN $entity_ids
-                    RETURN elementId(from_entity) as from_id,
-                           elementId(to_entity) as to_id,
-                           t.amount as amount,
-                           t.timestamp as timestamp,
-                           t.reference as reference
-                    ORDER BY t.timestamp DESC
-                    """
-                    
-                    tx_result = session.run(transaction_query, {"entity_ids": all_entity_ids})
-                    for tx_record in tx_result:
-                        transactions.append(Transaction(
-                            from_node=tx_record["from_id"],
-                            to_node=tx_record["to_id"],
-                            amount=tx_record["amount"] or 0.0,
-                            timestamp=tx_record["timestamp"] or datetime.now().isoformat(),
-                            transaction_type="transfer",  # Default type since we removed explicit types
-                            reference=tx_record["reference"],
-                            direction=TransactionDirection.OUTGOING  # Default, will be corrected in frontend
-                        ))
-                
-                # Calculate totals
-                total_entities = sum(len(cluster.entities) for cluster in clusters) + len(standalone_entities)
-                
-                # Get total transaction count - handle case where no TRANSFERS_TO relationships exist
-                try:
-                    total_tx_query = "MATCH ()-[r:TRANSFERS_TO]->() RETURN count(r) as total_transactions"
-                    tx_result = session.run(total_tx_query)
-                    total_transactions = tx_result.single()["total_transactions"] or 0
-                except Exception:
-                    total_transactions = 0
+            # Get clustered entities
+            result = self.db.read_query(clustered_query, params, name="get_whole_graph")
+            for record in result:
+                entities = []
+                for entity_node in record["entities"]:
+                    entity_record = {"entity": entity_node}
+                    entities.append(self._node_to_entity(entity_record))
                 
-                return GraphResponse(
-                    clusters=clusters,
-                    standalone_entities=standalone_entities,
-                    transactions=transactions,
-                    total_entities=total_entities,
-                    total_transactions=total_transactions
-                )
+                if entities:  # Only add clusters with entities
+                    clusters.append(WebsiteCluster(
+                        website_url=record["website_url"],
+                        website_name=record["website_name"] or "Unknown Site",
+                        entities=entities
+                    ))
+            
+            # Get standalone entities
+            result = self.db.read_query(standalone_query, params, name="get_whole_graph")
+            for record in result:
+                standalone_entities.append(self._node_to_entity(record))
+            
+            # Get all TRANSFERS_TO relationships between entities in our filtered dataset
+            all_entity_ids = []
+            for cluster in clusters:
+                all_entity_ids.extend([entity.id for entity in cluster.entities])
+            all_entity_ids.extend([entity.id for entity in standalone_entities])
+            
+            if all_entity_ids:
+                # Query for all TRANSFERS_TO relationships between our entities
+                transaction_query = """
+                MATCH (from_entity)-[t:TRANSFERS_TO]->(to_entity)
+                WHERE elementId(from_entity) IN $entity_ids 
+                AND elementId(to_entity) IN $entity_ids
+                RETURN elementId(from_entity) as from_id,
+                       elementId(to_entity) as to_id,
+                       t.amount as amount,
+                       t.timestamp as timestamp,
+                       t.reference as reference
+                ORDER BY t.timestamp DESC
+                """
                 
+                tx_result = self.db.read_query(transaction_query, {"entity_ids": all_entity_ids}, name="get_whole_graph")
+                for tx_record in tx_result:
+                    transactions.append(Transaction(
+                        from_node=tx_record["from_id"],
+                        to_node=tx_record["to_id"],
+                        amount=tx_record["amount"] or 0.0,
+                        timestamp=tx_record["timestamp"] or datetime.now().isoformat(),
+                        transaction_type="transfer",  # Default type since we removed explicit types
+                        reference=tx_record["reference"],
+                        direction=TransactionDirection.OUTGOING  # Default, will be corrected in frontend
+                    ))
+            
+            # Calculate totals
+            total_entities = sum(len(cluster.entities) for cluster in clusters) + len(standalone_entities)
+            
+            # Get total transaction count - handle case where no TRANSFERS_TO relationships exist
+            try:
+                total_tx_query = "MATCH ()-[r:TRANSFERS_TO]->() RETURN count(r) as total_transactions"
+                tx_result = self.db.read_query(total_tx_query, name="get_whole_graph")
+                total_transactions = tx_result[0]["total_transactions"] or 0
+            except Exception:
+                total_transactions = 0
+            
+            return GraphResponse(
+                clusters=clusters,
+                standalone_entities=standalone_entities,
+                transactions=transactions,
+                total_entities=total_entities,
+                total_transactions=total_transactions
+            )
+            
         except Exception as e:
             logger.error(f"Error getting whole graph: {e}")
             return GraphResponse(clusters=[], standalone_entities=[], transactions=[], total_entities=0, total_transactions=0)
@@ -334,57 +332,56 @@ class GraphDatabaseHandler:
         """
         
         try:
-            with self.db.driver.session() as session:
-                result = session.run(query, {"node_id": node_id})
-                record = result.single()
-                
-                if not record or not record["entity"]:
-                    return None
-                
-                entity = self._node_to_entity(record)
-                
-                # Process transactions
-                incoming_transactions = []
-                for tx in record["incoming"]:
-                    if tx["source"]:  # Filter out null sources
-                        incoming_transactions.append(Transaction(
-                            from_node=str(tx["source"].element_id),
-                            to_node=node_id,
-                            amount=tx["amount"] or 0.0,
-                            timestamp=tx["timestamp"] or datetime.now().isoformat(),
-                            transaction_type="transfer",  # Default type since we removed explicit types
-                            reference=tx["reference"],
-                            direction=TransactionDirection.INCOMING
-                        ))
-                
-                outgoing_transactions = []
-                for tx in record["outgoing"]:
-                    if tx["target"]:  # Filter out null targets
-                        outgoing_transactions.append(Transaction(
-                            from_node=node_id,
-                            to_node=str(tx["target"].element_id),
-                            amount=tx["amount"] or 0.0,
-                            timestamp=tx["timestamp"] or datetime.now().isoformat(),
-                            transaction_type="transfer",  # Default type since we removed explicit types
-                            reference=tx["reference"],
-                            direction=TransactionDirection.OUTGOING
-                        ))
-                
-                # Process connected entities
-                connected_entities = []
-                for connected_node in record["connected"]:
-                    if connected_node:  # Filter out null nodes
-                        connected_record = {"entity": connected_node}
-                        connected_entities.append(self._node_to_entity(connected_record, calculate_aggregates=False))
-                
-                return NodeDetailResponse(
-                    entity=entity,
-                    incoming_transactions=incoming_transactions,
-                    outgoing_transactions=outgoing_transactions,
-                    connected_entities=connected_entities,
-                    gambling_sites=record["gambling_sites"] or []
-                )
-                
+            records = self.db.read_query(query, {"node_id": node_id}, name="get_node_detail")
+            record = records[0] if records else None
+            
+            if not record or not record["entity"]:
+                return None
+            
+            entity = self._node_to_entity(record)
+            
+            # Process transactions
+            incoming_transactions = []
+            for tx in record["incoming"]:
+                if tx["source"]:  # Filter out null sources
+                    incoming_transactions.append(Transaction(
+                        from_node=str(tx["source"].element_id),
+                        to_node=node_id,
+                        amount=tx["amount"] or 0.0,
+                        timestamp=tx["timestamp"] or datetime.now().isoformat(),
+                        transaction_type="transfer",  # Default type since we removed explicit types
+                        reference=tx["reference"],
+                        direction=TransactionDirection.INCOMING
+                    ))
+            
+            outgoing_transactions = []
+            for tx in record["outgoing"]:
+                if tx["target"]:  # Filter out null targets
+                    outgoing_transactions.append(Transaction(
+                        from_node=node_id,
+                        to_node=str(tx["target"].element_id),
+                        amount=tx["amount"] or 0.0,
+                        timestamp=tx["timestamp"] or datetime.now().isoformat(),
+                        transaction_type="transfer",  # Default type since we removed explicit types
+                        reference=tx["reference"],
+                        direction=TransactionDirection.OUTGOING
+                    ))
+            
+            # Process connected entities
+            connected_entities = []
+            for connected_node in record["connected"]:
+                if connected_node:  # Filter out null nodes
+                    connected_record = {"entity": connected_node}
+                    connected_entities.append(self._node_to_entity(connected_record, calculate_aggregates=False))
+            
+            return NodeDetailResponse(
+                entity=entity,
+                incoming_transactions=incoming_transactions,
+                outgoing_transactions=outgoing_transactions,
+                connected_entities=connected_entities,
+                gambling_sites=record["gambling_sites"] or []
+            )
+            
         except Exception as e:
             logger.error(f"Error getting node detail: {e}")
             return None
@@ -437,23 +434,22 @@ class GraphDatabaseHandler:
         """
         
         try:
-            with self.db.driver.session() as session:
-                result = session.run(query, {**properties, "identifier": node_data.identifier})
-                record = result.single()
+            records = self.db.write_query(query, {**properties, "identifier": node_data.identifier}, name="create_or_update_node")
+            record = records[0] if records else None
+            
+            if record:
+                node_record = {"entity": record["n"]}
+                entity = self._node_to_entity(node_record)
+                
+                return {
+                    "success": True,
+                    "id": entity.id,
+                    "entity": entity,
+                    "created": record["was_created"]
+                }
+            else:
+                return {"success": False, "error": "Failed to create/update node"}
                 
-                if record:
-                    node_record = {"entity": record["n"]}
-                    entity = self._node_to_entity(node_record)
-                    
-                    return {
-                        "success": True,
-                        "id": entity.id,
-                        "entity": entity,
-                        "created": record["was_created"]
-                    }
-                else:
-                    return {"success": False, "error": "Failed to create/update node"}
-                    
         except Exception as e:
             logger.error(f"Error creating/updating node: {e}")
             return {"success": False, "error": str(e)}
@@ -492,39 +488,38 @@ class GraphDatabaseHandler:
         timestamp = transaction_data.timestamp or datetime.now()
         
         try:
-            with self.db.driver.session() as session:
-                result = session.run(query, {
-                    "from_identifier": transaction_data.from_identifier,
-                    "to_identifier": transaction_data.to_identifier,
-                    "amount": transaction_data.amount,
-                    "timestamp": timestamp.isoformat(),
-                    "reference": transaction_data.reference
-                })
+            records = self.db.write_query(query, {
+                "from_identifier": transaction_data.from_identifier,
+                "to_identifier": transaction_data.to_identifier,
+                "amount": transaction_data.amount,
+                "timestamp": timestamp.isoformat(),
+                "reference": transaction_data.reference
+            }, name="create_transaction")
+            
+            record = records[0] if records else None
+            if record:
+                from_entity = self._node_to_entity({"entity": record["from_entity"]})
+                to_entity = self._node_to_entity({"entity": record["to_entity"]})
+                
+                transaction = Transaction(
+                    from_node=from_entity.id,
+                    to_node=to_entity.id,
+                    amount=transaction_data.amount,
+                    timestamp=timestamp.isoformat(),
+                    transaction_type="transfer",  # Default type since we removed explicit types
+                    reference=transaction_data.reference,
+                    direction=TransactionDirection.OUTGOING
+                )
+                
+                return {
+                    "success": True,
+                    "from_entity": from_entity,
+                    "to_entity": to_entity,
+                    "transaction": transaction
+                }
+            else:
+                return {"success": False, "error": "Could not find both entities"}
                 
-                record = result.single()
-                if record:
-                    from_entity = self._node_to_entity({"entity": record["from_entity"]})
-                    to_entity = self._node_to_entity({"entity": record["to_entity"]})
-                    
-                    transaction = Transaction(
-                        from_node=from_entity.id,
-                        to_node=to_entity.id,
-                        amount=transaction_data.amount,
-                        timestamp=timestamp.isoformat(),
-                        transaction_type="transfer",  # Default type since we removed explicit types
-                        reference=transaction_data.reference,
-                        direction=TransactionDirection.OUTGOING
-                    )
-                    
-                    return {
-                        "success": True,
-                        "from_entity": from_entity,
-                        "to_entity": to_entity,
-                        "transaction": transaction
-                    }
-                else:
-                    return {"success": False, "error": "Could not find both entities"}
-                    
         except Exception as e:
             logger.error(f"Error creating transaction: {e}")
             return {"success": False, "error": str(e)}
@@ -1,15 +1,16 @@
 from ast import List
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Response
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from celery.result import AsyncResult
 from datetime import datetime
 import logging
 from contextlib import asynccontextmanager
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from weasyprint import HTML, CSS
 from .storage import storage_manager
 from jinja2 import Environment, FileSystemLoader
@@ -31,12 +32,20 @@ from .worker import (
     celery
 )
 from .database import db_handler
+from .metrics import metrics_recorder
+from .checkpoint_store import checkpoint_store
+from .task_events import task_events
+from .task_registry import STATUSES, KINDS, task_registry
+from .worker_warmup import worker_warmup
+from .redis_client import get_redis, get_redis_url
 from .schema import (
     SitusJudiRequest,
     MultipleSitusRequest,
     ReportRequest,
     TaskResponse, 
     TaskStatus,
+    TaskStatusBatchRequest,
+    TaskStatusBatchResponse,
     TaskListResponse,
     TaskInfo,
     DaftarAkunResponse,
@@ -63,21 +72,19 @@ async def lifespan(app: FastAPI):
         logger.info("🌱 AUTO_SEED enabled - checking if database needs seeding...")
         
         # Check if test data already exists
-        with db_handler.driver.session() as session:
-            check_query = "MATCH (n {is_test_data: true}) RETURN count(n) as count"
-            result = session.run(check_query)
-            existing_test_nodes = result.single()["count"]
+        check_query = "MATCH (n {is_test_data: true}) RETURN count(n) as count"
+        existing_test_nodes = db_handler.read_query(check_query, name="auto_seed_check")[0]["count"]
+        
+        if existing_test_nodes == 0:
+            logger.info("🌱 Database appears empty, auto-seeding with test data...")
+            seed_result = db_handler.seed_test_data(100)
             
-            if existing_test_nodes == 0:
-                logger.info("🌱 Database appears empty, auto-seeding with test data...")
-                seed_result = db_handler.seed_test_data(100)
-                
-                if seed_result["success"]:
-                    logger.info(f"✅ Auto-seeding completed: {seed_result['total_nodes']} nodes created")
-                else:
-                    logger.warning(f"⚠️  Auto-seeding failed: {seed_result.get('error', 'Unknown error')}")
+            if seed_result["success"]:
+                logger.info(f"✅ Auto-seeding completed: {seed_result['total_nodes']} nodes created")
             else:
-                logger.info(f"🌱 Found {existing_test_nodes} existing test nodes, skipping auto-seed")
+                logger.warning(f"⚠️  Auto-seeding failed: {seed_result.get('error', 'Unknown error')}")
+        else:
+            logger.info(f"🌱 Found {existing_test_nodes} existing test nodes, skipping auto-seed")
     
     if connection_success:
         try:
@@ -87,11 +94,13 @@ async def lifespan(app: FastAPI):
             logger.error(f"Failed to create indexes: {e}")
     else:
         logger.warning("Failed to connect to database during startup. Application will run in degraded mode.")
+    # Keeps db_handler's cached connectivity fresh (and notices recovery after a failed startup connect)
+    db_handler.start_prober()
     
     yield
     
     try:
-        if db_handler.connected:
+        if db_handler.driver:
             db_handler.close()
             logger.info("Database connection closed")
     except Exception as e:
@@ -158,10 +167,22 @@ async def options_graph_transactions():
 async def options_graph_stats():
     return Response(status_code=200)
 
+def _crawl_options(request) -> dict:
+    """Per-task crawl options forwarded to the worker (unset fields fall back to worker defaults)"""
+    options = {}
+    if request.crawl_mode:
+        options["crawl_mode"] = request.crawl_mode.value
+    if request.force_refresh:
+        options["force_refresh"] = True
+    if request.parallel_identities is not None:
+        options["parallel_identities"] = request.parallel_identities
+    return options
+
 @app.post("/situs-judi/cari-rekening", response_model=TaskResponse)
 async def cari_rekening_situs(request: SitusJudiRequest):
     try:
-        task = cari_rekening_mencurigakan.delay(str(request.url))
+        task = cari_rekening_mencurigakan.delay(str(request.url), _crawl_options(request))
+        task_registry.record(task.id, 'PENDING', kind='single', urls=[str(request.url)], options=_crawl_options(request))
         logger.info(f"Mulai pencarian rekening untuk URL: {request.url} (Task ID: {task.id})")
         return TaskResponse(task_id=task.id)
     except Exception as e:
@@ -172,7 +193,8 @@ async def cari_rekening_situs(request: SitusJudiRequest):
 async def cari_rekening_batch(request: MultipleSitusRequest):
     try:
         urls = [str(url) for url in request.urls]
-        task = cari_multiple_situs.delay(urls)
+        task = cari_multiple_situs.delay(urls, _crawl_options(request))
+        task_registry.record(task.id, 'PENDING', kind='batch', urls=urls, options=_crawl_options(request))
         logger.info(f"Mulai batch processing untuk {len(urls)} URL (Task ID: {task.id})")
         return TaskResponse(task_id=task.id)
     except Exception as e:
@@ -181,42 +203,45 @@ async def cari_rekening_batch(request: MultipleSitusRequest):
 
 @app.post("/tasks/{task_id}/retry", response_model=TaskResponse)
 async def retry_failed_task(task_id: str):
-    """Retry a failed task by repushing it to Redis"""
+    """Retry a task from its checkpoint, resuming after the last completed phase"""
     try:
-        # Get original task result
         task_result = AsyncResult(task_id, app=celery)
-        
-        if task_result.state != 'FAILURE':
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Task {task_id} is not in FAILURE state. Current state: {task_result.state}"
-            )
-        
-        # Get task info to determine if it was single or batch processing
-        task_info = task_result.info
-        
-        # Check if we can get original arguments from task
-        task_name = task_result.name
-        
-        if task_name == 'cari_rekening_mencurigakan':
-            # For single site, we need the URL - this would need to be stored somewhere
-            # For now, return error asking for manual resubmission
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot automatically retry single site tasks. Please resubmit the original URL."
-            )
-        elif task_name == 'cari_multiple_situs':
-            # For batch, same issue - we'd need the original URLs
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot automatically retry batch tasks. Please resubmit the original URLs."
-            )
-        else:
+        if task_result.state in ('STARTED', 'PROCESSING'):
             raise HTTPException(
                 status_code=400,
-                detail=f"Unknown task type: {task_name}"
+                detail=f"Task {task_id} is still running. Current state: {task_result.state}"
             )
-            
+        
+        checkpoint = checkpoint_store.load(task_id)
+        if checkpoint:
+            if checkpoint_store.reached(checkpoint, 'stored'):
+                raise HTTPException(status_code=400, detail=f"Task {task_id} sudah selesai dan tersimpan, tidak perlu retry")
+            task = cari_rekening_mencurigakan.delay(checkpoint['url'], checkpoint.get('options') or {}, resume_from=task_id)
+            task_registry.record(task.id, 'PENDING', kind='single', urls=[checkpoint['url']], options=checkpoint.get('options') or {}, retry_of=task_id)
+            logger.info(f"Retry task {task_id} dari checkpoint '{checkpoint.get('phase')}' (New Task ID: {task.id})")
+            return TaskResponse(task_id=task.id)
+        
+        batch = checkpoint_store.load_batch(task_id)
+        if batch:
+            # Only URLs that never reached the store step are resubmitted, each from its own checkpoint
+            pending = [
+                (url, item_id) for url, item_id in zip(batch['urls'], batch['item_ids'])
+                if not checkpoint_store.reached(checkpoint_store.load(item_id), 'stored')
+            ]
+            if not pending:
+                raise HTTPException(status_code=400, detail=f"Semua situs di batch {task_id} sudah tersimpan, tidak perlu retry")
+            urls, item_ids = zip(*pending)
+            task = cari_multiple_situs.delay(list(urls), batch.get('options') or {}, resume_from=list(item_ids))
+            task_registry.record(task.id, 'PENDING', kind='batch', urls=list(urls), options=batch.get('options') or {}, retry_of=task_id)
+            logger.info(f"Retry batch {task_id}: {len(urls)} situs dilanjutkan dari checkpoint (New Task ID: {task.id})")
+            return TaskResponse(task_id=task.id)
+        
+        raise HTTPException(
+            status_code=404,
+            detail=f"Tidak ada checkpoint untuk task {task_id}. Please resubmit the original URL."
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrying task {task_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Gagal retry task: {str(e)}")
@@ -225,7 +250,8 @@ async def retry_failed_task(task_id: str):
 async def retry_url_processing(request: SitusJudiRequest):
     """Retry processing for a specific URL (manual retry)"""
     try:
-        task = cari_rekening_mencurigakan.delay(str(request.url))
+        task = cari_rekening_mencurigakan.delay(str(request.url), _crawl_options(request))
+        task_registry.record(task.id, 'PENDING', kind='single', urls=[str(request.url)], options=_crawl_options(request))
         logger.info(f"Retry pencarian rekening untuk URL: {request.url} (New Task ID: {task.id})")
         return TaskResponse(task_id=task.id)
     except Exception as e:
@@ -237,7 +263,8 @@ async def retry_batch_processing(request: MultipleSitusRequest):
     """Retry batch processing for multiple URLs (manual retry)"""
     try:
         urls = [str(url) for url in request.urls]
-        task = cari_multiple_situs.delay(urls)
+        task = cari_multiple_situs.delay(urls, _crawl_options(request))
+        task_registry.record(task.id, 'PENDING', kind='batch', urls=urls, options=_crawl_options(request))
         logger.info(f"Retry batch processing untuk {len(urls)} URL (New Task ID: {task.id})")
         return TaskResponse(task_id=task.id)
     except Exception as e:
@@ -245,56 +272,34 @@ async def retry_batch_processing(request: MultipleSitusRequest):
         raise HTTPException(status_code=500, detail=f"Gagal retry batch processing: {str(e)}")
 
 @app.get("/tasks", response_model=TaskListResponse)
-async def get_all_tasks():
-    """Get all tasks from Celery with their current status"""
+async def get_all_tasks(
+    status: Optional[str] = Query(None, description="Filter status (PENDING, STARTED, PROCESSING, SUCCESS, FAILURE, ...)"),
+    kind: Optional[str] = Query(None, description="Filter jenis task: single, batch atau batch_item"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """List tasks from the task registry, newest first (no worker broadcast, history kept after results expire)"""
+    if status and status.upper() not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"Status tidak valid: {status}. Pilihan: {', '.join(STATUSES)}")
+    if kind and kind not in KINDS:
+        raise HTTPException(status_code=400, detail=f"Jenis task tidak valid: {kind}. Pilihan: {', '.join(KINDS)}")
     try:
-        inspect = celery.control.inspect()
-        
-        # Get active, scheduled, and reserved tasks
-        active_tasks = inspect.active() or {}
-        scheduled_tasks = inspect.scheduled() or {}
-        reserved_tasks = inspect.reserved() or {}
-        
-        all_tasks = []
-        
-        # Process active tasks
-        for worker, tasks in active_tasks.items():
-            for task in tasks:
-                task_info = TaskInfo(
-                    task_id=task['id'],
-                    status='PROCESSING',
-                    result={'message': 'Task sedang diproses', 'worker': worker},
-                    created_at=task.get('time_start')
-                )
-                all_tasks.append(task_info)
-        
-        # Process scheduled tasks
-        for worker, tasks in scheduled_tasks.items():
-            for task in tasks:
-                task_info = TaskInfo(
-                    task_id=task['id'],
-                    status='SCHEDULED',
-                    result={'message': 'Task dijadwalkan', 'worker': worker},
-                    created_at=task.get('eta')
-                )
-                all_tasks.append(task_info)
-        
-        # Process reserved tasks  
-        for worker, tasks in reserved_tasks.items():
-            for task in tasks:
-                task_info = TaskInfo(
-                    task_id=task['id'],
-                    status='RESERVED',
-                    result={'message': 'Task direservasi', 'worker': worker},
-                    created_at=None
-                )
-                all_tasks.append(task_info)
-        
-        return TaskListResponse(
-            status="SUCCESS",
-            tasks=all_tasks,
-            total=len(all_tasks)
-        )
+        entries, total = task_registry.list_tasks(status.upper() if status else None, kind, offset, limit)
+        tasks = [
+            TaskInfo(
+                task_id=entry['task_id'],
+                status=entry.get('status', 'PENDING'),
+                result=entry.get('result'),
+                created_at=entry.get('created_at'),
+                updated_at=entry.get('updated_at'),
+                kind=entry.get('kind'),
+                urls=entry.get('urls'),
+                parent_id=entry.get('parent_id'),
+                retry_of=entry.get('retry_of')
+            )
+            for entry in entries
+        ]
+        return TaskListResponse(status="SUCCESS", tasks=tasks, total=total, offset=offset, limit=limit)
         
     except Exception as e:
         logger.error(f"Error getting all tasks: {e}")
@@ -304,46 +309,132 @@ async def get_all_tasks():
             total=0
         )
 
+def _task_status_payload(task_id: str) -> dict:
+    """Current task status in the GET /tasks/{task_id} shape, read from the Celery result backend"""
+    task_result = AsyncResult(task_id, app=celery)
+    
+    if task_result.state == 'PENDING':
+        return {
+            'task_id': task_id,
+            'status': 'PENDING',
+            'result': {'message': 'Task sedang menunggu diproses'}
+        }
+    elif task_result.state == 'PROCESSING':
+        return {
+            'task_id': task_id,
+            'status': 'PROCESSING',
+            'result': task_result.info
+        }
+    elif task_result.state == 'SUCCESS':
+        return {
+            'task_id': task_id,
+            'status': 'SUCCESS',
+            'result': task_result.result
+        }
+    elif task_result.state == 'FAILURE':
+        return {
+            'task_id': task_id,
+            'status': 'FAILURE',
+            'result': {
+                'error': str(task_result.info),
+                'traceback': task_result.traceback
+            }
+        }
+    return {
+        'task_id': task_id,
+        'status': task_result.state,
+        'result': task_result.info
+    }
+
+def _status_from_meta(task_id: str, meta: Optional[dict]) -> dict:
+    """GET /tasks/{task_id} shape from a raw result-backend meta (None when no state was stored yet)"""
+    if not meta:
+        return {'task_id': task_id, 'status': 'PENDING', 'result': {'message': 'Task sedang menunggu diproses'}}
+    state = meta.get('status')
+    if state == 'FAILURE':
+        try:
+            # Same decoding AsyncResult.info does, so both endpoints report the same error text
+            error = str(celery.backend.exception_to_python(meta.get('result')))
+        except Exception:
+            error = str(meta.get('result'))
+        return {
+            'task_id': task_id,
+            'status': 'FAILURE',
+            'result': {'error': error, 'traceback': meta.get('traceback')}
+        }
+    result = meta.get('result')
+    return {'task_id': task_id, 'status': state, 'result': result if isinstance(result, dict) or result is None else {'value': result}}
+
+@app.post("/tasks/status", response_model=TaskStatusBatchResponse)
+async def get_task_status_batch(request: TaskStatusBatchRequest):
+    """
+    Status of many tasks in one pipelined Redis round trip
+
+    Reads each task's result-backend meta together with its registry `updated_at`;
+    with `since`, only tasks that changed after that timestamp are returned.
+    """
+    try:
+        task_ids = list(dict.fromkeys(request.task_ids))
+        server_time = time.time()
+        backend = celery.backend
+        pipe = backend.client.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.get(backend.get_key_for_task(task_id))
+        # Registry shares the result-backend Redis by default; then its timestamps ride the same pipeline
+        shared = get_redis_url() == celery.conf.result_backend
+        registry_pipe = pipe if shared else get_redis().pipeline(transaction=False)
+        for task_id in task_ids:
+            registry_pipe.hget(task_registry.task_key(task_id), 'updated_at')
+        values = pipe.execute()
+        if shared:
+            metas, stamps = values[:len(task_ids)], values[len(task_ids):]
+        else:
+            metas, stamps = values, registry_pipe.execute()
+        
+        tasks = []
+        for task_id, raw_meta, stamp in zip(task_ids, metas, stamps):
+            updated_at = float(stamp) if stamp else None
+            if request.since is not None and updated_at is not None and updated_at <= request.since:
+                continue
+            meta = backend.decode_result(raw_meta) if raw_meta else None
+            tasks.append(TaskStatus(**_status_from_meta(task_id, meta), updated_at=updated_at))
+        return TaskStatusBatchResponse(tasks=tasks, server_time=server_time)
+    except Exception as e:
+        logger.error(f"Error getting batch task status: {e}")
+        raise HTTPException(status_code=500, detail=f"Gagal mendapatkan status task: {str(e)}")
+
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@app.get("/tasks/events")
+async def stream_all_task_events(request: Request):
+    """Server-Sent Events for every task: progress updates and final results as they are published"""
+    return StreamingResponse(
+        task_events.stream(is_disconnected=request.is_disconnected),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
+    )
+
+@app.get("/tasks/{task_id}/events")
+async def stream_task_events(task_id: str, request: Request):
+    """Server-Sent Events for one task: current status first, then each update until it finishes"""
+    def _initial():
+        try:
+            return _task_status_payload(task_id)
+        except Exception as e:
+            # The stream is already open; live events still follow
+            logger.error(f"Error getting task status for {task_id}: {e}")
+            return None
+    
+    return StreamingResponse(
+        task_events.stream(task_id, initial=_initial, is_disconnected=request.is_disconnected),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
+    )
+
 @app.get("/tasks/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str):
     try:
-        task_result = AsyncResult(task_id, app=celery)
-        
-        if task_result.state == 'PENDING':
-            response = {
-                'task_id': task_id,
-                'status': 'PENDING',
-                'result': {'message': 'Task sedang menunggu diproses'}
-            }
-        elif task_result.state == 'PROCESSING':
-            response = {
-                'task_id': task_id,
-                'status': 'PROCESSING',
-                'result': task_result.info
-            }
-        elif task_result.state == 'SUCCESS':
-            response = {
-                'task_id': task_id,
-                'status': 'SUCCESS',
-                'result': task_result.result
-            }
-        elif task_result.state == 'FAILURE':
-            response = {
-                'task_id': task_id,
-                'status': 'FAILURE',
-                'result': {
-                    'error': str(task_result.info),
-                    'traceback': task_result.traceback
-                }
-            }
-        else:
-            response = {
-                'task_id': task_id,
-                'status': task_result.state,
-                'result': task_result.info
-            }
-        
-        return TaskStatus(**response)
+        return TaskStatus(**_task_status_payload(task_id))
     except Exception as e:
         logger.error(f"Error getting task status for {task_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Gagal mendapatkan status task: {str(e)}")
@@ -545,6 +636,12 @@ async def health_check():
     except:
         pass
     
+    workers_ready = None
+    try:
+        workers_ready = len(worker_warmup.ready_workers())
+    except Exception:
+        pass
+    
     # Determine status based on both services
     if database_connected and celery_connected:
         status = "healthy"
@@ -557,9 +654,23 @@ async def health_check():
         status=status,
         timestamp=datetime.now().isoformat(),
         database_connected=database_connected,
-        celery_connected=celery_connected
+        celery_connected=celery_connected,
+        workers_ready=workers_ready
     )
 
+@app.get("/metrics/crawl")
+async def get_crawl_metrics():
+    """Phase wall times and agent/LLM counts aggregated over all crawls"""
+    try:
+        return {
+            "status": "success",
+            "timestamp": datetime.now().isoformat(),
+            **metrics_recorder.summary()
+        }
+    except Exception as e:
+        logger.error(f"Error getting crawl metrics: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve crawl metrics: {str(e)}")
+
 
 
 ## Buat graphs 
@@ -674,27 +785,26 @@ async def get_graph_statistics():
         ORDER BY entity_count DESC
         """
         
-        with db_handler.driver.session() as session:
-            result = session.run(stats_query)
-            stats = []
-            
-            for record in result:
-                stats.append({
-                    "entity_type": record["entity_type"],
-                    "entity_count": record["entity_count"],
-                    "transaction_count": record["transaction_count"],
-                    "avg_priority": round(record["avg_priority"], 2) if record["avg_priority"] else 0,
-                    "min_priority": record["min_priority"],
-                    "max_priority": record["max_priority"]
-                })
-            
-            return {
-                "status": "success",
-                "statistics": stats,
-                "total_entities": sum(s["entity_count"] for s in stats),
-                "total_transactions": sum(s["transaction_count"] for s in stats) // 2  # Divide by 2 since each transaction is counted twice
-            }
-            
+        result = db_handler.read_query(stats_query, name="entity_statistics")
+        stats = []
+        
+        for record in result:
+            stats.append({
+                "entity_type": record["entity_type"],
+                "entity_count": record["entity_count"],
+                "transaction_count": record["transaction_count"],
+                "avg_priority": round(record["avg_priority"], 2) if record["avg_priority"] else 0,
+                "min_priority": record["min_priority"],
+                "max_priority": record["max_priority"]
+            })
+        
+        return {
+            "status": "success",
+            "statistics": stats,
+            "total_entities": sum(s["entity_count"] for s in stats),
+            "total_transactions": sum(s["transaction_count"] for s in stats) // 2  # Divide by 2 since each transaction is counted twice
+        }
+        
     except Exception as e:
         logger.error(f"Error getting graph statistics: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve statistics: {str(e)}")
@@ -823,66 +933,65 @@ async def get_test_data_stats():
         if not db_handler._check_connection():
             raise HTTPException(status_code=503, detail="Database not connected")
         
-        with db_handler.driver.session() as session:
-            # Count test data nodes
-            node_count_query = """
-            MATCH (n) 
-            WHERE n.is_test_data = true
-            RETURN labels(n)[0] as label, count(n) as count
-            ORDER BY count DESC
-            """
-            
-            node_result = session.run(node_count_query)
-            node_counts = {record["label"]: record["count"] for record in node_result}
-            
-            # Count test data relationships  
-            rel_count_query = """
-            MATCH ()-[r]->() 
-            WHERE r.is_test_data = true
-            RETURN type(r) as rel_type, count(r) as count
-            ORDER BY count DESC
-            """
-            
-            rel_result = session.run(rel_count_query)
-            rel_counts = {record["rel_type"]: record["count"] for record in rel_result}
-            
-            # Get gambling site relationships
-            site_rel_query = """
-            MATCH (site:SitusJudi {is_test_data: true})-[r]->(entity)
-            RETURN coalesce(site.name, site.url) as site_name, type(r) as rel_type, count(r) as count
-            ORDER BY site_name, count DESC
-            """
-            
-            site_rel_result = session.run(site_rel_query)
-            site_relationships = {}
-            for record in site_rel_result:
-                site_name = record["site_name"]
-                if site_name not in site_relationships:
-                    site_relationships[site_name] = {}
-                site_relationships[site_name][record["rel_type"]] = record["count"]
-            
-            # Bank distribution analysis
-            bank_dist_query = """
-            MATCH (a:AkunMencurigakan {is_test_data: true})
-            RETURN a.nama_bank as bank, count(a) as count
-            ORDER BY count DESC
-            """
-            
-            bank_result = session.run(bank_dist_query)
-            bank_distribution = {record["bank"]: record["count"] for record in bank_result}
-            
-            return {
-                "status": "success",
-                "test_data_exists": len(node_counts) > 0,
-                "total_test_nodes": sum(node_counts.values()),
-                "total_test_relationships": sum(rel_counts.values()),
-                "node_counts_by_type": node_counts,
-                "relationship_counts_by_type": rel_counts,
-                "gambling_site_relationships": site_relationships,
-                "bank_distribution": bank_distribution,
-                "timestamp": datetime.now().isoformat()
-            }
-            
+        # Count test data nodes
+        node_count_query = """
+        MATCH (n) 
+        WHERE n.is_test_data = true
+        RETURN labels(n)[0] as label, count(n) as count
+        ORDER BY count DESC
+        """
+        
+        node_result = db_handler.read_query(node_count_query, name="test_data_stats")
+        node_counts = {record["label"]: record["count"] for record in node_result}
+        
+        # Count test data relationships  
+        rel_count_query = """
+        MATCH ()-[r]->() 
+        WHERE r.is_test_data = true
+        RETURN type(r) as rel_type, count(r) as count
+        ORDER BY count DESC
+        """
+        
+        rel_result = db_handler.read_query(rel_count_query, name="test_data_stats")
+        rel_counts = {record["rel_type"]: record["count"] for record in rel_result}
+        
+        # Get gambling site relationships
+        site_rel_query = """
+        MATCH (site:SitusJudi {is_test_data: true})-[r]->(entity)
+        RETURN coalesce(site.name, site.url) as site_name, type(r) as rel_type, count(r) as count
+        ORDER BY site_name, count DESC
+        """
+        
+        site_rel_result = db_handler.read_query(site_rel_query, name="test_data_stats")
+        site_relationships = {}
+        for record in site_rel_result:
+            site_name = record["site_name"]
+            if site_name not in site_relationships:
+                site_relationships[site_name] = {}
+            site_relationships[site_name][record["rel_type"]] = record["count"]
+        
+        # Bank distribution analysis
+        bank_dist_query = """
+        MATCH (a:AkunMencurigakan {is_test_data: true})
+        RETURN a.nama_bank as bank, count(a) as count
+        ORDER BY count DESC
+        """
+        
+        bank_result = db_handler.read_query(bank_dist_query, name="test_data_stats")
+        bank_distribution = {record["bank"]: record["count"] for record in bank_result}
+        
+        return {
+            "status": "success",
+            "test_data_exists": len(node_counts) > 0,
+            "total_test_nodes": sum(node_counts.values()),
+            "total_test_relationships": sum(rel_counts.values()),
+            "node_counts_by_type": node_counts,
+            "relationship_counts_by_type": rel_counts,
+            "gambling_site_relationships": site_relationships,
+            "bank_distribution": bank_distribution,
+            "timestamp": datetime.now().isoformat()
+        }
+        
     except Exception as e:
         logger.error(f"Error getting test data stats: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get test data stats: {str(e)}")
@@ -0,0 +1,97 @@
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+def process_tree_rss_mb(pid: int = None) -> float:
+    """Resident memory of a process plus all its descendants (Playwright driver, Chromium) in MB"""
+    try:
+        process = psutil.Process(pid or os.getpid())
+        processes = [process] + process.children(recursive=True)
+    except psutil.Error:
+        return 0.0
+    total = 0
+    for proc in processes:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            # Chromium renderers come and go while we walk the tree
+            continue
+    return round(total / (1024 * 1024), 1)
+
+
+class MemoryGuard:
+    """
+    Process-level RSS sampling and memory-based browser recycling for crawl worker processes.
+
+    `track()` samples the worker process tree (Python plus the Chromium it launched)
+    before and after a task. The samples are process-level, not per-task: with the threads
+    pool every concurrent crawl shares the process, so a sample covers all tasks running
+    at that moment (`tasks_in_process` in the sample). After a task `should_recycle()`
+    reports whether the tree is above `ceiling_mb`; the worker then retires its pooled
+    browsers (the bulk of the RSS) without stopping any crawl. At most one recycle happens
+    per `min_tasks` tasks, so a heavy baseline does not cause a recycle loop. A ceiling of
+    0 only records the samples. Prefork children are also replaced by Celery's
+    `worker_max_memory_per_child`, which counts the child's own RSS only.
+    """
+
+    def __init__(self, ceiling_mb: float = 0, min_tasks: int = 5):
+        self.ceiling_mb = ceiling_mb
+        self.min_tasks = min_tasks
+        self.tasks_done = 0
+        self.tasks_running = 0
+        self._recycled_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ceiling_mb > 0
+
+    @contextmanager
+    def track(self) -> Iterator[Dict[str, Any]]:
+        """Yield a dict that holds the process-level rss_before_mb/rss_after_mb/rss_delta_mb once the block exits"""
+        from .metrics import metrics_recorder
+
+        with self._lock:
+            self.tasks_running += 1
+        sample: Dict[str, Any] = {"scope": "process", "rss_before_mb": process_tree_rss_mb()}
+        try:
+            yield sample
+        finally:
+            sample["rss_after_mb"] = process_tree_rss_mb()
+            sample["rss_delta_mb"] = round(sample["rss_after_mb"] - sample["rss_before_mb"], 1)
+            if self.enabled:
+                sample["ceiling_mb"] = self.ceiling_mb
+            with self._lock:
+                # Tasks sharing the process when this one finished, itself included
+                sample["tasks_in_process"] = self.tasks_running
+                self.tasks_running -= 1
+                self.tasks_done += 1
+            metrics_recorder.record_memory(sample)
+
+    def should_recycle(self) -> bool:
+        """True when the process tree is over the ceiling and `min_tasks` tasks ran since the last recycle"""
+        if not self.enabled or self.tasks_done - self._recycled_at < self.min_tasks:
+            return False
+        rss_mb = process_tree_rss_mb()
+        if rss_mb < self.ceiling_mb:
+            return False
+        with self._lock:
+            if self.tasks_done - self._recycled_at < self.min_tasks:
+                return False
+            self._recycled_at = self.tasks_done
+        logger.warning(f"♻️ [MEMORY-GUARD] RSS {rss_mb} MB melewati batas {self.ceiling_mb} MB setelah {self.tasks_done} task, browser pool akan di-recycle")
+        return True
+
+
+memory_guard = MemoryGuard(
+    # Keep below the container limit (1G in docker-compose) to leave room for the in-flight crawl
+    ceiling_mb=float(os.environ.get("WORKER_MEMORY_CEILING_MB", 0)),
+    min_tasks=int(os.environ.get("WORKER_RECYCLE_MIN_TASKS", 5))
+)
@@ -0,0 +1,122 @@
+import os
+import logging
+from typing import Any, Dict
+
+from .model import CrawlMetrics
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Phases reported for every crawl, in pipeline order
+PHASES = ["static_prepass", "recipe_replay", "payment_discovery", "identity_generation", "agent_run", "parse", "screenshot_upload", "neo4j_store"]
+COUNTERS = ["agent_steps", "llm_calls", "prompt_tokens", "completion_tokens", "pages_visited"]
+
+
+class MetricsRecorder:
+    """
+    Aggregates crawl metrics in Redis so they can be read across workers.
+
+    Totals live in one hash (`{prefix}:totals`): `crawls`, `phase:<name>` seconds and
+    each counter. The API divides by `crawls` to report averages. Worker memory samples
+    add `memory:*` totals, with the highest RSS seen kept in `{prefix}:rss_max`. Neo4j
+    transaction retries and failures are counted per operation under `neo4j:*`.
+    """
+
+    def __init__(self, prefix: str = "metrics:crawl"):
+        self.prefix = prefix
+
+    @property
+    def totals_key(self) -> str:
+        return f"{self.prefix}:totals"
+
+    def record(self, metrics: CrawlMetrics, status: str = "SUCCESS"):
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.hincrby(self.totals_key, "crawls", 1)
+            pipe.hincrby(self.totals_key, f"status:{status.lower()}", 1)
+            for name, seconds in metrics.phases.items():
+                pipe.hincrbyfloat(self.totals_key, f"phase:{name}", seconds)
+                pipe.hincrby(self.totals_key, f"phase_count:{name}", 1)
+            for counter in COUNTERS:
+                pipe.hincrby(self.totals_key, counter, getattr(metrics, counter))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ [METRICS] Gagal menyimpan metrics crawl: {e}")
+
+    def record_memory(self, sample: Dict[str, Any]):
+        """Add one process-level RSS sample taken around a task (see memory_guard.MemoryGuard.track)"""
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.hincrby(self.totals_key, "memory:samples", 1)
+            for name in ("rss_before_mb", "rss_after_mb", "rss_delta_mb"):
+                pipe.hincrbyfloat(self.totals_key, f"memory:{name}", sample[name])
+            # GT keeps the larger score: an atomic running maximum
+            pipe.zadd(f"{self.prefix}:rss_max", {"rss_after_mb": sample["rss_after_mb"]}, gt=True)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ [METRICS] Gagal menyimpan metrics memori: {e}")
+
+    def record_recycle(self):
+        try:
+            get_redis().hincrby(self.totals_key, "memory:recycles", 1)
+        except Exception as e:
+            logger.warning(f"⚠️ [METRICS] Gagal mencatat recycle worker: {e}")
+
+    def record_neo4j(self, operation: str, retries: int = 0, failed: bool = False):
+        """Count transient-error retries and failed transactions of one Neo4j unit of work"""
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            if retries:
+                pipe.hincrby(self.totals_key, "neo4j:retries", retries)
+                pipe.hincrby(self.totals_key, f"neo4j:retries:{operation}", retries)
+            if failed:
+                pipe.hincrby(self.totals_key, "neo4j:failures", 1)
+                pipe.hincrby(self.totals_key, f"neo4j:failures:{operation}", 1)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ [METRICS] Gagal mencatat retry Neo4j: {e}")
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals and per-crawl averages across all workers"""
+        raw = get_redis().hgetall(self.totals_key)
+        crawls = int(raw.get("crawls", 0))
+        phases = {}
+        for name in PHASES:
+            total = float(raw.get(f"phase:{name}", 0.0))
+            count = int(raw.get(f"phase_count:{name}", 0))
+            phases[name] = {
+                "total_seconds": round(total, 3),
+                "count": count,
+                "avg_seconds": round(total / count, 3) if count else 0.0
+            }
+        counters = {}
+        for counter in COUNTERS:
+            total = int(raw.get(counter, 0))
+            counters[counter] = {"total": total, "avg_per_crawl": round(total / crawls, 2) if crawls else 0.0}
+        samples = int(raw.get("memory:samples", 0))
+        memory = {
+            "samples": samples,
+            "recycles": int(raw.get("memory:recycles", 0)),
+            "max_rss_mb": get_redis().zscore(f"{self.prefix}:rss_max", "rss_after_mb") or 0.0
+        }
+        for name in ("rss_before_mb", "rss_after_mb", "rss_delta_mb"):
+            memory[f"avg_{name}"] = round(float(raw.get(f"memory:{name}", 0.0)) / samples, 1) if samples else 0.0
+        neo4j = {"retries": int(raw.get("neo4j:retries", 0)), "failures": int(raw.get("neo4j:failures", 0)), "operations": {}}
+        for key, value in raw.items():
+            parts = key.split(":")
+            if len(parts) == 3 and parts[0] == "neo4j":
+                neo4j["operations"].setdefault(parts[2], {"retries": 0, "failures": 0})[parts[1]] = int(value)
+        return {
+            "crawls": crawls,
+            "status": {key.split(":", 1)[1]: int(value) for key, value in raw.items() if key.startswith("status:")},
+            "phases": phases,
+            "counters": counters,
+            "memory": memory,
+            "neo4j": neo4j
+        }
+
+    def reset(self):
+        get_redis().delete(self.totals_key, f"{self.prefix}:rss_max")
+
+
+metrics_recorder = MetricsRecorder(prefix=os.environ.get("METRICS_PREFIX", "metrics:crawl"))
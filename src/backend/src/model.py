@@ -1,12 +1,43 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+import os
+import time
+import logging
+from contextlib import contextmanager
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Dict, List, Optional
 from enum import Enum
+
+logger = logging.getLogger(__name__)
 class AccountType(str, Enum):
     BANK_ACCOUNT = "bank_account"
     CRYPTO_WALLET = "crypto_wallet"
     PAYMENT_PROCESSOR = "payment_processor"
     MOBILE_MONEY = "mobile_money"
 
+class CrawlMode(str, Enum):
+    TWO_PHASE = "two_phase"  # payment discovery agent, then extraction agent
+    SINGLE_PASS = "single_pass"  # one agent collects payment methods and accounts together
+
+    @classmethod
+    def _missing_(cls, value):
+        # Accept "SINGLE_PASS", "single-pass", ...
+        if isinstance(value, str):
+            normalized = value.strip().lower().replace("-", "_")
+            for mode in cls:
+                if mode.value == normalized:
+                    return mode
+        return None
+
+def _default_crawl_mode() -> CrawlMode:
+    """CRAWL_MODE from the environment, resolved once; an invalid value falls back to two_phase"""
+    raw = os.environ.get("CRAWL_MODE", CrawlMode.TWO_PHASE.value)
+    try:
+        return CrawlMode(raw)
+    except ValueError:
+        logger.warning(f"⚠️ [CONFIG] CRAWL_MODE '{raw}' tidak dikenal, memakai {CrawlMode.TWO_PHASE.value}")
+        return CrawlMode.TWO_PHASE
+
+DEFAULT_CRAWL_MODE = _default_crawl_mode()
+
 class SiteInfo(BaseModel):
     site_name: str
     site_url: str
@@ -53,15 +84,114 @@ class PaymentGateway(BaseModel):
     fees: Optional[str] = None
     page_found: Optional[str] = None
 
+class ScreenshotCapture(BaseModel):
+    """Screenshot kept in memory for one crawl, tagged with the page and accounts it shows"""
+    image: bytes
+    content_type: str = "image/png"
+    page_url: Optional[str] = None
+    page_title: Optional[str] = None
+    account_number: Optional[str] = None  # account the agent said this screenshot is for
+    detected_accounts: List[str] = Field(default_factory=list)  # account numbers found in the page HTML
+    phash: Optional[str] = None  # perceptual hash, set by the screenshot processor
+
+class IdentityOutcome(BaseModel):
+    identity_index: int
+    username: Optional[str] = None
+    registration_success: bool = False
+    accounts_found: int = 0
+    wallets_found: int = 0
+    error: Optional[str] = None
+
+class CrawlMetrics(BaseModel):
+    """Wall time per phase (seconds) and agent/LLM counts for one crawl"""
+    phases: Dict[str, float] = Field(default_factory=dict)
+    agent_steps: int = 0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    pages_visited: int = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block; repeated phases (e.g. parallel identity agents) accumulate"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0.0) + time.perf_counter() - started, 3)
+
+    def record_history(self, history):
+        """Add steps and visited pages from an `AgentHistoryList`"""
+        if history is None:
+            return
+        self.agent_steps += history.number_of_steps()
+        self.pages_visited += len({url for url in history.urls() if url and url != "about:blank"})
+
+    def record_usage(self, token_cost):
+        """Add LLM calls and tokens tracked by an agent's `token_cost_service` (one entry per LLM call)"""
+        if token_cost is None:
+            return
+        for entry in token_cost.usage_history:
+            self.llm_calls += 1
+            self.prompt_tokens += entry.usage.prompt_tokens
+            self.completion_tokens += entry.usage.completion_tokens
+
 class GamblingSiteData(BaseModel):
     site_info: SiteInfo
     bank_accounts: List[BankAccount] = Field(default_factory=list)
     crypto_wallets: List[CryptoWallet] = Field(default_factory=list)
     payment_gateways: List[PaymentGateway] = Field(default_factory=list)
+    # Kept private so it stays out of the agent's output schema
+    _identity_outcomes: List[IdentityOutcome] = PrivateAttr(default_factory=list)
+    _metrics: CrawlMetrics = PrivateAttr(default_factory=CrawlMetrics)
+
+    @property
+    def identity_outcomes(self) -> List[IdentityOutcome]:
+        return self._identity_outcomes
+
+    @property
+    def metrics(self) -> CrawlMetrics:
+        return self._metrics
 
 
 class PaymentDiscoveryResult(BaseModel):
     payment_methods: List[str] = Field(default_factory=list, description="List of discovered payment methods")
+
+class StaticCandidate(BaseModel):
+    kind: AccountType
+    value: str
+    provider: Optional[str] = None
+    account_holder: Optional[str] = None
+    confidence: float = 0.0
+    context: Optional[str] = None
+
+class StaticPrepassResult(BaseModel):
+    url: str
+    fetched: bool = False
+    candidates: List[StaticCandidate] = Field(default_factory=list)
+    keywords: List[str] = Field(default_factory=list, description="Bank/e-wallet names mentioned in the raw HTML")
+    fingerprint: Optional[str] = Field(None, description="Hash of asset/form structure shared by white-label clones of the same template")
+
+    def high_confidence(self, threshold: float) -> List[StaticCandidate]:
+        return [c for c in self.candidates if c.confidence >= threshold]
+
+class CrawlOptions(BaseModel):
+    crawl_mode: CrawlMode = Field(
+        default=DEFAULT_CRAWL_MODE,
+        description="Crawl strategy for this task"
+    )
+    force_refresh: bool = Field(False, description="Ignore cached payment discovery and re-run it")
+    static_prepass: bool = Field(
+        default_factory=lambda: os.environ.get("STATIC_PREPASS", "true").lower() == "true",
+        description="Scan raw HTML with regex patterns before the browser agent starts"
+    )
+    task_id: Optional[str] = Field(None, description="Celery task id, set by the worker to key traces and metrics")
+    payment_methods: Optional[List[str]] = Field(None, description="Payment methods from a checkpoint; discovery is skipped when set")
+    parallel_identities: bool = Field(
+        default_factory=lambda: os.environ.get("PARALLEL_IDENTITIES", "false").lower() == "true",
+        description="Run one agent per identity concurrently, each in its own browser context"
+    )
+
 class CrawlResult(BaseModel):
     task_id: str
     status: str
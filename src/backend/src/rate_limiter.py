@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from .redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Refill and take `cost` tokens atomically; returns the seconds to wait (0 when granted).
+# Uses the Redis clock so every worker process shares one notion of time.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+
+def limiter_domain(url: str) -> str:
+    """Bucket name for a site: lowercase host without a leading www."""
+    host = (urlparse(url).hostname or url).lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class RateLimiter:
+    """
+    Distributed token bucket shared by every worker process through Redis.
+
+    One bucket per name (`{prefix}:{name}`) refills at `per_minute` tokens per minute
+    up to `burst`. `acquire()` sleeps until a token is available instead of failing,
+    so more workers means slower per-worker progress rather than bursts of 429s or bans.
+    A name can get its own limits through `overrides` ({"name": {"per_minute": .., "burst": ..}}).
+    Waiting is capped at `max_wait` seconds and Redis errors fail open, so the limiter
+    never blocks a crawl outright.
+    """
+
+    def __init__(self, scope: str, per_minute: float = 60, burst: int = 10, max_wait: float = 120,
+                 overrides: Optional[Dict[str, Dict[str, float]]] = None, prefix: str = "ratelimit"):
+        self.scope = scope
+        self.per_minute = per_minute
+        self.burst = burst
+        self.max_wait = max_wait
+        self.overrides = overrides or {}
+        self.prefix = prefix
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def _limits(self, name: str) -> Tuple[float, float]:
+        limits = self.overrides.get(name, {})
+        per_minute = float(limits.get("per_minute", self.per_minute))
+        burst = float(limits.get("burst", self.burst))
+        return per_minute / 60.0, max(burst, 1.0)
+
+    async def acquire(self, name: str, cost: float = 1.0) -> float:
+        """
+        Wait for `cost` tokens from the bucket `name`
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if not self.enabled or not name:
+            return 0.0
+        rate, burst = self._limits(name)
+        if rate <= 0:
+            return 0.0
+        key = f"{self.prefix}:{self.scope}:{name}"
+        started = time.monotonic()
+        while True:
+            try:
+                script = get_async_redis().register_script(TOKEN_BUCKET_SCRIPT)
+                wait = float(await script(keys=[key], args=[rate, burst, min(cost, burst)]))
+            except Exception as e:
+                logger.warning(f"⚠️ [RATE-LIMIT] Redis error, {self.scope} {name} tidak dibatasi: {e}")
+                return time.monotonic() - started
+            waited = time.monotonic() - started
+            if wait <= 0:
+                if waited > 1:
+                    logger.info(f"⏳ [RATE-LIMIT] {self.scope} {name}: menunggu {waited:.1f}s")
+                return waited
+            if waited + wait > self.max_wait:
+                logger.warning(f"⚠️ [RATE-LIMIT] {self.scope} {name}: batas tunggu {self.max_wait}s tercapai, lanjut tanpa token")
+                return waited
+            await asyncio.sleep(wait)
+
+    def step_hook(self, url: str) -> Callable[[Any], Awaitable[None]]:
+        """`on_step_start` hook for Agent.run(): one token from the site's bucket per agent step"""
+        domain = limiter_domain(url)
+
+        async def _throttle(agent):
+            await self.acquire(domain)
+
+        return _throttle
+
+    def wrap_llm(self, llm, provider: str):
+        """Route every `ainvoke` of a browser-use chat model through the provider's bucket"""
+        if not self.enabled:
+            return llm
+        original_ainvoke = llm.ainvoke
+        limiter = self
+
+        async def limited_ainvoke(messages, output_format=None):
+            await limiter.acquire(provider)
+            return await original_ainvoke(messages, output_format)
+
+        # Same instance patching browser-use's token cost service uses
+        setattr(llm, "ainvoke", limited_ainvoke)
+        return llm
+
+
+def _overrides(env_name: str) -> Dict[str, Dict[str, float]]:
+    raw = os.environ.get(env_name)
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except ValueError:
+        logger.warning(f"⚠️ [RATE-LIMIT] {env_name} bukan JSON yang valid, diabaikan")
+        return {}
+
+
+domain_limiter = RateLimiter(
+    scope="domain",
+    per_minute=float(os.environ.get("RATE_LIMIT_DOMAIN_PER_MINUTE", 30)),
+    burst=int(os.environ.get("RATE_LIMIT_DOMAIN_BURST", 5)),
+    max_wait=float(os.environ.get("RATE_LIMIT_MAX_WAIT", 120)),
+    overrides=_overrides("RATE_LIMIT_DOMAIN_OVERRIDES")
+)
+
+llm_limiter = RateLimiter(
+    scope="llm",
+    per_minute=float(os.environ.get("RATE_LIMIT_LLM_PER_MINUTE", 120)),
+    burst=int(os.environ.get("RATE_LIMIT_LLM_BURST", 10)),
+    max_wait=float(os.environ.get("RATE_LIMIT_MAX_WAIT", 120)),
+    overrides=_overrides("RATE_LIMIT_LLM_OVERRIDES")
+)
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import copy
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .database import extract_domain
+from .redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Actions that need the LLM (or end the run) are never replayed
+NON_REPLAYABLE_ACTIONS = {"done", "extract_structured_data", "extract_content"}
+
+# Identity fields substituted with placeholders; short values (bank name/code, age) are left literal
+IDENTITY_FIELDS = ["full_name", "username", "email", "password", "phone", "bank_account_number", "birth_date", "first_name", "last_name"]
+
+SITE_HOST_PLACEHOLDER = "{{site_host}}"
+
+
+def _placeholder(identity_index: int, field: str) -> str:
+    return f"{{{{identity_{identity_index + 1}.{field}}}}}"
+
+
+def _replace_strings(value: Any, replacements: List[tuple]) -> Any:
+    """Apply (old, new) replacements to every string inside a JSON-like structure"""
+    if isinstance(value, str):
+        for old, new in replacements:
+            if old:
+                value = value.replace(old, new)
+        return value
+    if isinstance(value, list):
+        return [_replace_strings(item, replacements) for item in value]
+    if isinstance(value, dict):
+        return {key: _replace_strings(item, replacements) for key, item in value.items()}
+    return value
+
+
+def build_recipe(history: Dict[str, Any], url: str, identities: List[Dict[str, Any]], fingerprint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Turn a successful agent history dump into a replayable recipe
+
+    Args:
+        history (dict): `AgentHistoryList.model_dump()` of the extraction run
+        url (str): Site URL the history was recorded on
+        identities (list): Identities used in the prompt, replaced by placeholders
+        fingerprint (str): Optional template fingerprint of the site HTML
+
+    Returns:
+        dict: Recipe ready to be stored, or None if nothing is replayable
+    """
+    steps = []
+    for step in history.get("history", []):
+        model_output = step.get("model_output")
+        if not model_output or not model_output.get("action"):
+            continue
+        interacted = (step.get("state") or {}).get("interacted_element") or []
+        actions, elements = [], []
+        for index, action in enumerate(model_output["action"]):
+            if not action or set(action) & NON_REPLAYABLE_ACTIONS:
+                continue
+            actions.append(action)
+            elements.append(interacted[index] if index < len(interacted) else None)
+        if not actions:
+            continue
+        state = step.get("state") or {}
+        steps.append({
+            "model_output": {
+                "evaluation_previous_goal": model_output.get("evaluation_previous_goal", ""),
+                "memory": model_output.get("memory", ""),
+                "next_goal": model_output.get("next_goal", ""),
+                "action": actions,
+            },
+            "result": [],
+            "state": {
+                "url": state.get("url"),
+                "title": state.get("title"),
+                "tabs": state.get("tabs", []),
+                "interacted_element": elements,
+            },
+            "metadata": None,
+        })
+
+    if not steps:
+        return None
+
+    # Longest values first so a full name is replaced before its first/last name parts
+    replacements = []
+    for index, identity in enumerate(identities):
+        for field in IDENTITY_FIELDS:
+            value = identity.get(field)
+            if isinstance(value, str) and len(value) >= 4:
+                replacements.append((value, _placeholder(index, field)))
+    replacements.sort(key=lambda item: len(item[0]), reverse=True)
+    host = urlparse(url).netloc
+    if host:
+        replacements.append((host, SITE_HOST_PLACEHOLDER))
+
+    return {
+        "domain": extract_domain(url),
+        "fingerprint": fingerprint,
+        "identity_count": len(identities),
+        "recorded_at": time.time(),
+        "history": {"history": _replace_strings(steps, replacements)},
+    }
+
+
+def instantiate_recipe(recipe: Dict[str, Any], url: str, identities: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fill recipe placeholders with fresh identities and the target host; returns a history dump"""
+    replacements = []
+    for index, identity in enumerate(identities):
+        for field in IDENTITY_FIELDS:
+            value = identity.get(field)
+            if isinstance(value, str):
+                replacements.append((_placeholder(index, field), value))
+    replacements.append((SITE_HOST_PLACEHOLDER, urlparse(url).netloc))
+    return _replace_strings(copy.deepcopy(recipe["history"]), replacements)
+
+
+class RecipeStore:
+    """
+    Redis store of replayable browser action recipes.
+
+    Recipes are saved under the site domain and, when known, under the HTML
+    template fingerprint so white-label clones on new domains can reuse them.
+    """
+
+    def __init__(self, ttl_seconds: int = 30 * 24 * 3600, prefix: str = "recipe"):
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _domain_key(self, url: str) -> str:
+        return f"{self.prefix}:domain:{extract_domain(url)}"
+
+    def _template_key(self, fingerprint: str) -> str:
+        return f"{self.prefix}:template:{fingerprint}"
+
+    async def get(self, url: str, fingerprint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        keys = [self._domain_key(url)]
+        if fingerprint:
+            keys.append(self._template_key(fingerprint))
+        try:
+            for key in keys:
+                raw = await get_async_redis().get(key)
+                if raw:
+                    return json.loads(raw)
+        except Exception as e:
+            logger.warning(f"⚠️ [RECIPE-STORE] Gagal membaca recipe untuk {url}: {e}")
+        return None
+
+    async def save(self, url: str, recipe: Dict[str, Any]):
+        if not self.enabled or not recipe:
+            return
+        payload = json.dumps(recipe, default=str)
+        try:
+            client = get_async_redis()
+            await client.set(self._domain_key(url), payload, ex=self.ttl_seconds)
+            if recipe.get("fingerprint"):
+                await client.set(self._template_key(recipe["fingerprint"]), payload, ex=self.ttl_seconds)
+            logger.info(f"📼 [RECIPE-STORE] Recipe disimpan untuk {url} ({len(recipe['history']['history'])} steps)")
+        except Exception as e:
+            logger.warning(f"⚠️ [RECIPE-STORE] Gagal menyimpan recipe untuk {url}: {e}")
+
+    async def discard(self, url: str, fingerprint: Optional[str] = None):
+        """Drop recipes that no longer replay, so the next crawl records a fresh one"""
+        keys = [self._domain_key(url)]
+        if fingerprint:
+            keys.append(self._template_key(fingerprint))
+        try:
+            await get_async_redis().delete(*keys)
+        except Exception as e:
+            logger.warning(f"⚠️ [RECIPE-STORE] Gagal menghapus recipe untuk {url}: {e}")
+
+
+recipe_store = RecipeStore(
+    ttl_seconds=int(os.environ.get("RECIPE_TTL", 30 * 24 * 3600))
+)
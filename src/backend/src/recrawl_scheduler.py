@@ -0,0 +1,201 @@
+import os
+import math
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class RecrawlScheduler:
+    """
+    Picks known SitusJudi nodes to re-crawl and enqueues them within a budget.
+
+    A site becomes eligible once its `waktu_ekstraksi` is older than `min_age_hours`.
+    Eligible sites are ranked by the chance a re-crawl finds new accounts: the smoothed
+    share of past crawls whose account set changed, times how long it has been since
+    the last extraction (saturating after `max_age_hours`). Each tick enqueues the top
+    sites while staying under `max_in_flight` scheduled crawls at once, `daily_crawls`
+    crawls per day and `daily_tokens` estimated LLM tokens per day.
+
+    A failed re-crawl leaves `waktu_ekstraksi` untouched, so every enqueued URL gets a
+    `next_due` time (`{prefix}:next_due`) and is skipped until then: `min_age_hours` after
+    the attempt, doubled for each consecutive failure up to `max_age_hours`. Dead domains
+    therefore cannot use up the daily budget. All times are local, like `waktu_ekstraksi`.
+    """
+
+    def __init__(self, min_age_hours: float = 24, max_age_hours: float = 24 * 14, max_in_flight: int = 2,
+                 daily_crawls: int = 50, daily_tokens: int = 0, crawl_timeout: float = 1800, prefix: str = "recrawl"):
+        self.min_age_hours = min_age_hours
+        self.max_age_hours = max_age_hours
+        self.max_in_flight = max_in_flight
+        self.daily_crawls = daily_crawls
+        self.daily_tokens = daily_tokens
+        self.crawl_timeout = crawl_timeout
+        self.prefix = prefix
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_in_flight > 0 and self.daily_crawls > 0
+
+    @property
+    def in_flight_key(self) -> str:
+        return f"{self.prefix}:inflight"
+
+    @property
+    def next_due_key(self) -> str:
+        return f"{self.prefix}:next_due"
+
+    @property
+    def failures_key(self) -> str:
+        return f"{self.prefix}:failures"
+
+    def _spent_key(self) -> str:
+        return f"{self.prefix}:spent:{datetime.now().strftime('%Y%m%d')}"
+
+    def _backoff_seconds(self, failures: int) -> float:
+        """Cooldown after an attempt: min_age_hours, doubled per consecutive failure, capped at max_age_hours"""
+        hours = self.min_age_hours * (2 ** min(failures, 16))
+        return min(hours, self.max_age_hours) * 3600
+
+    def score(self, site: Dict[str, Any], now: Optional[datetime] = None) -> float:
+        """Expected-yield score of re-crawling one site (higher first)"""
+        now = now or datetime.now()
+        try:
+            age_hours = (now - datetime.fromisoformat(site["waktu_ekstraksi"])).total_seconds() / 3600
+        except (TypeError, ValueError):
+            age_hours = self.max_age_hours
+        # Laplace-smoothed rotation rate: new sites start at 0.5 instead of 0 or 1
+        rotation_rate = (site.get("account_changes", 0) + 1) / (max(site.get("crawl_count", 1) - 1, 0) + 2)
+        staleness = min(age_hours, self.max_age_hours) / self.max_age_hours
+        return rotation_rate * (1 - math.exp(-3 * staleness))
+
+    def _release_finished(self) -> int:
+        """Drop in-flight entries whose task finished (per task registry) or outlived the crawl timeout"""
+        from .task_registry import task_registry
+        from .task_events import TERMINAL_STATES
+
+        client = get_redis()
+        timed_out = set(client.zrangebyscore(self.in_flight_key, "-inf", time.time() - self.crawl_timeout))
+        entries = client.hgetall(f"{self.in_flight_key}:tasks")
+        if entries:
+            statuses = task_registry.get_many(list(entries.values()))
+            finished, failed = [], []
+            for (url, _), entry in zip(entries.items(), statuses):
+                if url in timed_out or entry is None or entry.get("status") in TERMINAL_STATES:
+                    finished.append(url)
+                    if entry is None or entry.get("status") != "SUCCESS":
+                        failed.append(url)
+            if finished:
+                pipe = client.pipeline()
+                pipe.zrem(self.in_flight_key, *finished)
+                pipe.hdel(f"{self.in_flight_key}:tasks", *finished)
+                succeeded = [url for url in finished if url not in failed]
+                if succeeded:
+                    pipe.hdel(self.failures_key, *succeeded)
+                for url in failed:
+                    pipe.hincrby(self.failures_key, url, 1)
+                results = pipe.execute()
+                if failed:
+                    # Push failed URLs further out; the cooldown set at enqueue time covers a success
+                    counts = results[len(results) - len(failed):]
+                    now = time.time()
+                    client.zadd(self.next_due_key, {url: now + self._backoff_seconds(count) for url, count in zip(failed, counts)})
+                    logger.info(f"⏳ [RECRAWL] {len(failed)} re-crawl gagal, ditunda dengan backoff")
+        client.zremrangebyscore(self.next_due_key, "-inf", time.time())
+        return client.zcard(self.in_flight_key)
+
+    def _estimated_tokens_per_crawl(self) -> float:
+        from .metrics import metrics_recorder
+        counters = metrics_recorder.summary()["counters"]
+        return counters["prompt_tokens"]["avg_per_crawl"] + counters["completion_tokens"]["avg_per_crawl"]
+
+    def _slots(self, in_flight: int) -> int:
+        """How many crawls this tick may enqueue under the concurrency, crawl and token budgets"""
+        spent = get_redis().hgetall(self._spent_key())
+        slots = min(self.max_in_flight - in_flight, self.daily_crawls - int(spent.get("crawls", 0)))
+        if self.daily_tokens > 0:
+            per_crawl = self._estimated_tokens_per_crawl()
+            if per_crawl > 0:
+                remaining = self.daily_tokens - float(spent.get("tokens", 0))
+                slots = min(slots, int(remaining // per_crawl))
+        return max(slots, 0)
+
+    def select(self, candidates: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """Highest-scoring candidates not already being re-crawled"""
+        if limit <= 0:
+            return []
+        client = get_redis()
+        busy = set(client.zrange(self.in_flight_key, 0, -1))
+        # Sites still cooling down after a recent (possibly failed) attempt
+        busy |= set(client.zrangebyscore(self.next_due_key, time.time(), "+inf"))
+        now = datetime.now()
+        ranked = sorted(
+            (site for site in candidates if site["url"] not in busy),
+            key=lambda site: self.score(site, now),
+            reverse=True
+        )
+        return ranked[:limit]
+
+    def tick(self, enqueue) -> List[Dict[str, Any]]:
+        """
+        Enqueue the next batch of re-crawls
+
+        Args:
+            enqueue: Callable taking a site dict and returning the new task id
+
+        Returns:
+            List[dict]: Sites enqueued this tick, each with its task_id and score
+        """
+        from .database import db_handler
+
+        if not self.enabled:
+            return []
+        client = get_redis()
+        # Beat can fire while a slow tick is still running; only one tick at a time
+        if not client.set(f"{self.prefix}:tick-lock", "1", nx=True, ex=300):
+            return []
+        try:
+            slots = self._slots(self._release_finished())
+            if slots <= 0:
+                logger.info("⏸️ [RECRAWL] Budget atau slot habis, tidak ada re-crawl dijadwalkan")
+                return []
+            if not db_handler._check_connection():
+                db_handler.close()
+                if not db_handler.connect(max_retries=1, retry_delay=0):
+                    return []
+            cutoff = (datetime.now() - timedelta(hours=self.min_age_hours)).isoformat()
+            picked = self.select(db_handler.get_recrawl_candidates(cutoff), slots)
+            per_crawl_tokens = self._estimated_tokens_per_crawl() if self.daily_tokens > 0 else 0
+            scheduled = []
+            for site in picked:
+                task_id = enqueue(site)
+                pipe = client.pipeline()
+                pipe.zadd(self.in_flight_key, {site["url"]: time.time()})
+                pipe.hset(f"{self.in_flight_key}:tasks", site["url"], task_id)
+                pipe.zadd(self.next_due_key, {site["url"]: time.time() + self._backoff_seconds(0)})
+                pipe.hincrby(self._spent_key(), "crawls", 1)
+                pipe.hincrbyfloat(self._spent_key(), "tokens", per_crawl_tokens)
+                pipe.expire(self._spent_key(), 2 * 24 * 3600)
+                pipe.execute()
+                scheduled.append({**site, "task_id": task_id, "score": round(self.score(site), 4)})
+                logger.info(f"🔁 [RECRAWL] {site['original_url']} dijadwalkan ulang (score {self.score(site):.3f}, task {task_id})")
+            return scheduled
+        finally:
+            client.delete(f"{self.prefix}:tick-lock")
+
+
+# Seconds between scheduler ticks (Celery beat); 0 disables scheduled re-crawls
+RECRAWL_INTERVAL = float(os.environ.get("RECRAWL_INTERVAL", 0))
+
+recrawl_scheduler = RecrawlScheduler(
+    min_age_hours=float(os.environ.get("RECRAWL_MIN_AGE_HOURS", 24)),
+    max_age_hours=float(os.environ.get("RECRAWL_MAX_AGE_HOURS", 24 * 14)),
+    max_in_flight=int(os.environ.get("RECRAWL_MAX_IN_FLIGHT", 2)),
+    daily_crawls=int(os.environ.get("RECRAWL_DAILY_CRAWLS", 50)),
+    daily_tokens=int(os.environ.get("RECRAWL_DAILY_TOKENS", 0)),
+    crawl_timeout=float(os.environ.get("CRAWL_TIMEOUT", 25 * 60)) + 300
+)
@@ -0,0 +1,42 @@
+import os
+import asyncio
+import logging
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def get_redis_url() -> str:
+    """Redis used for crawl state; defaults to the Celery broker"""
+    return os.environ.get("REDIS_URL") or os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0")
+
+
+_sync_client: Optional[redis.Redis] = None
+_async_clients = {}
+
+
+def get_redis() -> redis.Redis:
+    """Process-wide synchronous Redis client (connection pool is thread-safe)"""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(get_redis_url(), decode_responses=True)
+    return _sync_client
+
+
+def get_async_redis() -> aioredis.Redis:
+    """asyncio Redis client bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        # Drop clients whose loop is gone so they do not pile up
+        for stale_loop in [l for l in _async_clients if l.is_closed()]:
+            _async_clients.pop(stale_loop, None)
+        client = aioredis.Redis.from_url(get_redis_url(), decode_responses=True)
+        _async_clients[loop] = client
+    return client
@@ -0,0 +1,164 @@
+import os
+import time
+import socket
+import logging
+from typing import List, Optional, Tuple
+
+import redis
+
+from .model import GamblingSiteData
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class ResultStream:
+    """
+    Redis stream between crawl workers and a dedicated Neo4j writer.
+
+    In pipeline mode workers `publish()` validated GamblingSiteData instead of writing
+    to Neo4j themselves. Writer processes (`python -m src.result_stream`) read the
+    stream through one consumer group and store up to `batch_size` sites per write
+    transaction, so the number of Neo4j sessions no longer grows with the worker count.
+    Messages are acked only after they are stored; entries left pending by a crashed
+    writer are reclaimed after `claim_idle_ms`. Acked entries are deleted, so the stream
+    length is the writer backlog: the stream is never trimmed, and once the backlog reaches
+    `max_length` `publish()` refuses new results so the worker stores or spools them itself.
+    """
+
+    def __init__(self, stream: str = "crawl:results", group: str = "neo4j-writer", batch_size: int = 50,
+                 block_ms: int = 2000, claim_idle_ms: int = 60000, max_length: int = 100000):
+        self.stream = stream
+        self.group = group
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_length = max_length
+
+    @property
+    def dead_letter_stream(self) -> str:
+        return f"{self.stream}:dead"
+
+    def publish(self, data: GamblingSiteData, task_id: Optional[str] = None) -> bool:
+        """Queue one extraction result for the writer; False if Redis refused it or the backlog is full"""
+        try:
+            client = get_redis()
+            backlog = client.xlen(self.stream)
+            if backlog >= self.max_length:
+                logger.warning(f"⚠️ [RESULT-STREAM] Backlog writer penuh ({backlog} entry), {data.site_info.site_url} tidak dikirim ke stream")
+                return False
+            client.xadd(self.stream, {"task_id": task_id or "", "data": data.model_dump_json()})
+            logger.info(f"📤 [RESULT-STREAM] Hasil {data.site_info.site_url} dikirim ke writer (task {task_id})")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ [RESULT-STREAM] Gagal publish hasil {data.site_info.site_url}: {e}")
+            return False
+
+    def ensure_group(self):
+        try:
+            get_redis().xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _read(self, consumer: str) -> List[Tuple[str, dict]]:
+        client = get_redis()
+        # Entries abandoned by a dead writer first, then new ones
+        _, claimed, *_ = client.xautoclaim(self.stream, self.group, consumer, self.claim_idle_ms, "0-0", count=self.batch_size)
+        if claimed:
+            return [(entry_id, fields) for entry_id, fields in claimed if fields]
+        response = client.xreadgroup(self.group, consumer, {self.stream: ">"}, count=self.batch_size, block=self.block_ms)
+        return [entry for _, entries in response for entry in entries] if response else []
+
+    def _ack(self, entry_ids: List[str]):
+        if entry_ids:
+            pipe = get_redis().pipeline()
+            pipe.xack(self.stream, self.group, *entry_ids)
+            pipe.xdel(self.stream, *entry_ids)
+            pipe.execute()
+
+    def _dead_letter(self, entry_id: str, fields: dict, reason: str):
+        get_redis().xadd(self.dead_letter_stream, {**fields, "source_id": entry_id, "reason": reason}, maxlen=self.max_length, approximate=True)
+        logger.error(f"❌ [RESULT-STREAM] Entry {entry_id} dipindah ke {self.dead_letter_stream}: {reason}")
+
+    def process_batch(self, consumer: str) -> int:
+        """
+        Read one micro-batch and store it in a single transaction
+
+        Returns:
+            int: Number of sites stored (0 when the stream was idle or Neo4j is down)
+        """
+        from .database import db_handler
+
+        entries = self._read(consumer)
+        if not entries:
+            return 0
+
+        items, accepted = [], []
+        for entry_id, fields in entries:
+            try:
+                items.append(GamblingSiteData.model_validate_json(fields["data"]))
+                accepted.append((entry_id, fields))
+            except Exception as e:
+                self._dead_letter(entry_id, fields, f"invalid payload: {e}")
+                self._ack([entry_id])
+
+        if not items:
+            return 0
+        if not db_handler._check_connection():
+            db_handler.close()
+            if not db_handler.connect(max_retries=1, retry_delay=0):
+                # Leave the batch pending; it is reclaimed once Neo4j is back
+                logger.warning(f"⚠️ [RESULT-STREAM] Neo4j tidak tersedia, {len(items)} hasil menunggu di stream")
+                time.sleep(self.block_ms / 1000)
+                return 0
+
+        stored = db_handler.store_gambling_site_batch(items)
+        if not any(stored) and not db_handler._check_connection():
+            return 0
+        if not all(stored) and len(items) > 1:
+            # Isolate the offending sites so one bad record does not block the rest
+            stored = [db_handler.store_gambling_site_batch([item])[0] for item in items]
+            if not any(stored) and not db_handler._check_connection():
+                return 0
+        for (entry_id, fields), ok in zip(accepted, stored):
+            if not ok:
+                self._dead_letter(entry_id, fields, "rejected by Neo4j")
+        self._ack([entry_id for entry_id, _ in accepted])
+        logger.info(f"✅ [RESULT-STREAM] {sum(stored)}/{len(items)} situs disimpan oleh {consumer}")
+        return sum(stored)
+
+    def run_writer(self, consumer: Optional[str] = None):
+        """Blocking writer loop; run one or more per deployment"""
+        consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.ensure_group()
+        logger.info(f"🚀 [RESULT-STREAM] Writer {consumer} membaca {self.stream} (batch {self.batch_size})")
+        while True:
+            try:
+                self.process_batch(consumer)
+            except redis.ConnectionError as e:
+                logger.warning(f"⚠️ [RESULT-STREAM] Redis tidak tersedia: {e}")
+                time.sleep(5)
+            except Exception as e:
+                logger.error(f"❌ [RESULT-STREAM] Writer error: {e}")
+                time.sleep(1)
+
+
+# Pipeline mode: workers publish to the stream instead of writing to Neo4j directly
+WRITE_PIPELINE = os.environ.get("WRITE_PIPELINE", "false").lower() == "true"
+
+result_stream = ResultStream(
+    stream=os.environ.get("RESULT_STREAM", "crawl:results"),
+    batch_size=int(os.environ.get("RESULT_STREAM_BATCH_SIZE", 50)),
+    block_ms=int(os.environ.get("RESULT_STREAM_BLOCK_MS", 2000)),
+    claim_idle_ms=int(os.environ.get("RESULT_STREAM_CLAIM_IDLE_MS", 60000)),
+    max_length=int(os.environ.get("RESULT_STREAM_MAX_LENGTH", 100000))
+)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from .database import db_handler
+    db_handler.connect()
+    db_handler.create_indexes()
+    result_stream.run_writer()
@@ -3,6 +3,8 @@ from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 import datetime
 
+from .model import CrawlMode
+
 
 class EntityType(str, Enum):
     BANK_ACCOUNT = "bank_account"
@@ -32,9 +34,15 @@ class TaskRequest(BaseModel):
 
 class SitusJudiRequest(BaseModel):
     url: HttpUrl = Field(..., description="URL situs judi online yang akan dianalisis")
+    crawl_mode: Optional[CrawlMode] = Field(None, description="Mode crawl: two_phase (discovery + ekstraksi) atau single_pass (satu agent)")
+    force_refresh: bool = Field(False, description="Abaikan cache discovery metode pembayaran dan jalankan ulang discovery")
+    parallel_identities: Optional[bool] = Field(None, description="Jalankan satu agent per identitas secara paralel, masing-masing di browser context terpisah")
     
 class MultipleSitusRequest(BaseModel):
     urls: List[HttpUrl] = Field(..., description="Daftar URL situs judi online yang akan dianalisis")
+    crawl_mode: Optional[CrawlMode] = Field(None, description="Mode crawl: two_phase (discovery + ekstraksi) atau single_pass (satu agent)")
+    force_refresh: bool = Field(False, description="Abaikan cache discovery metode pembayaran dan jalankan ulang discovery")
+    parallel_identities: Optional[bool] = Field(None, description="Jalankan satu agent per identitas secara paralel, masing-masing di browser context terpisah")
 
 class DaftarAkunRequest(BaseModel):
     nomor_rekening: str = Field(..., description="Nomor rekening untuk laporan")
@@ -53,6 +61,15 @@ class TaskStatus(BaseModel):
     task_id: str
     status: str
     result: dict | None
+    updated_at: Optional[float] = None
+
+class TaskStatusBatchRequest(BaseModel):
+    task_ids: List[str] = Field(..., min_length=1, max_length=500, description="Daftar ID task")
+    since: Optional[float] = Field(None, description="Hanya task yang berubah setelah timestamp ini (Unix, detik)")
+
+class TaskStatusBatchResponse(BaseModel):
+    tasks: List[TaskStatus] = Field(..., description="Status task yang diminta (atau yang berubah sejak `since`)")
+    server_time: float = Field(..., description="Timestamp server; kirim sebagai `since` pada request berikutnya")
 
 # --- Response models ---
 class SitusJudiResponse(BaseModel):
@@ -116,8 +133,13 @@ class TaskInfo(BaseModel):
     status: str = Field(..., description="Status task")
     result: Optional[dict] = Field(None, description="Hasil task")
     created_at: Optional[str] = Field(None, description="Waktu pembuatan task")
+    updated_at: Optional[str] = Field(None, description="Waktu perubahan status terakhir")
+    kind: Optional[str] = Field(None, description="Jenis task: single, batch atau batch_item")
+    urls: Optional[List[str]] = Field(None, description="URL yang diproses task")
+    parent_id: Optional[str] = Field(None, description="ID batch induk (untuk batch_item)")
+    retry_of: Optional[str] = Field(None, description="ID task yang di-retry oleh task ini")
     
-    @field_validator('created_at', mode='before')
+    @field_validator('created_at', 'updated_at', mode='before')
     @classmethod
     def validate_created_at(cls, v):
         if v is None:
@@ -131,10 +153,13 @@ class TaskListResponse(BaseModel):
     status: str = Field(..., description="Status response")
     tasks: List[TaskInfo] = Field(..., description="Daftar task")
     total: int = Field(..., description="Total jumlah task")
+    offset: int = Field(0, description="Jumlah task yang dilewati")
+    limit: Optional[int] = Field(None, description="Ukuran halaman")
 
 # Health check response
 class HealthResponse(BaseModel):
     status: str = Field(..., description="Status kesehatan service")
     timestamp: str = Field(..., description="Timestamp health check")
     database_connected: bool = Field(..., description="Status koneksi database Neo4j")
-    celery_connected: bool = Field(..., description="Status koneksi Celery broker")
\ No newline at end of file
+    celery_connected: bool = Field(..., description="Status koneksi Celery broker")
+    workers_ready: Optional[int] = Field(None, description="Jumlah proses worker yang sudah selesai warm-up")
\ No newline at end of file
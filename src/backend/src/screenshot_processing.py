@@ -0,0 +1,129 @@
+import io
+import os
+import asyncio
+import logging
+from typing import Optional
+
+from PIL import Image
+
+from .model import ScreenshotCapture
+from .redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg", "PNG": "image/png"}
+EXTENSIONS = {"image/webp": "webp", "image/jpeg": "jpg", "image/png": "png"}
+
+
+def difference_hash(image: Image.Image, hash_size: int = 16) -> str:
+    """
+    dHash (256-bit by default): compares neighbouring pixels of a small grayscale thumbnail.
+
+    Re-encoding or small rendering noise leaves the hash unchanged, so the same
+    deposit page captured twice hashes identically.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+class ScreenshotProcessor:
+    """
+    Transcodes full-page PNG screenshots before upload.
+
+    Images are downscaled to fit `max_width` x `max_height`, re-encoded as WebP
+    or JPEG, and tagged with a perceptual hash used for deduplication.
+    """
+
+    def __init__(self, image_format: str = "WEBP", quality: int = 80, max_width: int = 1280, max_height: int = 6000):
+        self.image_format = image_format.upper() if image_format.upper() in CONTENT_TYPES else "WEBP"
+        self.quality = quality
+        self.max_width = max_width
+        self.max_height = max_height
+
+    def _transcode(self, capture: ScreenshotCapture) -> ScreenshotCapture:
+        with Image.open(io.BytesIO(capture.image)) as image:
+            image.load()
+            phash = difference_hash(image)
+            if image.width > self.max_width or image.height > self.max_height:
+                image.thumbnail((self.max_width, self.max_height), Image.Resampling.LANCZOS)
+            if self.image_format == "JPEG" and image.mode != "RGB":
+                image = image.convert("RGB")
+            output = io.BytesIO()
+            save_options = {"quality": self.quality}
+            if self.image_format == "JPEG":
+                save_options["optimize"] = True
+            elif self.image_format == "WEBP":
+                save_options["method"] = 4
+            image.save(output, format=self.image_format, **save_options)
+
+        return capture.model_copy(update={
+            "image": output.getvalue(),
+            "content_type": CONTENT_TYPES[self.image_format],
+            "phash": phash
+        })
+
+    async def process(self, capture: ScreenshotCapture) -> ScreenshotCapture:
+        """Transcode off the event loop; on failure the original PNG is uploaded unchanged"""
+        original_size = len(capture.image)
+        try:
+            processed = await asyncio.to_thread(self._transcode, capture)
+        except Exception as e:
+            logger.warning(f"⚠️ [SCREENSHOT-PROCESS] Gagal transcode screenshot {capture.page_url}: {e}")
+            return capture
+        logger.debug(f"🖼️ [SCREENSHOT-PROCESS] {original_size} -> {len(processed.image)} bytes ({self.image_format}, phash {processed.phash})")
+        return processed
+
+
+class ScreenshotIndex:
+    """
+    Redis map of (perceptual hash, account number) -> oss_key so identical screenshots are uploaded once.
+
+    The account number is part of the key because clone sites render the same deposit
+    layout for different accounts, which a perceptual hash alone cannot tell apart.
+    """
+
+    def __init__(self, ttl_seconds: int = 90 * 24 * 3600, prefix: str = "screenshot:phash"):
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _key(self, phash: str, account_number: str) -> str:
+        return f"{self.prefix}:{account_number}:{phash}"
+
+    async def get(self, phash: Optional[str], account_number: str) -> Optional[str]:
+        if not self.enabled or not phash:
+            return None
+        try:
+            return await get_async_redis().get(self._key(phash, account_number))
+        except Exception as e:
+            logger.warning(f"⚠️ [SCREENSHOT-INDEX] Gagal membaca index phash {phash}: {e}")
+            return None
+
+    async def set(self, phash: Optional[str], account_number: str, oss_key: str):
+        if not self.enabled or not phash:
+            return
+        try:
+            await get_async_redis().set(self._key(phash, account_number), oss_key, ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"⚠️ [SCREENSHOT-INDEX] Gagal menyimpan index phash {phash}: {e}")
+
+
+screenshot_processor = ScreenshotProcessor(
+    image_format=os.environ.get("SCREENSHOT_FORMAT", "WEBP"),
+    quality=int(os.environ.get("SCREENSHOT_QUALITY", 80)),
+    max_width=int(os.environ.get("SCREENSHOT_MAX_WIDTH", 1280)),
+    max_height=int(os.environ.get("SCREENSHOT_MAX_HEIGHT", 6000))
+)
+
+screenshot_index = ScreenshotIndex(
+    ttl_seconds=int(os.environ.get("SCREENSHOT_DEDUP_TTL", 90 * 24 * 3600))
+)
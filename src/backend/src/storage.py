@@ -1,5 +1,6 @@
 import os
 import shutil
+import asyncio
 from typing import Optional
 from pathlib import Path
 import logging
@@ -111,6 +112,32 @@ class StorageManager:
             logger.error("B2 client not available or not configured. File will NOT be saved locally. Raising error.")
             raise RuntimeError("B2 OSS not configured or not available. Cannot upload file.")
         
+    async def save_bytes(self, data: bytes, destination_relative_path: str, content_type: str = "image/png") -> str:
+        """
+        Upload in-memory bytes to B2 OSS and return the OSS key (no temp file on disk)
+        """
+        self._ensure_contabu_client()
+
+        if not self.s3_client:
+            logger.error("B2 client not available or not configured. Bytes will NOT be saved. Raising error.")
+            raise RuntimeError("B2 OSS not configured or not available. Cannot upload file.")
+
+        oss_key = self._get_oss_key(destination_relative_path)
+        try:
+            # boto3 clients are thread-safe; run the blocking call off the event loop so uploads overlap
+            await asyncio.to_thread(
+                self.s3_client.put_object,
+                Bucket=self.bucket_name,
+                Key=oss_key,
+                Body=data,
+                ContentType=content_type
+            )
+            logger.info(f"✓ Bytes successfully uploaded to B2 OSS with key: {oss_key}")
+            return oss_key
+        except ClientError as e:
+            logger.error(f"Error uploading to B2 OSS: {e}. Raising error.")
+            raise e
+        
     def generate_presigned_url(self, oss_key: str, expiration: int = 3600) -> str:
         """
         Generate a presigned URL for accessing an object in B2 OSS
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from .redis_client import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Celery states after which a task publishes nothing more
+TERMINAL_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+
+class TaskEvents:
+    """
+    Task progress over Redis pub/sub, streamed to the dashboard as Server-Sent Events.
+
+    Workers `publish()` every progress update and final result on `{prefix}:{task_id}`.
+    The API subscribes to one task channel or to the `{prefix}:*` pattern for all tasks,
+    so clients get updates as they happen instead of polling the Celery result backend.
+    Events carry the same shape as `GET /tasks/{task_id}`: task_id, status and result.
+    Idle streams send a `keepalive` event so clients can tell a quiet task from a dead stream.
+    """
+
+    def __init__(self, prefix: str = "task:events", keepalive_seconds: float = 15):
+        self.prefix = prefix
+        self.keepalive_seconds = keepalive_seconds
+
+    def channel(self, task_id: str) -> str:
+        return f"{self.prefix}:{task_id}"
+
+    @staticmethod
+    def event(task_id: str, status: str, result: Any = None) -> Dict[str, Any]:
+        return {"task_id": task_id, "status": status, "result": result, "timestamp": time.time()}
+
+    def publish(self, task_id: Optional[str], status: str, result: Any = None):
+        """Publish one progress event (worker side, synchronous); never raises"""
+        if not task_id:
+            return
+        try:
+            get_redis().publish(self.channel(task_id), json.dumps(self.event(task_id, status, result), default=str))
+        except Exception as e:
+            logger.warning(f"⚠️ [TASK-EVENTS] Gagal publish event {status} untuk task {task_id}: {e}")
+
+    @staticmethod
+    def format_sse(payload: Dict[str, Any]) -> str:
+        return f"data: {json.dumps(payload, default=str)}\n\n"
+
+    async def stream(self, task_id: Optional[str] = None,
+                     initial: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+                     is_disconnected=None) -> AsyncIterator[str]:
+        """
+        SSE frames for one task (until it reaches a terminal state) or for every task
+
+        Args:
+            task_id (str): Task to follow; None follows all tasks
+            initial: Callable returning the current status, sent first so the client does not wait
+                for the next update. It is called only after subscribing, so a final event
+                published in between is never lost, and on a worker thread since it does blocking I/O
+            is_disconnected: Async callable returning True once the client has gone away
+        """
+        pubsub = get_async_redis().pubsub(ignore_subscribe_messages=True)
+        try:
+            if task_id:
+                await pubsub.subscribe(self.channel(task_id))
+            else:
+                await pubsub.psubscribe(f"{self.prefix}:*")
+            if initial:
+                current = await asyncio.to_thread(initial)
+                if current:
+                    yield self.format_sse(current)
+                    if task_id and current.get("status") in TERMINAL_STATES:
+                        return
+            while True:
+                if is_disconnected is not None and await is_disconnected():
+                    return
+                message = await pubsub.get_message(timeout=self.keepalive_seconds)
+                if message is None:
+                    # Keeps proxies from closing an idle connection and tells the client the stream is alive
+                    yield "event: keepalive\ndata: {}\n\n"
+                    continue
+                try:
+                    payload = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    continue
+                yield self.format_sse(payload)
+                if task_id and payload.get("status") in TERMINAL_STATES:
+                    return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ [TASK-EVENTS] Stream event terputus ({task_id or 'semua task'}): {e}")
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+task_events = TaskEvents(
+    keepalive_seconds=float(os.environ.get("TASK_EVENTS_KEEPALIVE", 15))
+)
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Every status a task can be listed under; a task sits in exactly one status set
+STATUSES = ["PENDING", "STARTED", "PROCESSING", "SUCCESS", "FAILURE", "RETRY", "REVOKED"]
+KINDS = ["single", "batch", "batch_item"]
+
+# Result keys kept in the registry; full results stay in the Celery backend / checkpoints
+SUMMARY_KEYS = [
+    "status", "url", "nama_situs", "rekening_ditemukan", "crypto_ditemukan", "payment_ditemukan",
+    "status_penyimpanan", "total_situs", "berhasil_ekstraksi", "gagal_ekstraksi", "processing_time",
+    "error_message", "error", "message", "progress", "selesai", "total", "current_url"
+]
+
+
+def summarize(result: Any) -> Optional[Dict[str, Any]]:
+    """Small, JSON-safe subset of a task result or progress meta"""
+    if not isinstance(result, dict):
+        return {"message": str(result)} if result is not None else None
+    return {key: result[key] for key in SUMMARY_KEYS if key in result}
+
+
+class TaskRegistry:
+    """
+    Redis index of crawl tasks for GET /tasks, written as tasks are submitted and progress.
+
+    Each task is a hash (`{prefix}:{task_id}`: kind, urls, status, created_at, updated_at,
+    parent_id, result summary). Sorted sets scored by creation time index the tasks:
+    `{prefix}:index` (top-level tasks), `{prefix}:status:<STATUS>` and `{prefix}:kind:<kind>`,
+    so a filtered page is one ZREVRANGE plus one pipelined HGETALL regardless of how many
+    workers are running. Entries are kept for `retention_days`.
+    """
+
+    def __init__(self, prefix: str = "tasks", retention_days: float = 30):
+        self.prefix = prefix
+        self.retention_seconds = int(retention_days * 24 * 3600)
+        self._last_prune = 0.0
+
+    def task_key(self, task_id: str) -> str:
+        return f"{self.prefix}:{task_id}"
+
+    @property
+    def index_key(self) -> str:
+        return f"{self.prefix}:index"
+
+    def _status_key(self, status: str) -> str:
+        return f"{self.prefix}:status:{status}"
+
+    def _kind_key(self, kind: str) -> str:
+        return f"{self.prefix}:kind:{kind}"
+
+    def record(self, task_id: Optional[str], status: str, kind: Optional[str] = None,
+               result: Any = None, **fields):
+        """
+        Create or update a task entry and move it to its status set (one pipelined round trip)
+
+        Args:
+            task_id (str): Celery task id
+            status (str): New status (one of STATUSES)
+            kind (str): single, batch or batch_item; only needed when the task is first seen
+            result: Result or progress meta; stored as a summary
+            **fields: Extra attributes (urls, options, parent_id, retry_of)
+        """
+        if not task_id:
+            return
+        now = time.time()
+        mapping = {"task_id": task_id, "status": status, "updated_at": str(now)}
+        if kind:
+            mapping["kind"] = kind
+        if result is not None:
+            mapping["result"] = json.dumps(summarize(result), default=str)
+        for name, value in fields.items():
+            if value is not None:
+                mapping[name] = value if isinstance(value, str) else json.dumps(value, default=str)
+        try:
+            client = get_redis()
+            key = self.task_key(task_id)
+            pipe = client.pipeline()
+            pipe.hsetnx(key, "created_at", str(now))
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.retention_seconds)
+            for other in STATUSES:
+                if other != status:
+                    pipe.zrem(self._status_key(other), task_id)
+            # NX keeps the first score when a status repeats (e.g. successive PROCESSING updates)
+            pipe.zadd(self._status_key(status), {task_id: now}, nx=True)
+            if kind:
+                pipe.zadd(self._kind_key(kind), {task_id: now}, nx=True)
+                if kind != "batch_item":
+                    pipe.zadd(self.index_key, {task_id: now}, nx=True)
+            pipe.execute()
+            if now - self._last_prune > 3600:
+                self._last_prune = now
+                self.prune()
+        except Exception as e:
+            logger.warning(f"⚠️ [TASK-REGISTRY] Gagal mencatat status {status} untuk task {task_id}: {e}")
+
+    def prune(self):
+        """Drop index entries older than the retention window (their hashes expire on their own)"""
+        cutoff = time.time() - self.retention_seconds
+        client = get_redis()
+        pipe = client.pipeline()
+        for key in [self.index_key] + [self._status_key(s) for s in STATUSES] + [self._kind_key(k) for k in KINDS]:
+            pipe.zremrangebyscore(key, "-inf", cutoff)
+        pipe.execute()
+
+    def _entry(self, raw: Dict[str, str]) -> Dict[str, Any]:
+        entry = dict(raw)
+        for name in ("result", "urls", "options"):
+            if name in entry:
+                try:
+                    entry[name] = json.loads(entry[name])
+                except ValueError:
+                    pass
+        for name in ("created_at", "updated_at"):
+            if name in entry:
+                entry[name] = float(entry[name])
+        return entry
+
+    def get_many(self, task_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        pipe = get_redis().pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.hgetall(self.task_key(task_id))
+        return [self._entry(raw) if raw else None for raw in pipe.execute()]
+
+    def list_tasks(self, status: Optional[str] = None, kind: Optional[str] = None,
+                   offset: int = 0, limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Page of tasks, newest first
+
+        Args:
+            status (str): Only tasks currently in this status
+            kind (str): Only this kind (single, batch, batch_item); default is top-level tasks
+            offset (int): Entries to skip
+            limit (int): Page size
+
+        Returns:
+            Tuple[List[dict], int]: The page and the total number of matching tasks
+        """
+        client = get_redis()
+        source = self._kind_key(kind) if kind else self.index_key
+        if status:
+            # Intersect into a short-lived key so pagination stays a plain ZREVRANGE
+            source_key = f"{self.prefix}:query:{status}:{kind or 'index'}"
+            pipe = client.pipeline()
+            pipe.zinterstore(source_key, {source: 1, self._status_key(status): 0})
+            pipe.expire(source_key, 5)
+            pipe.execute()
+            source = source_key
+        pipe = client.pipeline(transaction=False)
+        pipe.zcard(source)
+        pipe.zrevrange(source, offset, offset + limit - 1)
+        total, task_ids = pipe.execute()
+        entries = [entry for entry in self.get_many(task_ids) if entry]
+        return entries, total
+
+
+task_registry = TaskRegistry(
+    retention_days=float(os.environ.get("TASK_REGISTRY_RETENTION_DAYS", 30))
+)
@@ -0,0 +1,141 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import logging
+import datetime
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _truncate(value: Any, limit: int) -> Any:
+    """Cap long strings inside a record so one huge page extract cannot blow up a trace file"""
+    if isinstance(value, str):
+        return value if len(value) <= limit else f"{value[:limit]}...[truncated {len(value) - limit} chars]"
+    if isinstance(value, list):
+        return [_truncate(item, limit) for item in value]
+    if isinstance(value, dict):
+        return {key: _truncate(item, limit) for key, item in value.items()}
+    return value
+
+
+class TraceWriter:
+    """
+    Gzip-compressed JSONL trace of agent runs, one record per agent step.
+
+    Records are keyed by task id and appended off the event loop. Files rotate
+    once they reach `max_file_bytes` and are deleted after `retention_days` or
+    when the directory grows past `max_total_bytes`. Each worker process writes
+    its own files, so prefork children never interleave writes.
+    """
+
+    def __init__(self, directory: str = "log/traces", max_file_bytes: int = 20 * 1024 * 1024,
+                 max_total_bytes: int = 500 * 1024 * 1024, retention_days: int = 7, max_field_chars: int = 4000):
+        self.directory = Path(directory)
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.retention_days = retention_days
+        self.max_field_chars = max_field_chars
+        self._lock = threading.Lock()
+        self._current: Optional[Path] = None
+        self._sequence = 0
+        self._last_cleanup = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_file_bytes > 0
+
+    def _new_file(self) -> Path:
+        self._sequence += 1
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        return self.directory / f"trace-{stamp}-{os.getpid()}-{self._sequence}.jsonl.gz"
+
+    def _target_file(self) -> Path:
+        today = datetime.date.today().strftime("%Y%m%d")
+        current = self._current
+        if (current is None or not current.exists() or today not in current.name
+                or current.stat().st_size >= self.max_file_bytes):
+            self._current = self._new_file()
+        return self._current
+
+    def _cleanup(self):
+        """Apply retention: drop files past the age limit, then oldest files over the size budget"""
+        cutoff = time.time() - self.retention_days * 24 * 3600
+        files = sorted(self.directory.glob("trace-*.jsonl.gz"), key=lambda p: p.stat().st_mtime)
+        total = 0
+        kept = []
+        for path in files:
+            stat = path.stat()
+            if stat.st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                continue
+            kept.append((path, stat.st_size))
+            total += stat.st_size
+        for path, size in kept:
+            if total <= self.max_total_bytes or path == self._current:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _append(self, lines: List[str]):
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._target_file()
+            # Each append is a separate gzip member; gzip readers concatenate members transparently
+            with gzip.open(path, "at", encoding="utf-8", compresslevel=6) as f:
+                f.writelines(lines)
+            if time.time() - self._last_cleanup > 3600:
+                self._last_cleanup = time.time()
+                self._cleanup()
+
+    def _records(self, task_id: Optional[str], url: str, history: Dict[str, Any], phase: str) -> List[str]:
+        lines = []
+        recorded_at = time.time()
+        for step_number, step in enumerate(history.get("history", []), start=1):
+            state = step.get("state") or {}
+            record = {
+                "task_id": task_id,
+                "url": url,
+                "phase": phase,
+                "step": step_number,
+                "recorded_at": recorded_at,
+                "page_url": state.get("url"),
+                "page_title": state.get("title"),
+                "model_output": step.get("model_output"),
+                "result": step.get("result"),
+                "metadata": step.get("metadata"),
+            }
+            lines.append(json.dumps(_truncate(record, self.max_field_chars), default=str, ensure_ascii=False) + "\n")
+        return lines
+
+    async def write_history(self, task_id: Optional[str], url: str, result, phase: str = "extraction"):
+        """
+        Append one record per step of an agent run
+
+        Args:
+            task_id (str): Celery task id the run belongs to
+            url (str): Crawled site URL
+            result (AgentHistoryList): History returned by `Agent.run()`
+            phase (str): Which agent produced the history (discovery, extraction, identity-N)
+        """
+        if not self.enabled or result is None:
+            return
+        try:
+            lines = self._records(task_id, url, result.model_dump(), phase)
+            if lines:
+                await asyncio.to_thread(self._append, lines)
+                logger.debug(f"💾 [TRACE] {len(lines)} step(s) ditulis untuk task {task_id} ({url})")
+        except Exception as e:
+            logger.warning(f"⚠️ [TRACE-FAILED] Gagal menulis trace untuk {url}: {str(e)}")
+
+
+trace_writer = TraceWriter(
+    directory=os.environ.get("TRACE_DIR", "log/traces"),
+    max_file_bytes=int(os.environ.get("TRACE_MAX_FILE_BYTES", 20 * 1024 * 1024)),
+    max_total_bytes=int(os.environ.get("TRACE_MAX_TOTAL_BYTES", 500 * 1024 * 1024)),
+    retention_days=int(os.environ.get("TRACE_RETENTION_DAYS", 7))
+)
@@ -1,14 +1,22 @@
-from celery import Celery
+from celery import Celery, chord
+from celery.utils import uuid
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown, worker_ready, task_prerun, task_postrun
 import os
 import asyncio
 import logging
+import threading
 import time
-from typing import Dict, Any
+import concurrent.futures
+from functools import partial
+from typing import Dict, Any, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Hard limit per task; the threads pool ignores celery's time limits, so _run_with_deadline enforces it
+TASK_TIME_LIMIT = int(os.environ.get("CELERY_TASK_TIME_LIMIT", 30 * 60))  # Default 30 minutes
+
 # Initialize Celery
 celery = Celery(__name__)
 celery.conf.broker_url = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0")
@@ -22,10 +30,14 @@ celery.conf.update(
     timezone='UTC',
     enable_utc=True,
     task_track_started=True,
-    task_time_limit=os.environ.get("CELERY_TASK_TIME_LIMIT", 30 * 60),  # Default 30 minutes
-    task_soft_time_limit=os.environ.get("CELERY_TASK_SOFT_TIME_LIMIT", 25 * 60),  # Default 25 minutes
+    # Enforced by the prefork/solo pools only, see _run_with_deadline for the threads pool
+    task_time_limit=TASK_TIME_LIMIT,
+    task_soft_time_limit=int(os.environ.get("CELERY_TASK_SOFT_TIME_LIMIT", 25 * 60)),  # Default 25 minutes
     worker_prefetch_multiplier=1,
-    worker_max_tasks_per_child=50,
+    # Count-based backstop (prefork only, ignored by the threads pool); memory_guard recycles on actual RSS
+    worker_max_tasks_per_child=int(os.environ.get("WORKER_MAX_TASKS_PER_CHILD", 50)),
+    # Prefork only: replace a child whose own RSS (KiB, Chromium not included) crossed the memory ceiling
+    worker_max_memory_per_child=int(float(os.environ.get("WORKER_MEMORY_CEILING_MB", 0)) * 1024) or None,
     # Result backend settings
     result_expires=3600,
     result_persistent=True,
@@ -34,12 +46,184 @@ celery.conf.update(
     task_ignore_result=False,
 )
 
-def _process_single_site(url: str, task_id: str, update_callback=None) -> Dict[str, Any]:
+# Staleness-driven re-crawls of known sites (run `celery -A src.worker beat` alongside the workers)
+from .recrawl_scheduler import RECRAWL_INTERVAL
+if RECRAWL_INTERVAL > 0:
+    celery.conf.beat_schedule = {
+        'jadwalkan-recrawl': {
+            'task': 'jadwalkan_recrawl',
+            'schedule': RECRAWL_INTERVAL,
+            'options': {'expires': RECRAWL_INTERVAL}
+        }
+    }
+
+# Pay cold-start costs when a worker process starts instead of in its first task
+WORKER_WARMUP = os.environ.get("WORKER_WARMUP", "true").lower() == "true"
+
+# Persistent event loop per worker process; runs up to CRAWL_CONCURRENCY crawls side by side
+# (start the worker with --pool=threads --concurrency=CRAWL_CONCURRENCY so tasks can overlap)
+def _run_async(coro):
+    """Run a crawl coroutine on this process' shared crawl executor loop"""
+    from .crawl_executor import crawl_executor
+    return crawl_executor.run(coro)
+
+def _run_with_deadline(body, *args):
+    """
+    Run a task body on its own thread and stop waiting for it after TASK_TIME_LIMIT seconds
+    
+    The threads pool enforces neither task_time_limit/task_soft_time_limit nor
+    worker_max_tasks_per_child. The crawl is cancelled by the crawl executor timeout
+    (CRAWL_TIMEOUT), but the Neo4j store, checkpoint and spool writes around it are not,
+    so this bounds the whole body. A thread cannot be killed: a body that overruns is
+    abandoned and the task fails with TimeoutError.
+    """
+    future = concurrent.futures.Future()
+    
+    def _target():
+        try:
+            future.set_result(body(*args))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=_target, name="task-body", daemon=True).start()
+    try:
+        return future.result(timeout=TASK_TIME_LIMIT)
+    except concurrent.futures.TimeoutError:
+        logger.error(f"⏰ [TASK-DEADLINE] Task melewati batas {TASK_TIME_LIMIT}s, thread task ditinggalkan")
+        raise TimeoutError(f"Task exceeded {TASK_TIME_LIMIT}s time limit")
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _shutdown_browser_pool(**kwargs):
+    """Close pooled browsers and stop the executor loop when the process exits (recycling or shutdown)"""
+    from .browser_pool import browser_pool
+    from .crawl_executor import crawl_executor
+    crawl_executor.shutdown(cleanup=browser_pool.close)
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _withdraw_readiness(**kwargs):
+    from .worker_warmup import worker_warmup
+    worker_warmup.mark_stopped()
+
+@worker_process_init.connect
+def _warm_child_process(**kwargs):
+    """Preload imports, Neo4j, the LLM client and pooled browsers in each new prefork/solo child"""
+    from .worker_warmup import worker_warmup
+    if WORKER_WARMUP:
+        worker_warmup.start()
+
+@worker_ready.connect
+def _warm_main_process(sender=None, **kwargs):
+    """The threads pool runs tasks in the main process, which never sees worker_process_init"""
+    from .worker_warmup import worker_warmup
+    pool_cls = getattr(getattr(sender, 'controller', None), 'pool_cls', None)
+    if WORKER_WARMUP and 'prefork' not in getattr(pool_cls, '__module__', ''):
+        worker_warmup.start()
+
+# Celery task name -> registry kind
+TASK_KINDS = {
+    'cari_rekening_mencurigakan': 'single',
+    'cari_multiple_situs': 'batch',
+    'proses_situs_batch_item': 'batch_item'
+}
+
+def _publish_progress(task_id: Optional[str], state: str, meta: Any = None, **fields):
+    """Fan a status change out to the task's event channel (SSE) and the task registry (GET /tasks)"""
+    from .task_events import task_events
+    from .task_registry import task_registry
+    
+    task_events.publish(task_id, state, meta)
+    task_registry.record(task_id, state, result=meta, **fields)
+
+def _progress_callback(task_id: str, update_state=None):
+    """update_callback that also publishes each update"""
+    def _update(state: str, meta: Dict[str, Any]):
+        if update_state:
+            update_state(state=state, meta=meta)
+        _publish_progress(task_id, state, meta)
+    
+    return _update
+
+@task_prerun.connect
+def _publish_task_started(task_id=None, task=None, **kwargs):
+    _publish_progress(task_id, 'STARTED', {'message': 'Task mulai diproses'}, kind=TASK_KINDS.get(getattr(task, 'name', None)))
+
+@task_postrun.connect
+def _publish_task_finished(task_id=None, retval=None, state=None, **kwargs):
+    """Final event with the same result GET /tasks/{task_id} returns; replaced tasks publish from their chord callback"""
+    from .task_events import TERMINAL_STATES
+    if state not in TERMINAL_STATES:
+        return
+    result = retval if state == 'SUCCESS' else {'error': str(retval)}
+    # Tasks report crawl errors in their result rather than raising; list them as failed
+    if state == 'SUCCESS' and isinstance(retval, dict) and retval.get('status') == 'FAILURE':
+        state = 'FAILURE'
+    _publish_progress(task_id, state, result)
+
+@task_postrun.connect
+def _recycle_on_memory_ceiling(**kwargs):
+    """Retire this process' pooled browsers once RSS crosses the ceiling; running crawls keep their browser until done"""
+    from .memory_guard import memory_guard
+    from .metrics import metrics_recorder
+    from .browser_pool import browser_pool
+    from .crawl_executor import crawl_executor
+    if memory_guard.should_recycle():
+        metrics_recorder.record_recycle()
+        crawl_executor.schedule(browser_pool.recycle())
+
+def _replay_spool() -> int:
+    """Reconnect to Neo4j if needed and drain spooled results into it"""
+    from .database import db_handler
+    from .write_spool import write_spool
+    
+    if not db_handler._check_connection():
+        db_handler.close()
+        if not db_handler.connect(max_retries=1, retry_delay=0):
+            return 0
+    return write_spool.drain(db_handler.store_gambling_site_data, db_handler._check_connection)
+
+@worker_ready.connect
+def _start_spool_replayer(**kwargs):
+    """Drain results spooled while Neo4j was down, in the background for the life of the worker"""
+    from .write_spool import write_spool
+    write_spool.start_replayer(_replay_spool)
+
+# Storage outcome -> status recorded in crawl metrics
+STORAGE_METRIC_STATUS = {'STORED': 'SUCCESS', 'QUEUED': 'QUEUED', 'SPOOLED': 'SPOOLED', 'FAILED': 'STORAGE_FAILED'}
+
+def _store_site_data(gambling_data, task_id: Optional[str]) -> str:
+    """
+    Store one extraction result (or hand it to the bulk writer), spooling it locally when Neo4j is unreachable
+    
+    Returns:
+        str: 'STORED', 'QUEUED' (pipeline mode, written by the bulk writer),
+        'SPOOLED' (replayed once the database is back) or 'FAILED'
+    """
+    from .database import db_handler
+    from .write_spool import write_spool
+    from .result_stream import WRITE_PIPELINE, result_stream
+    
+    if WRITE_PIPELINE and result_stream.publish(gambling_data, task_id):
+        return 'QUEUED'
+    if db_handler.store_gambling_site_data(gambling_data):
+        return 'STORED'
+    if write_spool.enabled and not db_handler._check_connection() and write_spool.append(gambling_data, task_id):
+        return 'SPOOLED'
+    return 'FAILED'
+
+def _process_single_site(url: str, task_id: str, update_callback=None, options: Optional[Dict[str, Any]] = None,
+                         resume_from: Optional[str] = None) -> Dict[str, Any]:
     from .crawler import extract_gambling_financial_data
     from .database import db_handler
-    from .model import CrawlResult
+    from .model import CrawlOptions, CrawlResult, GamblingSiteData
+    from .metrics import metrics_recorder
+    from .checkpoint_store import checkpoint_store
     
     start_time = time.time()
+    crawl_options = CrawlOptions.model_validate({**(options or {}), "task_id": task_id})
+    checkpoint = checkpoint_store.load(resume_from) if resume_from else None
+    checkpoint_store.start(task_id, url, options, resumed_from=resume_from)
     
     try:
         logger.info(f"Mulai pencarian rekening mencurigakan untuk URL: {url} (Task ID: {task_id})")
@@ -54,18 +238,41 @@ def _process_single_site(url: str, task_id: str, update_callback=None) -> Dict[s
             db_handler.connect()
             db_handler.create_indexes()
         
-        gambling_data = asyncio.run(extract_gambling_financial_data(url))
+        if checkpoint_store.reached(checkpoint, 'parsed'):
+            # Extraction already paid for: resume straight at the store step
+            logger.info(f"Melanjutkan task {resume_from} dari checkpoint '{checkpoint['phase']}' untuk URL: {url}")
+            gambling_data = GamblingSiteData.model_validate(checkpoint['gambling_data'])
+        else:
+            if checkpoint_store.reached(checkpoint, 'discovery'):
+                crawl_options.payment_methods = checkpoint.get('discovery')
+            gambling_data = _run_async(extract_gambling_financial_data(url, crawl_options))
         
         if not gambling_data:
             raise Exception("Gagal mengekstrak data dari situs judi")
         
+        # Error results are still stored as before, but are not checkpointed so a retry re-crawls
+        extraction_failed = gambling_data.site_info.site_name.startswith("ERROR:")
+        if not extraction_failed:
+            checkpoint_store.save(
+                task_id, 'screenshots',
+                gambling_data=gambling_data,
+                screenshot_keys={acc.account_number: acc.oss_key for acc in gambling_data.bank_accounts if acc.oss_key}
+            )
+        
         if update_callback:
             update_callback(
                 state='PROCESSING',
                 meta={'status': 'Menyimpan data ke database Neo4j', 'url': url}
             )
         
-        storage_success = db_handler.store_gambling_site_data(gambling_data)
+        with gambling_data.metrics.phase("neo4j_store"):
+            storage_status = _store_site_data(gambling_data, task_id)
+        storage_success = storage_status != 'FAILED'
+        metrics_recorder.record(gambling_data.metrics, STORAGE_METRIC_STATUS[storage_status])
+        checkpoint_store.save(
+            task_id, 'stored' if storage_status == 'STORED' and not extraction_failed else None,
+            store_status=storage_status
+        )
         
         if not storage_success:
             if not db_handler._check_connection():
@@ -90,11 +297,15 @@ def _process_single_site(url: str, task_id: str, update_callback=None) -> Dict[s
             'status': 'SUCCESS',
             'url': url,
             'task_id': task_id,
+            'crawl_mode': crawl_options.crawl_mode.value,
             'processing_time': processing_time,
             'rekening_ditemukan': len(gambling_data.bank_accounts),
             'crypto_ditemukan': len(gambling_data.crypto_wallets),
             'payment_ditemukan': len(gambling_data.payment_gateways),
-            'nama_situs': gambling_data.site_info.site_name
+            'nama_situs': gambling_data.site_info.site_name,
+            'status_penyimpanan': storage_status,
+            'identitas': [outcome.model_dump() for outcome in gambling_data.identity_outcomes],
+            'metrics': gambling_data.metrics.model_dump()
         }
         
     except Exception as e:
@@ -129,12 +340,15 @@ def _process_single_site(url: str, task_id: str, update_callback=None) -> Dict[s
         
         return error_result
 
-def _process_multiple_sites(urls: list, task_id: str, update_callback=None) -> Dict[str, Any]:
+def _process_multiple_sites(urls: list, task_id: str, update_callback=None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Core logic for processing multiple gambling sites - extracted for testing"""
     from .crawler import extract_gambling_financial_data
     from .database import db_handler
+    from .model import CrawlOptions
+    from .metrics import metrics_recorder
     
     start_time = time.time()
+    crawl_options = CrawlOptions.model_validate({**(options or {}), "task_id": task_id})
     
     try:
         logger.info(f"Mulai batch processing {len(urls)} situs judi (Task ID: {task_id})")
@@ -165,24 +379,30 @@ def _process_multiple_sites(urls: list, task_id: str, update_callback=None) -> D
                         }
                     )
                 
-                gambling_data = asyncio.run(extract_gambling_financial_data(url))
-                storage_success = db_handler.store_gambling_site_data(gambling_data)
+                gambling_data = _run_async(extract_gambling_financial_data(url, crawl_options))
+                with gambling_data.metrics.phase("neo4j_store"):
+                    storage_status = _store_site_data(gambling_data, task_id)
+                metrics_recorder.record(gambling_data.metrics, STORAGE_METRIC_STATUS[storage_status])
                 
-                if storage_success:
+                if storage_status != 'FAILED':
                     berhasil_ekstraksi += 1
                     results.append({
                         'url': url,
                         'status': 'SUCCESS',
+                        'status_penyimpanan': storage_status,
                         'rekening_mencurigakan': len(gambling_data.bank_accounts),
                         'crypto_wallets': len(gambling_data.crypto_wallets),
-                        'payment_methods': len(gambling_data.payment_gateways)
+                        'payment_methods': len(gambling_data.payment_gateways),
+                        'identitas': [outcome.model_dump() for outcome in gambling_data.identity_outcomes],
+                        'metrics': gambling_data.metrics.model_dump()
                     })
                 else:
                     gagal_ekstraksi += 1
                     results.append({
                         'url': url,
                         'status': 'STORAGE_FAILED',
-                        'error': 'Gagal menyimpan ke database'
+                        'error': 'Gagal menyimpan ke database',
+                        'metrics': gambling_data.metrics.model_dump()
                     })
                     
             except Exception as e:
@@ -221,12 +441,149 @@ def _process_multiple_sites(urls: list, task_id: str, update_callback=None) -> D
         }
 
 @celery.task(bind=True, name='cari_rekening_mencurigakan')
-def cari_rekening_mencurigakan(self, url: str) -> Dict[str, Any]:
-    """Celery task wrapper for single site processing"""
-    return _process_single_site(url, self.request.id, self.update_state)
+def cari_rekening_mencurigakan(self, url: str, options: Optional[Dict[str, Any]] = None, resume_from: Optional[str] = None) -> Dict[str, Any]:
+    """Celery task wrapper for single site processing (resume_from: task id whose checkpoint to continue)"""
+    from .memory_guard import memory_guard
+    with memory_guard.track() as memori:
+        result = _run_with_deadline(
+            _process_single_site, url, self.request.id,
+            _progress_callback(self.request.id, partial(self.update_state, self.request.id)), options, resume_from
+        )
+    return {**result, 'memori': memori}
+
+# Batches fan out into one subtask per URL across the worker fleet; set false for the sequential loop
+BATCH_FAN_OUT = os.environ.get("BATCH_FAN_OUT", "true").lower() == "true"
+
+def _batch_item_result(url: str, site_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a single-site task result into one entry of the batch `results` list"""
+    if site_result.get('status') == 'SUCCESS':
+        return {
+            'url': url,
+            'status': 'SUCCESS',
+            'rekening_mencurigakan': site_result.get('rekening_ditemukan', 0),
+            'crypto_wallets': site_result.get('crypto_ditemukan', 0),
+            'payment_methods': site_result.get('payment_ditemukan', 0),
+            'status_penyimpanan': site_result.get('status_penyimpanan'),
+            'identitas': site_result.get('identitas', []),
+            'metrics': site_result.get('metrics')
+        }
+    return {
+        'url': url,
+        'status': 'FAILED',
+        'error': site_result.get('error_message') or site_result.get('exc_message', 'Unknown error')
+    }
+
+def _report_batch_progress(batch_id: str, item_id: str, url: str, total: int):
+    """Count a finished subtask (once, even when it is retried) and publish the batch progress on the parent task id"""
+    from celery import states
+    from .redis_client import get_redis
+    
+    # A set of finished subtask ids: a retried or redelivered subtask is not counted twice
+    finished_key = f"batch:{batch_id}:selesai"
+    try:
+        redis_client = get_redis()
+        pipe = redis_client.pipeline()
+        pipe.sadd(finished_key, item_id)
+        pipe.expire(finished_key, celery.conf.result_expires or 3600)
+        pipe.scard(finished_key)
+        done = pipe.execute()[-1]
+    except Exception as e:
+        logger.warning(f"Gagal update progress batch {batch_id}: {e}")
+        return
+    if done >= total:
+        return  # the chord callback writes the final result
+    # The chord callback stores its result under the same id; never overwrite it with progress
+    if celery.backend.get_task_meta(batch_id).get('status') in states.READY_STATES:
+        return
+    progress = {
+        'status': f'Memproses situs {done}/{total}',
+        'current_url': url,
+        'selesai': done,
+        'total': total,
+        'progress': (done / total) * 100
+    }
+    celery.backend.store_result(batch_id, progress, 'PROCESSING')
+    _publish_progress(batch_id, 'PROCESSING', progress)
+
+@celery.task(bind=True, name='proses_situs_batch_item')
+def proses_situs_batch_item(self, url: str, batch_id: str, total: int, options: Optional[Dict[str, Any]] = None,
+                            resume_from: Optional[str] = None) -> Dict[str, Any]:
+    """One URL of a fanned-out batch; never raises so the chord callback always runs"""
+    from .memory_guard import memory_guard
+    with memory_guard.track() as memori:
+        try:
+            site_result = _run_with_deadline(_process_single_site, url, self.request.id, _progress_callback(self.request.id), options, resume_from)
+        except Exception as e:
+            logger.error(f"Subtask batch {batch_id} gagal untuk {url}: {e}")
+            site_result = {'status': 'FAILURE', 'error_message': str(e)}
+    _report_batch_progress(batch_id, self.request.id, url, total)
+    return {**_batch_item_result(url, site_result), 'memori': memori}
+
+@celery.task(bind=True, name='gabungkan_hasil_batch')
+def gabungkan_hasil_batch(self, results: list, batch_id: str, total: int, started_at: float) -> Dict[str, Any]:
+    """Chord callback: aggregate subtask results into the batch summary shape"""
+    berhasil_ekstraksi = sum(1 for item in results if item.get('status') == 'SUCCESS')
+    processing_time = time.time() - started_at
+    logger.info(f"Batch {batch_id} selesai: {berhasil_ekstraksi}/{total} berhasil dalam {processing_time:.2f} detik")
+    return {
+        'status': 'COMPLETED',
+        'task_id': batch_id,
+        'processing_time': processing_time,
+        'total_situs': total,
+        'berhasil_ekstraksi': berhasil_ekstraksi,
+        'gagal_ekstraksi': len(results) - berhasil_ekstraksi,
+        'results': results
+    }
 
 @celery.task(bind=True, name='cari_multiple_situs')
-def cari_multiple_situs(self, urls: list) -> Dict[str, Any]:
-    """Celery task wrapper for multiple site processing"""
-    return _process_multiple_sites(urls, self.request.id, self.update_state)
+def cari_multiple_situs(self, urls: list, options: Optional[Dict[str, Any]] = None, resume_from: Optional[list] = None) -> Dict[str, Any]:
+    """Celery task wrapper for multiple site processing (resume_from: per-URL task ids whose checkpoints to continue)"""
+    from .checkpoint_store import checkpoint_store
+    from .task_registry import task_registry
+    
+    if not resume_from and (not BATCH_FAN_OUT or len(urls) < 2):
+        from .memory_guard import memory_guard
+        with memory_guard.track() as memori:
+            result = _run_with_deadline(
+                _process_multiple_sites, urls, self.request.id,
+                _progress_callback(self.request.id, partial(self.update_state, self.request.id)), options
+            )
+        return {**result, 'memori': memori}
+    
+    batch_id = self.request.id
+    logger.info(f"Fan-out batch {len(urls)} situs judi ke worker (Task ID: {batch_id})")
+    _progress_callback(batch_id, self.update_state)(
+        state='PROCESSING',
+        meta={'status': f'Memproses {len(urls)} situs judi', 'urls': urls, 'selesai': 0, 'total': len(urls), 'progress': 0}
+    )
+    # Subtask ids are assigned up front and checkpointed so a retry can resume each URL
+    item_ids = [uuid() for _ in urls]
+    checkpoint_store.save_batch(batch_id, urls, options, item_ids)
+    for url, item_id in zip(urls, item_ids):
+        task_registry.record(item_id, 'PENDING', kind='batch_item', urls=[url], parent_id=batch_id)
+    resume_from = resume_from or [None] * len(urls)
+    header = [
+        proses_situs_batch_item.s(url, batch_id, len(urls), options, resume_id).set(task_id=item_id)
+        for url, item_id, resume_id in zip(urls, item_ids, resume_from)
+    ]
+    callback = gabungkan_hasil_batch.s(batch_id=batch_id, total=len(urls), started_at=time.time())
+    # The chord callback takes over this task id, so GET /tasks/{batch_id} returns the aggregated summary
+    return self.replace(chord(header, callback))
 
+@celery.task(bind=True, name='jadwalkan_recrawl')
+def jadwalkan_recrawl(self) -> Dict[str, Any]:
+    """Beat task: enqueue re-crawls of the known sites most likely to show new accounts"""
+    from .recrawl_scheduler import recrawl_scheduler
+    from .task_registry import task_registry
+    
+    def _enqueue(site: Dict[str, Any]) -> str:
+        task = cari_rekening_mencurigakan.delay(site['original_url'], {})
+        task_registry.record(task.id, 'PENDING', kind='single', urls=[site['original_url']], options={}, trigger='recrawl')
+        return task.id
+    
+    scheduled = recrawl_scheduler.tick(_enqueue)
+    return {
+        'status': 'SUCCESS',
+        'dijadwalkan': len(scheduled),
+        'situs': [{'url': site['original_url'], 'task_id': site['task_id'], 'score': site['score']} for site in scheduled]
+    }
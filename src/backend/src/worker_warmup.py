@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerWarmup:
+    """
+    Pays a worker process' cold-start costs before its first task and reports readiness.
+
+    `start()` runs the warm-up steps once per process on a background thread (Celery
+    kills prefork children that block too long in `worker_process_init`). When every
+    step has run, the process writes `ready_file` (used by the container healthcheck)
+    and registers itself in the `{prefix}` Redis hash with per-step timings.
+    A failed step is logged and skipped; the task path still initializes lazily.
+    """
+
+    def __init__(self, ready_file: str = "/tmp/spiderman-worker.ready", prefix: str = "workers:ready",
+                 warm_browsers: bool = True):
+        self.ready_file = Path(ready_file)
+        self.prefix = prefix
+        self.warm_browsers = warm_browsers
+        self._started = False
+        self._lock = threading.Lock()
+        self.ready = threading.Event()
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def worker_id(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _import_crawler(self):
+        from . import crawler  # noqa: F401  (pulls in browser_use, playwright and the LLM SDKs)
+
+    def _connect_database(self):
+        from .database import db_handler
+        if not db_handler.connected:
+            if db_handler.connect():
+                db_handler.create_indexes()
+
+    def _build_llm_client(self):
+        from .config import get_llm_config
+        get_llm_config()
+
+    def _connect_redis(self):
+        get_redis().ping()
+
+    def _warm_browsers(self):
+        from .browser_pool import browser_pool
+        from .crawl_executor import crawl_executor
+        crawl_executor.run(browser_pool.warm_up(), timeout=120)
+
+    def steps(self) -> List[Tuple[str, Callable[[], Any]]]:
+        steps = [
+            ("imports", self._import_crawler),
+            ("redis", self._connect_redis),
+            ("neo4j", self._connect_database),
+            ("llm_client", self._build_llm_client),
+        ]
+        if self.warm_browsers:
+            steps.append(("browser_pool", self._warm_browsers))
+        return steps
+
+    def _run(self):
+        started = time.time()
+        for name, step in self.steps():
+            step_started = time.time()
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"⚠️ [WORKER-WARMUP] Langkah {name} gagal, akan diinisialisasi saat task pertama: {e}")
+            self.timings[name] = round(time.time() - step_started, 3)
+        self.timings["total"] = round(time.time() - started, 3)
+        self._mark_ready()
+        logger.info(f"🔥 [WORKER-WARMUP] Worker {self.worker_id} siap dalam {self.timings['total']}s {self.timings}")
+
+    def _mark_ready(self):
+        self.ready.set()
+        try:
+            self.ready_file.parent.mkdir(parents=True, exist_ok=True)
+            self.ready_file.write_text(json.dumps({"pid": os.getpid(), "ready_at": time.time(), "timings": self.timings}))
+        except OSError as e:
+            logger.warning(f"⚠️ [WORKER-WARMUP] Gagal menulis ready file {self.ready_file}: {e}")
+        try:
+            get_redis().hset(self.prefix, self.worker_id, json.dumps({"ready_at": time.time(), "timings": self.timings}))
+        except Exception as e:
+            logger.warning(f"⚠️ [WORKER-WARMUP] Gagal mendaftarkan readiness ke Redis: {e}")
+
+    def start(self):
+        """Warm this process once (idempotent); returns immediately"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, name="worker-warmup", daemon=True).start()
+
+    def mark_stopped(self):
+        """Withdraw readiness when the process shuts down or recycles"""
+        self.ready.clear()
+        try:
+            # Prefork children share the file; only the process that wrote it removes it
+            if json.loads(self.ready_file.read_text()).get("pid") == os.getpid():
+                self.ready_file.unlink()
+        except (OSError, ValueError):
+            pass
+        try:
+            get_redis().hdel(self.prefix, self.worker_id)
+        except Exception:
+            pass
+
+    def ready_workers(self) -> Dict[str, Dict[str, Any]]:
+        """Readiness entries of every warmed worker process"""
+        return {worker: json.loads(info) for worker, info in get_redis().hgetall(self.prefix).items()}
+
+
+worker_warmup = WorkerWarmup(
+    ready_file=os.environ.get("WORKER_READY_FILE", "/tmp/spiderman-worker.ready"),
+    warm_browsers=os.environ.get("WORKER_WARM_BROWSERS", "true").lower() == "true"
+)
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from .model import GamblingSiteData
+
+logger = logging.getLogger(__name__)
+
+
+class WriteSpool:
+    """
+    Durable append-only queue of extraction results that could not be written to Neo4j.
+
+    Records are JSON lines appended (and fsynced) to `pending.jsonl` under the worker
+    data dir. A replayer claims the file by renaming it to `draining-*.jsonl`, stores
+    each record, and deletes it once drained. Records still pending when the database
+    drops again are appended back; records Neo4j rejects while connected go to
+    `rejected.jsonl` for inspection. Delivery is at-least-once, which is safe because
+    every store query MERGEs.
+    """
+
+    def __init__(self, directory: str = "data/spool", replay_interval: float = 30.0):
+        self.directory = Path(directory)
+        self.replay_interval = replay_interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.replay_interval > 0
+
+    @property
+    def pending_path(self) -> Path:
+        return self.directory / "pending.jsonl"
+
+    @property
+    def rejected_path(self) -> Path:
+        return self.directory / "rejected.jsonl"
+
+    @contextmanager
+    def _locked(self, name: str, blocking: bool = True):
+        """Cross-process file lock; yields False when non-blocking and already held"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / name, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_lines(self, path: Path, lines: List[str]):
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, data: GamblingSiteData, task_id: Optional[str] = None) -> bool:
+        """
+        Persist one extraction result for later replay
+
+        Args:
+            data (GamblingSiteData): Result that failed to store
+            task_id (str): Celery task that produced it
+
+        Returns:
+            bool: True once the record is on disk
+        """
+        record = {
+            "task_id": task_id,
+            "url": data.site_info.site_url,
+            "queued_at": time.time(),
+            "data": data.model_dump(mode="json")
+        }
+        try:
+            with self._locked("append.lock"):
+                self._write_lines(self.pending_path, [json.dumps(record, ensure_ascii=False) + "\n"])
+            logger.warning(f"📥 [SPOOL] Hasil {record['url']} disimpan ke spool lokal (task {task_id})")
+            return True
+        except Exception as e:
+            logger.error(f"❌ [SPOOL] Gagal menulis spool untuk {record['url']}: {e}")
+            return False
+
+    def pending_count(self) -> int:
+        """Records waiting for replay, including a claimed file that is mid-drain"""
+        count = 0
+        for path in [self.pending_path, *self.directory.glob("draining-*.jsonl")]:
+            if path.exists():
+                with open(path, encoding="utf-8") as f:
+                    count += sum(1 for line in f if line.strip())
+        return count
+
+    def _claim(self) -> List[Path]:
+        """Rename pending.jsonl so new appends start a fresh file; also pick up files left by a crashed drain"""
+        with self._locked("append.lock"):
+            if self.pending_path.exists() and self.pending_path.stat().st_size > 0:
+                self.pending_path.rename(self.directory / f"draining-{time.time_ns()}.jsonl")
+        return sorted(self.directory.glob("draining-*.jsonl"))
+
+    def drain(self, store: Callable[[GamblingSiteData], bool], is_connected: Callable[[], bool]) -> int:
+        """
+        Replay spooled records into the database
+
+        Args:
+            store: Writes one GamblingSiteData, returning True on success
+            is_connected: Tells a lost connection apart from a rejected record
+
+        Returns:
+            int: Number of records stored
+        """
+        stored = 0
+        with self._locked("replay.lock", blocking=False) as acquired:
+            if not acquired:
+                return 0  # another replayer owns this data dir
+            for path in self._claim():
+                with open(path, encoding="utf-8") as f:
+                    lines = [line for line in f if line.strip()]
+                rejected = []
+                for position, line in enumerate(lines):
+                    try:
+                        record = json.loads(line)
+                        data = GamblingSiteData.model_validate(record["data"])
+                    except Exception as e:
+                        logger.error(f"❌ [SPOOL] Record spool rusak dilewati: {e}")
+                        rejected.append(line)
+                        continue
+                    if store(data):
+                        stored += 1
+                        continue
+                    if not is_connected():
+                        # Database dropped again: hand the rest back to pending and stop
+                        with self._locked("append.lock"):
+                            self._write_lines(self.pending_path, lines[position:])
+                        if rejected:
+                            self._write_lines(self.rejected_path, rejected)
+                        path.unlink(missing_ok=True)
+                        logger.warning(f"⚠️ [SPOOL] Koneksi Neo4j terputus saat replay, {len(lines) - position} record dikembalikan ke spool")
+                        return stored
+                    logger.error(f"❌ [SPOOL] Record {record.get('url')} ditolak database, dipindah ke {self.rejected_path.name}")
+                    rejected.append(line)
+                if rejected:
+                    self._write_lines(self.rejected_path, rejected)
+                path.unlink(missing_ok=True)
+        if stored:
+            logger.info(f"✅ [SPOOL] {stored} record spool berhasil direplay ke Neo4j")
+        return stored
+
+    def start_replayer(self, replay_once: Callable[[], int]):
+        """Run `replay_once` every `replay_interval` seconds on a daemon thread (idempotent)"""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(self.replay_interval):
+                try:
+                    if self.pending_path.exists() or any(self.directory.glob("draining-*.jsonl")):
+                        replay_once()
+                except Exception as e:
+                    logger.warning(f"⚠️ [SPOOL] Replay gagal: {e}")
+
+        self._thread = threading.Thread(target=_loop, name="spool-replayer", daemon=True)
+        self._thread.start()
+        logger.info(f"🔁 [SPOOL] Replayer aktif untuk {self.directory} (interval {self.replay_interval}s)")
+
+    def stop_replayer(self):
+        self._stop.set()
+
+
+write_spool = WriteSpool(
+    directory=os.path.join(os.environ.get("WORKER_DATA_DIR", "data"), "spool"),
+    replay_interval=float(os.environ.get("SPOOL_REPLAY_INTERVAL", 30))
+)
@@ -0,0 +1,77 @@
+import asyncio
+
+from browser_use.llm.views import ChatInvokeCompletion, ChatInvokeUsage
+from browser_use.tokens.service import TokenCost
+
+from src.model import CrawlMetrics
+
+
+class StubLLM:
+    provider = "stub"
+    model = "stub-model"
+
+    async def ainvoke(self, messages, output_format=None):
+        return ChatInvokeCompletion(
+            completion="{}",
+            usage=ChatInvokeUsage(
+                prompt_tokens=120,
+                prompt_cached_tokens=None,
+                prompt_cache_creation_tokens=None,
+                prompt_image_tokens=None,
+                completion_tokens=30,
+                total_tokens=150
+            )
+        )
+
+
+class StubHistory:
+    def number_of_steps(self):
+        return 3
+
+    def urls(self):
+        return ["about:blank", "https://example.com/", "https://example.com/deposit", "https://example.com/"]
+
+
+def _stubbed_run(token_cost: TokenCost, llm_calls: int):
+    """Same wiring as Agent.__init__: the service wraps the LLM, every ainvoke is recorded"""
+    llm = token_cost.register_llm(StubLLM())
+
+    async def run():
+        for _ in range(llm_calls):
+            await llm.ainvoke([])
+        await asyncio.sleep(0)  # let the usage log tasks finish
+
+    asyncio.run(run())
+
+
+def test_record_usage_counts_calls_and_tokens():
+    token_cost = TokenCost()
+    _stubbed_run(token_cost, llm_calls=2)
+
+    metrics = CrawlMetrics()
+    metrics.record_usage(token_cost)
+
+    assert metrics.llm_calls == 2
+    assert metrics.prompt_tokens == 240
+    assert metrics.completion_tokens == 60
+
+
+def test_record_usage_accumulates_across_agents():
+    metrics = CrawlMetrics()
+    for calls in (1, 3):
+        token_cost = TokenCost()
+        _stubbed_run(token_cost, llm_calls=calls)
+        metrics.record_usage(token_cost)
+
+    assert metrics.llm_calls == 4
+    assert metrics.prompt_tokens == 480
+
+
+def test_record_history_counts_steps_and_distinct_pages():
+    metrics = CrawlMetrics()
+    metrics.record_history(StubHistory())
+    metrics.record_history(None)
+
+    assert metrics.agent_steps == 3
+    assert metrics.pages_visited == 2
+    assert metrics.llm_calls == 0
@@ -0,0 +1,32 @@
+import pytest
+
+from src import model
+from src.model import CrawlMode, CrawlOptions
+
+
+@pytest.mark.parametrize("raw", ["single_pass", "SINGLE_PASS", "single-pass", " Single-Pass "])
+def test_crawl_mode_accepts_case_and_hyphen_variants(raw):
+    assert CrawlMode(raw) is CrawlMode.SINGLE_PASS
+
+
+def test_crawl_mode_rejects_unknown_values():
+    with pytest.raises(ValueError):
+        CrawlMode("three_phase")
+
+
+def test_default_crawl_mode_from_environment(monkeypatch):
+    monkeypatch.setenv("CRAWL_MODE", "Single-Pass")
+
+    assert model._default_crawl_mode() is CrawlMode.SINGLE_PASS
+
+
+def test_invalid_default_crawl_mode_falls_back_to_two_phase(monkeypatch, caplog):
+    monkeypatch.setenv("CRAWL_MODE", "turbo")
+
+    assert model._default_crawl_mode() is CrawlMode.TWO_PHASE
+    assert "turbo" in caplog.text
+
+
+def test_crawl_options_validate_request_values():
+    assert CrawlOptions.model_validate({"crawl_mode": "SINGLE-PASS"}).crawl_mode is CrawlMode.SINGLE_PASS
+    assert CrawlOptions().crawl_mode is model.DEFAULT_CRAWL_MODE
@@ -0,0 +1,43 @@
+from src.crawler import IndonesianAccountExtractor
+from src.model import BankAccount, CryptoWallet, GamblingSiteData, PaymentGateway, SiteInfo
+
+
+def _result(registered, accounts=(), wallets=(), gateways=(), notes=None):
+    return GamblingSiteData(
+        site_info=SiteInfo(site_name="situs.example", site_url="https://situs.example", registration_success=registered,
+                           accessibility_notes=notes),
+        bank_accounts=[BankAccount(bank_name=bank, account_number=number, account_holder=holder) for bank, number, holder in accounts],
+        crypto_wallets=[CryptoWallet(wallet_address=address, cryptocurrency="USDT") for address in wallets],
+        payment_gateways=[PaymentGateway(gateway_name=name) for name in gateways]
+    )
+
+
+def test_merge_drops_duplicates_across_identities():
+    first = _result(False, accounts=[("BCA", "123-456-7890", "BUDI")], wallets=["0xABC"], gateways=["QRIS"])
+    second = _result(True, accounts=[("BCA", "1234567890", "BUDI"), ("BRI", "9876543210", "SITI")],
+                     wallets=["0xabc", None], gateways=["qris", "OVO"])
+
+    merged = IndonesianAccountExtractor()._merge_site_data([first, second])
+
+    assert [account.account_number for account in merged.bank_accounts] == ["123-456-7890", "9876543210"]
+    assert [wallet.wallet_address for wallet in merged.crypto_wallets] == ["0xABC"]
+    assert [gateway.gateway_name for gateway in merged.payment_gateways] == ["QRIS", "OVO"]
+
+
+def test_merge_reports_registration_from_any_identity():
+    first = _result(False, notes="gagal daftar")
+    second = _result(True, notes="berhasil daftar")
+
+    merged = IndonesianAccountExtractor()._merge_site_data([first, second])
+
+    assert merged.site_info.registration_success is True
+    assert merged.site_info.accessibility_notes == "berhasil daftar"
+    # Inputs are not mutated by the merge
+    assert first.site_info.registration_success is False
+
+
+def test_merge_without_registration_keeps_first_site_info():
+    merged = IndonesianAccountExtractor()._merge_site_data([_result(False, notes="a"), _result(None, notes="b")])
+
+    assert merged.site_info.registration_success is False
+    assert merged.site_info.accessibility_notes == "a"
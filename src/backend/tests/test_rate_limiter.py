@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from src import rate_limiter
+from src.rate_limiter import RateLimiter, limiter_domain
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeBucketRedis:
+    """Runs TOKEN_BUCKET_SCRIPT's logic in Python against the fake clock"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.buckets = {}
+
+    def register_script(self, script):
+        assert script == rate_limiter.TOKEN_BUCKET_SCRIPT
+
+        async def run(keys, args):
+            rate, burst, cost = (float(arg) for arg in args)
+            tokens, ts = self.buckets.get(keys[0], (burst, self.clock.now))
+            tokens = min(burst, tokens + max(0.0, self.clock.now - ts) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self.buckets[keys[0]] = (tokens, self.clock.now)
+            return str(wait)
+
+        return run
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", clock.sleep)
+    redis = FakeBucketRedis(clock)
+    monkeypatch.setattr(rate_limiter, "get_async_redis", lambda: redis)
+    return clock
+
+
+def test_burst_is_granted_without_waiting_then_requests_wait_for_refill(clock):
+    limiter = RateLimiter("domain", per_minute=60, burst=2)
+
+    async def run():
+        return [await limiter.acquire("situs.example") for _ in range(3)]
+
+    assert asyncio.run(run()) == [0.0, 0.0, pytest.approx(1.0)]
+
+
+def test_buckets_are_per_name_and_overrides_apply(clock):
+    limiter = RateLimiter("domain", per_minute=60, burst=1, overrides={"lambat.example": {"per_minute": 6, "burst": 1}})
+
+    async def run():
+        await limiter.acquire("situs.example")
+        await limiter.acquire("lambat.example")
+        return await limiter.acquire("lain.example"), await limiter.acquire("lambat.example")
+
+    other, slow = asyncio.run(run())
+    assert other == 0.0
+    assert slow == pytest.approx(10.0)
+
+
+def test_wait_is_capped_at_max_wait(clock):
+    limiter = RateLimiter("llm", per_minute=1, burst=1, max_wait=5)
+
+    async def run():
+        await limiter.acquire("openai")
+        return await limiter.acquire("openai")
+
+    assert asyncio.run(run()) == 0.0
+    assert clock.now == 1000.0  # gave up without sleeping the 60s refill
+
+
+def test_redis_errors_fail_open(monkeypatch):
+    def broken():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(rate_limiter, "get_async_redis", broken)
+
+    assert asyncio.run(RateLimiter("domain", per_minute=60).acquire("situs.example")) >= 0.0
+
+
+def test_disabled_limiter_never_calls_redis(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "get_async_redis", lambda: pytest.fail("redis used"))
+
+    assert asyncio.run(RateLimiter("domain", per_minute=0).acquire("situs.example")) == 0.0
+
+
+def test_limiter_domain_normalizes_host():
+    assert limiter_domain("https://WWW.Situs.Example:8443/daftar") == "situs.example"
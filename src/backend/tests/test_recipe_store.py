@@ -0,0 +1,100 @@
+import json
+
+from src.crawler import IndonesianAccountExtractor
+from src.recipe_store import build_recipe, instantiate_recipe
+
+RECORDED_IDENTITY = {
+    "full_name": "Budi Santoso",
+    "first_name": "Budi",
+    "last_name": "Santoso",
+    "username": "budisantoso88",
+    "email": "budisantoso88@gmail.com",
+    "password": "Rahasia123!",
+    "phone": "081234567890",
+    "bank_name": "BCA",
+}
+
+FRESH_IDENTITY = {
+    "full_name": "Siti Rahayu",
+    "first_name": "Siti",
+    "last_name": "Rahayu",
+    "username": "sitirahayu07",
+    "email": "sitirahayu07@yahoo.com",
+    "password": "Kunci456?",
+    "phone": "081398765432",
+    "bank_name": "BCA",
+}
+
+
+def _step(actions, url, elements=None):
+    return {
+        "model_output": {"evaluation_previous_goal": "", "memory": "", "next_goal": "", "action": actions},
+        "result": [{"extracted_content": "dropped"}],
+        "state": {"url": url, "title": "Situs", "tabs": [], "interacted_element": elements or [None] * len(actions)},
+        "metadata": {"step_number": 1},
+    }
+
+
+def _history():
+    return {"history": [
+        _step([{"go_to_url": {"url": "https://situs.example/register"}}], "https://situs.example/"),
+        _step([
+            {"input_text": {"index": 3, "text": "budisantoso88@gmail.com"}},
+            {"input_text": {"index": 4, "text": "Budi Santoso"}},
+            {"input_text": {"index": 5, "text": "Rahasia123!"}},
+        ], "https://situs.example/register"),
+        _step([{"extract_structured_data": {"query": "accounts"}}], "https://situs.example/deposit"),
+        _step([{"done": {"text": "{}", "success": True}}], "https://situs.example/deposit"),
+    ]}
+
+
+def test_recipe_replaces_identity_and_host_with_placeholders():
+    recipe = build_recipe(_history(), "https://situs.example/", [RECORDED_IDENTITY], fingerprint="abc")
+    dumped = json.dumps(recipe["history"])
+
+    assert recipe["identity_count"] == 1
+    assert recipe["fingerprint"] == "abc"
+    for value in ("budisantoso88", "Budi", "Rahasia123!", "situs.example"):
+        assert value not in dumped
+    actions = [step["model_output"]["action"] for step in recipe["history"]["history"]]
+    assert actions[1][0]["input_text"]["text"] == "{{identity_1.email}}"
+    assert actions[1][1]["input_text"]["text"] == "{{identity_1.full_name}}"
+
+
+def test_recipe_drops_llm_actions_and_results():
+    recipe = build_recipe(_history(), "https://situs.example/", [RECORDED_IDENTITY])
+    steps = recipe["history"]["history"]
+
+    assert len(steps) == 2
+    assert all(step["result"] == [] for step in steps)
+
+
+def test_recipe_without_replayable_actions_is_none():
+    history = {"history": [_step([{"done": {"text": "{}", "success": True}}], "https://situs.example/")]}
+
+    assert build_recipe(history, "https://situs.example/", [RECORDED_IDENTITY]) is None
+
+
+def test_instantiate_round_trips_to_the_new_identity_and_host():
+    recipe = build_recipe(_history(), "https://situs.example/", [RECORDED_IDENTITY])
+    history = instantiate_recipe(recipe, "https://klon-situs.example/", [FRESH_IDENTITY])
+    dumped = json.dumps(history)
+
+    assert "{{" not in dumped
+    steps = history["history"]
+    assert steps[0]["model_output"]["action"][0]["go_to_url"]["url"] == "https://klon-situs.example/register"
+    assert [action["input_text"]["text"] for action in steps[1]["model_output"]["action"]] == [
+        "sitirahayu07@yahoo.com", "Siti Rahayu", "Kunci456?"
+    ]
+    # The stored recipe is not modified by instantiation
+    assert "{{identity_1.email}}" in json.dumps(recipe)
+
+
+def test_replay_reached_recorded_page():
+    recipe = build_recipe(_history(), "https://situs.example/", [RECORDED_IDENTITY])
+    history = instantiate_recipe(recipe, "https://situs.example/", [FRESH_IDENTITY])
+    reached = IndonesianAccountExtractor._replay_reached_recorded_page
+
+    assert reached(history, "https://situs.example/register/") is True
+    assert reached(history, "https://situs.example/login") is None
+    assert reached(history, None) is None
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.recrawl_scheduler import RecrawlScheduler
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def scheduler():
+    return RecrawlScheduler(min_age_hours=24, max_age_hours=24 * 14)
+
+
+def _site(age_hours=None, crawl_count=1, account_changes=0):
+    extracted = (NOW - timedelta(hours=age_hours)).isoformat() if age_hours is not None else None
+    return {"waktu_ekstraksi": extracted, "crawl_count": crawl_count, "account_changes": account_changes}
+
+
+def test_backoff_doubles_per_failure_up_to_max_age(scheduler):
+    assert scheduler._backoff_seconds(0) == 24 * 3600
+    assert scheduler._backoff_seconds(1) == 48 * 3600
+    assert scheduler._backoff_seconds(3) == 192 * 3600
+    assert scheduler._backoff_seconds(4) == 24 * 14 * 3600
+    assert scheduler._backoff_seconds(1000) == 24 * 14 * 3600
+
+
+def test_older_sites_score_higher(scheduler):
+    scores = [scheduler.score(_site(age_hours=age), NOW) for age in (24, 72, 24 * 7)]
+
+    assert scores == sorted(scores)
+    assert scores[0] < scores[-1]
+
+
+def test_staleness_saturates_after_max_age(scheduler):
+    assert scheduler.score(_site(age_hours=24 * 14), NOW) == scheduler.score(_site(age_hours=24 * 60), NOW)
+
+
+def test_sites_whose_accounts_rotate_score_higher(scheduler):
+    stable = scheduler.score(_site(age_hours=48, crawl_count=5, account_changes=0), NOW)
+    new = scheduler.score(_site(age_hours=48, crawl_count=1), NOW)
+    rotating = scheduler.score(_site(age_hours=48, crawl_count=5, account_changes=4), NOW)
+
+    assert stable < new < rotating
+
+
+def test_missing_extraction_time_counts_as_fully_stale(scheduler):
+    assert scheduler.score(_site(age_hours=None), NOW) == scheduler.score(_site(age_hours=24 * 14), NOW)
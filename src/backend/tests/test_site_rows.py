@@ -0,0 +1,53 @@
+import pytest
+
+from src.database import Neo4jHandler
+from src.model import BankAccount, CryptoWallet, GamblingSiteData, PaymentGateway, SiteInfo
+
+
+@pytest.fixture
+def handler():
+    return Neo4jHandler()
+
+
+def _data(accounts=(), wallets=(), gateways=()):
+    return GamblingSiteData(
+        site_info=SiteInfo(site_name="situs.example", site_url="https://situs.example/daftar"),
+        bank_accounts=[BankAccount(bank_name="BCA", account_number=number, account_holder="BUDI") for number in accounts],
+        crypto_wallets=[CryptoWallet(wallet_address=address, cryptocurrency="USDT") for address in wallets],
+        payment_gateways=[PaymentGateway(gateway_name=name) for name in gateways]
+    )
+
+
+def _hash(handler, **kwargs):
+    return handler._site_rows(_data(**kwargs))["site"]["account_set_hash"]
+
+
+def test_hash_ignores_order_formatting_and_case(handler):
+    first = _hash(handler, accounts=["1234567890", "9876543210"], wallets=["0xABCDEF"])
+    second = _hash(handler, accounts=["987-654-3210", "1234 5678 90"], wallets=["0xabcdef"])
+
+    assert first is not None
+    assert first == second
+
+
+def test_hash_changes_when_an_account_rotates(handler):
+    before = _hash(handler, accounts=["1234567890", "9876543210"])
+
+    assert _hash(handler, accounts=["1234567890", "5555666677"]) != before
+    assert _hash(handler, accounts=["1234567890"]) != before
+
+
+def test_crawl_without_accounts_has_no_hash(handler):
+    # Stored for its gateways, but must not count as a rotation of the previous account set
+    assert _hash(handler, gateways=["QRIS"]) is None
+
+
+def test_invalid_accounts_are_left_out_of_rows_and_hash(handler):
+    rows = handler._site_rows(_data(accounts=["1234567890", "  "]))
+
+    assert [row["nomor_rekening"] for row in rows["accounts"]] == ["1234567890"]
+    assert rows["site"]["account_set_hash"] == _hash(handler, accounts=["1234567890"])
+
+
+def test_nothing_valid_to_store_returns_none(handler):
+    assert handler._site_rows(_data(accounts=[" "])) is None
@@ -0,0 +1,76 @@
+import pytest
+
+from src.crawler import IndonesianAccountExtractor
+from src.model import AccountType
+
+ETH_ADDRESS = "0x" + "ab" * 20
+
+
+@pytest.fixture
+def extractor():
+    return IndonesianAccountExtractor()
+
+
+def _by_value(result):
+    return {candidate.value: candidate for candidate in result.candidates}
+
+
+def test_account_with_bank_holder_and_hint_scores_highest(extractor):
+    result = extractor._scan_content("https://situs.example", "<div>Rekening BCA 1234567890 a.n. Budi Santoso</div>")
+    candidate = _by_value(result)["1234567890"]
+
+    assert candidate.kind == AccountType.BANK_ACCOUNT
+    assert candidate.provider == "BCA"
+    assert candidate.account_holder == "BUDI SANTOSO"
+    assert candidate.confidence == 1.0
+
+
+def test_account_without_holder_or_hint_scores_low(extractor):
+    result = extractor._scan_content("https://situs.example", "<p>Transfer ke BRI 9876543210</p>")
+    candidate = _by_value(result)["9876543210"]
+
+    assert candidate.confidence == 0.4
+    assert result.high_confidence(0.8) == []
+
+
+def test_holder_on_next_line_and_bank_on_previous_line(extractor):
+    html = "<p>Bank Mandiri</p><p>1122334455</p><p>atas nama Andi Wijaya</p>"
+    candidate = _by_value(extractor._scan_content("https://situs.example", html))["1122334455"]
+
+    assert candidate.provider == "MANDIRI"
+    assert candidate.account_holder == "ANDI WIJAYA"
+    assert candidate.confidence == 0.8
+
+
+def test_numbers_without_bank_or_ewallet_are_ignored(extractor):
+    result = extractor._scan_content("https://situs.example", "<p>Order 12345678901 dibuat 20240101</p>")
+
+    assert result.candidates == []
+
+
+def test_phone_numbers_only_count_next_to_ewallets(extractor):
+    html = "<p>Hubungi CS BCA 081234567890</p><p>DANA 081298765432 a.n. Siti</p>"
+    candidates = _by_value(extractor._scan_content("https://situs.example", html))
+
+    assert "081234567890" not in candidates
+    assert candidates["081298765432"].kind == AccountType.MOBILE_MONEY
+    assert candidates["081298765432"].confidence == 0.8
+
+
+def test_crypto_wallets_and_keywords(extractor):
+    html = f"<p>Deposit USDT ERC20: {ETH_ADDRESS}</p><script>var bank = 'bni';</script><p>OVO dan GoPay tersedia</p>"
+    result = extractor._scan_content("https://situs.example", html)
+    candidate = _by_value(result)[ETH_ADDRESS]
+
+    assert candidate.kind == AccountType.CRYPTO_WALLET
+    assert candidate.confidence == 0.9
+    # Script contents are stripped before matching
+    assert result.keywords == ["gopay", "ovo"]
+
+
+def test_duplicate_value_keeps_highest_confidence(extractor):
+    html = "<p>BCA 1234567890</p><p>Rekening BCA 1234567890 a.n. Budi</p>"
+    result = extractor._scan_content("https://situs.example", html)
+
+    assert len(result.candidates) == 1
+    assert result.candidates[0].confidence == 1.0
@@ -0,0 +1,67 @@
+import pytest
+
+from src.model import GamblingSiteData, SiteInfo
+from src.write_spool import WriteSpool
+
+
+def _site(name: str) -> GamblingSiteData:
+    return GamblingSiteData(site_info=SiteInfo(site_name=name, site_url=f"https://{name}"))
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return WriteSpool(directory=str(tmp_path / "spool"))
+
+
+def test_append_then_drain_stores_every_record(spool):
+    for name in ("a.example", "b.example"):
+        assert spool.append(_site(name), task_id=f"task-{name}")
+    assert spool.pending_count() == 2
+
+    stored = []
+    assert spool.drain(lambda data: stored.append(data.site_info.site_name) or True, lambda: True) == 2
+
+    assert stored == ["a.example", "b.example"]
+    assert spool.pending_count() == 0
+    assert not spool.rejected_path.exists()
+
+
+def test_records_rejected_while_connected_move_to_rejected(spool):
+    spool.append(_site("ok.example"))
+    spool.append(_site("bad.example"))
+    with spool.pending_path.open("a") as f:
+        f.write("not json\n")
+
+    stored = spool.drain(lambda data: data.site_info.site_name == "ok.example", lambda: True)
+
+    assert stored == 1
+    assert spool.pending_count() == 0
+    rejected = spool.rejected_path.read_text().splitlines()
+    assert len(rejected) == 2
+    assert "bad.example" in rejected[0]
+
+
+def test_lost_connection_hands_the_rest_back_to_pending(spool):
+    for name in ("a.example", "b.example", "c.example"):
+        spool.append(_site(name))
+    calls = []
+
+    def store(data):
+        calls.append(data.site_info.site_name)
+        return len(calls) == 1  # the database drops after the first record
+
+    assert spool.drain(store, lambda: False) == 1
+    assert spool.pending_count() == 2
+    assert not list(spool.directory.glob("draining-*.jsonl"))
+
+    assert spool.drain(lambda data: True, lambda: True) == 2
+    assert spool.pending_count() == 0
+
+
+def test_drain_picks_up_a_file_left_by_a_crashed_replayer(spool):
+    spool.append(_site("a.example"))
+    spool.pending_path.rename(spool.directory / "draining-1.jsonl")
+    spool.append(_site("b.example"))
+
+    assert spool.pending_count() == 2
+    assert spool.drain(lambda data: True, lambda: True) == 2
@@ -18,10 +18,22 @@ export interface TaskStatus {
   result: Record<string, unknown> | null;
 }
 
+export interface TaskStatusBatchResponse {
+  tasks: (TaskStatus & { updated_at?: number | null })[];
+  server_time: number;
+}
+
 export interface TaskInfo {
   task_id: string;
   status: string;
-  worker: string;
+  result?: Record<string, unknown> | null;
+  created_at?: string | null;
+  updated_at?: string | null;
+  kind?: "single" | "batch" | "batch_item" | null;
+  urls?: string[] | null;
+  parent_id?: string | null;
+  retry_of?: string | null;
+  worker?: string;
   args?: unknown[];
   kwargs?: Record<string, unknown>;
   eta?: string | null;
@@ -32,6 +44,8 @@ export interface TaskListResponse {
   status: string;
   tasks: TaskInfo[];
   total: number;
+  offset?: number;
+  limit?: number | null;
 }
 
 export interface SitusJudiRequest {
@@ -143,6 +157,26 @@ const taskApi = {
     return response.json();
   },
 
+  // Get many task statuses in one request (optionally only those changed since `since`)
+  async getTaskStatuses(
+    taskIds: string[],
+    since?: number
+  ): Promise<TaskStatusBatchResponse> {
+    const response = await fetch(`${API_BASE_URL}/tasks/status`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({ task_ids: taskIds, since }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Failed to get task statuses: ${response.statusText}`);
+    }
+
+    return response.json();
+  },
+
   // Get all tasks
   async getAllTasks(): Promise<TaskListResponse> {
     const response = await fetch(`${API_BASE_URL}/tasks`);
@@ -236,15 +270,71 @@ export const useStartBatchAnalysis = () => {
   });
 };
 
-// Hook to get task status with polling
+// Hook to get task status: live updates over SSE, polling only while the stream is down
+// The server sends an event (status or keepalive) at least every TASK_EVENTS_KEEPALIVE seconds
+const STREAM_STALL_MS = 45000;
+
 export const useTaskStatus = (taskId: string, enabled: boolean = true) => {
   const previousStatusRef = useRef<string | null>(null);
+  const streamingRef = useRef<boolean>(false);
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    if (!enabled || !taskId || typeof EventSource === "undefined") return;
+
+    const source = new EventSource(`${API_BASE_URL}/tasks/${taskId}/events`);
+    let lastEventAt = Date.now();
+
+    const fallBackToPolling = () => {
+      if (!streamingRef.current) return;
+      streamingRef.current = false;
+      // Refetch now so refetchInterval is re-evaluated and polling resumes
+      queryClient.invalidateQueries({ queryKey: ["task", taskId] });
+    };
+
+    source.onmessage = (event) => {
+      lastEventAt = Date.now();
+      // Only trust the stream once it has delivered the current status
+      streamingRef.current = true;
+      const data = JSON.parse(event.data) as TaskStatus;
+      queryClient.setQueryData(["task", taskId], {
+        task_id: data.task_id,
+        status: data.status,
+        result: data.result,
+      });
+      if (isTaskCompleted(data.status)) {
+        source.close();
+        streamingRef.current = false;
+      }
+    };
+    source.addEventListener("keepalive", () => {
+      lastEventAt = Date.now();
+    });
+    source.onerror = () => {
+      // EventSource reconnects on its own; polling covers the gap
+      fallBackToPolling();
+    };
+    const stallTimer = setInterval(() => {
+      if (Date.now() - lastEventAt > STREAM_STALL_MS) {
+        fallBackToPolling();
+      }
+    }, 5000);
+
+    return () => {
+      clearInterval(stallTimer);
+      source.close();
+      streamingRef.current = false;
+    };
+  }, [taskId, enabled, queryClient]);
 
   const query = useQuery({
     queryKey: ["task", taskId],
     queryFn: () => taskApi.getTaskStatus(taskId),
     enabled: enabled && !!taskId,
     refetchInterval: (query) => {
+      if (streamingRef.current) {
+        return false; // updates arrive over SSE
+      }
       // Poll every 10 seconds while task is running for faster updates
       const data = query.state.data;
       if (data && isTaskRunning(data.status)) {
@@ -386,6 +476,9 @@ export const useAllTasks = (enabled: boolean = true) => {
           status: task.status,
           result: {
             message: `Task ${task.status.toLowerCase()}`,
+            ...(task.result ?? {}),
+            urls: task.urls,
+            created_at: task.created_at,
             worker: task.worker,
             args: task.args,
             kwargs: task.kwargs,
@@ -428,6 +521,9 @@ export const useActiveTasks = (enabled: boolean = true) => {
           status: task.status,
           result: {
             message: `Task ${task.status.toLowerCase()}`,
+            ...(task.result ?? {}),
+            urls: task.urls,
+            created_at: task.created_at,
             worker: task.worker,
             args: task.args,
             kwargs: task.kwargs,
@@ -519,6 +615,9 @@ export const useTaskPolling = (options?: {
           status: task.status,
           result: {
             message: `Task ${task.status.toLowerCase()}`,
+            ...(task.result ?? {}),
+            urls: task.urls,
+            created_at: task.created_at,
             worker: task.worker,
             args: task.args,
             kwargs: task.kwargs,